@@ -0,0 +1,54 @@
+"""
+Micro-benchmark utils.calculator: loop scalar per part vs satu call array.
+Jalankan dari root repo: python benchmarks/bench_calculator.py [jumlah_part]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.calculator import output_per_hour, required_hours, required_days  # noqa: E402
+
+EFFICIENCY = 0.85
+EFF_HOURS_DAY = 8 * 3 * EFFICIENCY
+
+
+def make_parts(n, seed=0):
+    rng = np.random.default_rng(seed)
+    ct = rng.uniform(15, 90, n)
+    ct[rng.random(n) < 0.05] = 0        # CT belum diisi
+    ct[rng.random(n) < 0.02] = np.nan   # CT kosong
+    cav = rng.integers(1, 9, n).astype(float)
+    qty = rng.integers(0, 50_000, n).astype(float)
+    return ct, cav, qty
+
+
+def run_scalar(ct, cav, qty):
+    out = []
+    for c, v, q in zip(ct.tolist(), cav.tolist(), qty.tolist()):
+        c = 0 if c != c else c  # NaN -> 0, sama dengan hasil versi array
+        hr = required_hours(q, output_per_hour(c, v, EFFICIENCY))
+        out.append(required_days(hr, EFF_HOURS_DAY))
+    return np.array(out)
+
+
+def run_array(ct, cav, qty):
+    return required_days(required_hours(qty, output_per_hour(ct, cav, EFFICIENCY)), EFF_HOURS_DAY)
+
+
+def main(n=100_000, repeat=5):
+    ct, cav, qty = make_parts(n)
+    assert np.allclose(run_scalar(ct, cav, qty), run_array(ct, cav, qty))
+
+    t_scalar = min(timeit.repeat(lambda: run_scalar(ct, cav, qty), number=1, repeat=repeat))
+    t_array = min(timeit.repeat(lambda: run_array(ct, cav, qty), number=1, repeat=repeat))
+    print(f"parts      : {n:,}")
+    print(f"scalar loop: {t_scalar * 1000:9.2f} ms")
+    print(f"array call : {t_array * 1000:9.2f} ms")
+    print(f"speedup    : {t_scalar / t_array:9.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
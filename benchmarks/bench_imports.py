@@ -0,0 +1,67 @@
+"""
+Benchmark waktu import module service/page di interpreter baru (python -X importtime).
+Cek juga import harus bebas side effect: tidak print apa pun dan tidak load library supabase/httpx.
+Jalankan dari root repo: python benchmarks/bench_imports.py [jumlah_ulang]
+"""
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = [
+    "supabase_client",
+    "services.forecast_service",
+    "services.master_service",
+    "services.rules_service",
+    "services.machine_service",
+    "services.calendar_service",
+    "pages.data_loader",
+    "pages.data_loader_material",
+]
+HEAVY = ("supabase", "httpx", "postgrest", "gotrue")
+
+
+def import_once(module):
+    """Return (cumulative µs module, stdout, set library berat yang ikut ter-import)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} gagal:\n{proc.stderr[-2000:]}")
+    cumulative = 0
+    heavy = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if not parts[1].isdigit():
+            continue  # header
+        name = parts[2]
+        if name == module:
+            cumulative = int(parts[1])
+        top = name.split(".")[0]
+        if top in HEAVY:
+            heavy.add(top)
+    return cumulative, proc.stdout.strip(), heavy
+
+
+def main(repeat=5):
+    print(f"{'module':32} {'import (ms)':>12}  side effect")
+    for module in MODULES:
+        runs = [import_once(module) for _ in range(repeat)]
+        best = min(r[0] for r in runs) / 1000
+        _, stdout, heavy = runs[-1]
+        notes = []
+        if stdout:
+            notes.append(f"print: {stdout.splitlines()[0][:40]!r}")
+        if heavy:
+            notes.append("load " + ",".join(sorted(heavy)))
+        print(f"{module:32} {best:12.1f}  {'; '.join(notes) or '-'}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,60 @@
+"""
+Benchmark utils.mrp: explosion + netting satu plant penuh (ribuan part, horizon 90 hari).
+Jalankan dari root repo: python benchmarks/bench_mrp.py [jumlah_part] [jumlah_hari]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.mrp import lot_output, mrp_explosion  # noqa: E402
+
+START = pd.Timestamp("2026-01-01")
+
+
+def make_plant(n_parts, days, lots_per_part_day=0.25, seed=0):
+    rng = np.random.default_rng(seed)
+    master = pd.DataFrame({
+        "part_no": [f"P{i:05d}" for i in range(n_parts)],
+        "gross": rng.uniform(5, 800, n_parts),
+        "type_material": rng.choice(["PP", "ABS", "PC", "PA6", "POM"], n_parts),
+        "grade_material": [f"G{i}" for i in rng.integers(0, 60, n_parts)],
+        "color_material": rng.choice(["NATURAL", "BLACK", "WHITE", "GREY"], n_parts),
+        "cycle_time": rng.uniform(15, 90, n_parts),
+        "cav": rng.integers(1, 9, n_parts),
+    })
+    n_lots = int(n_parts * days * lots_per_part_day)
+    part = rng.integers(0, n_parts, n_lots)
+    lots = pd.DataFrame({
+        "date": START + pd.to_timedelta(rng.integers(0, days, n_lots), unit="D"),
+        "part_no": master["part_no"].to_numpy()[part],
+        "qty": lot_output(master["cycle_time"].to_numpy()[part], master["cav"].to_numpy()[part]),
+    })
+    mats = master.drop_duplicates(["type_material", "grade_material", "color_material"])
+    balance = mats[["type_material", "grade_material", "color_material"]].assign(
+        date="2025-12-31", qty_in_harian=rng.uniform(0, 50_000, len(mats)), qty_out_harian=0.0
+    )
+    incoming = mats[["type_material", "grade_material", "color_material"]].assign(
+        date=START + pd.Timedelta(days=days // 3), qty=rng.uniform(0, 20_000, len(mats))
+    )
+    return master, lots, balance, incoming
+
+
+def main(n_parts=3000, days=90, repeat=5):
+    master, lots, balance, incoming = make_plant(n_parts, days)
+    run = lambda: mrp_explosion(lots, master, balance, incoming, START, days)  # noqa: E731
+    df_req, _, _, df_summary = run()
+    best = min(timeit.repeat(run, number=1, repeat=repeat))
+    print(f"parts      : {n_parts:,}")
+    print(f"lots       : {len(lots):,}")
+    print(f"materials  : {len(df_req):,} x {days} hari")
+    print(f"shortage   : {int(df_summary['shortage_date'].notna().sum()):,} material")
+    print(f"mrp run    : {best * 1000:9.2f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
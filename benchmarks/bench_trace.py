@@ -0,0 +1,100 @@
+"""
+Benchmark utils.trace_index: build index satu tahun transaksi + forward / backward trace per query.
+Jalankan dari root repo: python benchmarks/bench_trace.py [jumlah_part] [jumlah_hari]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.trace_index import CONSUME_HOURS, DOWNSTREAM_DAYS, TraceIndex  # noqa: E402
+
+START = pd.Timestamp("2026-01-01")
+LINES = ["250T", "450T", "600T", "850T", "1500T"]
+
+
+def make_history(n_parts, days, seed=0):
+    """
+    Transaksi acak satu periode. Separuh produksi mengikuti issue (line sama, part dari material lot, dalam
+    CONSUME_HOURS) dan separuh wip/fg/delivery mengikuti produksi (part sama, dalam DOWNSTREAM_DAYS), supaya
+    trace benar-benar berantai; sisanya noise. Return (parts_by_material, stages, lot contoh, no delivery contoh).
+    """
+    rng = np.random.default_rng(seed)
+    parts = np.array([f"P{i:05d}" for i in range(n_parts)])
+    materials = np.array([f"MAT-{i:03d}" for i in range(max(n_parts // 20, 1))])
+    part_material = rng.choice(materials, n_parts)
+    parts_by_material = pd.Series(parts).groupby(part_material).apply(set).to_dict()
+    parts_of = {m: np.array(sorted(p)) for m, p in parts_by_material.items()}
+    used = np.array(sorted(parts_of))
+
+    def ts(n, hours=24 * days):
+        return START + pd.to_timedelta(rng.integers(0, hours, n), unit="h")
+
+    def follow(src, n, max_hours):
+        """n baris yang mengikuti baris acak src: (posisi src, ts src + 0..max_hours jam)."""
+        pos = rng.integers(0, len(src), n)
+        return pos, src["ts"].to_numpy()[pos] + pd.to_timedelta(rng.integers(0, max_hours, n), unit="h").to_numpy()
+
+    n_lots = days * 20
+    lots = np.array([f"LOT{i:06d}" for i in range(n_lots)])
+    receipts = pd.DataFrame({"lot_no": lots, "material_id_unique": rng.choice(used, n_lots), "ts": ts(n_lots), "qty": 1000.0})
+    n_issue = n_lots * 5
+    lot_idx = rng.integers(0, n_lots, n_issue)
+    issues = pd.DataFrame({
+        "lot_no": lots[lot_idx], "material_id_unique": receipts["material_id_unique"].to_numpy()[lot_idx],
+        "line": rng.choice(LINES, n_issue), "ts": ts(n_issue), "qty": 50.0,
+    })
+
+    n_prod = days * 24 * len(LINES)
+    issue_pos, prod_ts = follow(issues, n_prod // 2, CONSUME_HOURS)
+    chained = pd.DataFrame({
+        "line": issues["line"].to_numpy()[issue_pos],
+        "part_no": [rng.choice(parts_of[m]) for m in issues["material_id_unique"].to_numpy()[issue_pos]],
+        "ts": prod_ts, "qty": 100.0,
+    })
+    noise = pd.DataFrame({"line": rng.choice(LINES, n_prod - len(chained)), "part_no": rng.choice(parts, n_prod - len(chained)), "ts": ts(n_prod - len(chained)), "qty": 100.0})
+    production = pd.concat([chained, noise], ignore_index=True)
+    stages = {"receipts": receipts, "issues": issues, "production": production}
+
+    for stage, n in (("wip", n_prod // 2), ("fg", n_prod // 2), ("delivery", n_prod // 4)):
+        pos, down_ts = follow(chained, n // 2, DOWNSTREAM_DAYS * 24)
+        part_no = np.concatenate([chained["part_no"].to_numpy()[pos], rng.choice(parts, n - n // 2)])
+        stages[stage] = pd.DataFrame({
+            "part_no": part_no, "ts": np.concatenate([down_ts, ts(n - n // 2).to_numpy()]),
+            "qty": 100.0, "ref": [f"{stage}-{i // 8}" for i in range(n)],
+        })
+    # Contoh query: delivery pertama (pos = baris produksi berantai yang diikutinya) dan lot dari issue di awal rantai itu
+    sample_lot = issues["lot_no"].iloc[issue_pos[pos[0]]]
+    return parts_by_material, stages, sample_lot, stages["delivery"]["ref"].iloc[0]
+
+
+def main(n_parts=3000, days=365, repeat=20):
+    parts_by_material, stages, lot, no_delivery = make_history(n_parts, days)
+
+    def build():
+        index = TraceIndex(parts_by_material)
+        for stage, df in stages.items():
+            index.add(stage, df)
+        return index
+
+    build_s = min(timeit.repeat(build, number=1, repeat=3))
+    index = build()
+    fwd = index.forward(lot)
+    bwd = index.backward(no_delivery)
+    # Timing trace kosong tidak berarti apa-apa: pastikan query contoh benar-benar menelusuri rantai
+    assert len(fwd["issues"]) and len(fwd["production"]) and len(fwd["delivery"]), "forward trace contoh kosong"
+    assert len(bwd["production"]) and len(bwd["issues"]) and len(bwd["receipts"]), "backward trace contoh kosong"
+    fwd_s = min(timeit.repeat(lambda: index.forward(lot), number=1, repeat=repeat))
+    bwd_s = min(timeit.repeat(lambda: index.backward(no_delivery), number=1, repeat=repeat))
+    print(f"events     : {sum(len(df) for df in stages.values()):,}")
+    print(f"build      : {build_s * 1000:9.2f} ms")
+    print(f"forward    : {fwd_s * 1000:9.2f} ms  ({len(fwd['production']):,} produksi, {len(fwd['delivery']):,} delivery)")
+    print(f"backward   : {bwd_s * 1000:9.2f} ms  ({len(bwd['issues']):,} issue, {len(bwd['receipts']):,} lot)")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,32 @@
+import time
+
+import streamlit as st
+
+from services import job_service
+
+AUTO_REFRESH_SEC = 3
+
+
+def job_result(kind, params, input_version, label="Report"):
+    """
+    Ambil hasil report dari job_service tanpa menghitung di request ini.
+    Kalau versi terbaru belum selesai: tampilkan hasil sebelumnya (kalau ada) + info status,
+    kalau belum ada hasil sama sekali: tampilkan progress lalu auto-refresh halaman.
+    """
+    job, result = job_service.request(kind, params, input_version)
+    status = job["status"] if job else job_service.STATUS_QUEUED
+
+    if status == job_service.STATUS_FAILED:
+        st.error(f"❌ {label} gagal dihitung di background.")
+        with st.expander("Detail error"):
+            st.code(job.get("error") or "-")
+        if st.button("🔁 Hitung Ulang", key=f"retry_{kind}"):
+            job_service.submit(kind, params, input_version)
+            st.rerun()
+    elif status != job_service.STATUS_DONE:
+        if result is None:
+            st.info(f"⏳ {label} sedang dihitung di background ({status}). Halaman akan refresh otomatis...")
+            time.sleep(AUTO_REFRESH_SEC)
+            st.rerun()
+        st.caption(f"⏳ Menampilkan {label.lower()} sebelumnya, versi terbaru sedang dihitung ({status}).")
+    return result
@@ -0,0 +1,24 @@
+import streamlit as st
+
+from services.material_service import get_material_vocabulary
+
+
+def material_selectboxes(key_prefix, labels=("Type Material", "Grade Material", "Color Material")):
+    """
+    Selectbox Type -> Grade -> Color bertingkat (grade sesuai type, color sesuai type+grade) dari vocabulary
+    material yang di-cache: ganti pilihan cukup lookup dict, tanpa query. Taruh di LUAR st.form supaya
+    pilihan turunan ikut ter-update. Kalau List_Material kosong, fallback text input. Return (type, grade, color).
+    """
+    vocab = get_material_vocabulary()
+    c1, c2, c3 = st.columns(3)
+
+    def pick(col, label, options, key):
+        with col:
+            if options:
+                return st.selectbox(label, options, key=f"{key_prefix}_{key}")
+            return st.text_input(label, key=f"{key_prefix}_{key}_text")
+
+    type_material = pick(c1, labels[0], vocab["type_material"], "type")
+    grade_material = pick(c2, labels[1], vocab["grade_by_type"].get(type_material, []), "grade")
+    color_material = pick(c3, labels[2], vocab["color_by_type_grade"].get((type_material, grade_material), []), "color")
+    return type_material, grade_material, color_material
@@ -1,5 +1,40 @@
+import inspect
+import os
+
+import pandas as pd
 import streamlit as st
 
+from utils import query_metrics
+
+def _debug_enabled():
+    """Panel debug aktif kalau URL ada ?debug=1 atau env PPIC_DEBUG=1."""
+    if os.environ.get("PPIC_DEBUG") == "1":
+        return True
+    try:
+        return st.query_params.get("debug") == "1"
+    except Exception:
+        return False
+
+def _query_debug_panel(page, last_calls):
+    """Panel query Supabase: rerun sebelumnya untuk session ini + agregat semua session."""
+    summary = query_metrics.summarize(last_calls)
+    with st.expander(f"🛠️ Debug Query ({page}) — rerun sebelumnya: {summary['round_trips']} round trip, {summary['ms']:.0f} ms"):
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Round Trip", summary["round_trips"], help=f"{summary['calls']} execute(), sisanya numpang single-flight")
+        c2.metric("Total Latency", f"{summary['ms']:.0f} ms")
+        c3.metric("Rows", f"{summary['rows']:,}")
+        c4.metric("Payload", f"{summary['bytes'] / 1024:,.1f} KB")
+        if last_calls:
+            st.dataframe(pd.DataFrame(last_calls).drop(columns=["ts"]), use_container_width=True, hide_index=True)
+
+        st.caption("Agregat semua session (sejak server start), urut total waktu")
+        totals = query_metrics.page_totals()
+        if totals:
+            st.dataframe(pd.DataFrame(totals), use_container_width=True, hide_index=True)
+        path = query_metrics.export_prometheus(force=True)
+        if path:
+            st.caption(f"Prometheus text: `{path}`")
+
 def show_navbar():
     st.markdown("""
         <style>
@@ -38,3 +73,10 @@ def show_navbar():
             </div>
         </div>
     """, unsafe_allow_html=True)
+
+    # Instrumentasi query: tandai rerun baru untuk page pemanggil (nama file script page)
+    page = os.path.splitext(os.path.basename(inspect.currentframe().f_back.f_code.co_filename))[0]
+    last_calls = query_metrics.begin_run(page)
+    query_metrics.export_prometheus()
+    if _debug_enabled():
+        _query_debug_panel(page, last_calls)
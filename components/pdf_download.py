@@ -0,0 +1,51 @@
+import streamlit as st
+
+from services import document_service
+
+POLL_SEC = 1  # selama PDF belum selesai, tombol download dicek ulang tiap POLL_SEC (hanya fragment ini yang rerun)
+
+# st.fragment (Streamlit >= 1.37) bisa rerun sendiri; versi lama fallback ke tombol cek ulang manual
+_fragment = getattr(st, "fragment", None)
+
+
+def submit_pdf(state_key, kind, docs, file_name, label):
+    """Render PDF di worker (document_service.submit_render); Future disimpan di session_state untuk show_pdf_download."""
+    st.session_state[state_key] = (file_name, document_service.submit_render(kind, docs), label)
+
+
+def _download_button(state_key):
+    """Tombol download kalau Future sudah selesai; return False kalau render masih jalan (tidak pernah menunggu)."""
+    file_name, future, label = st.session_state[state_key]
+    if not future.done():
+        st.info("⏳ PDF sedang dibuat...")
+        return False
+    try:
+        st.download_button(label=label, data=future.result(), file_name=file_name, mime="application/pdf", key=f"{state_key}_download")
+    except Exception as e:
+        st.error(f"❌ PDF gagal dibuat: {e}")
+    return True
+
+
+if _fragment is not None:
+    @_fragment(run_every=POLL_SEC)
+    def _poll_download(state_key):
+        if _download_button(state_key):
+            # selesai: rerun halaman sekali supaya tombol muncul tanpa polling lagi
+            st.rerun()
+
+
+def show_pdf_download(state_key):
+    """
+    Tombol download PDF dari submit_pdf(state_key, ...). Tidak menunggu render: kalau belum selesai tampilkan info
+    dan poll lewat fragment (atau tombol cek ulang di Streamlit lama); tombol muncul di rerun berikutnya.
+    """
+    if state_key not in st.session_state:
+        return
+    _, future, _ = st.session_state[state_key]
+    if future.done():
+        _download_button(state_key)
+    elif _fragment is not None:
+        _poll_download(state_key)
+    else:
+        _download_button(state_key)
+        st.button("🔄 Cek PDF", key=f"{state_key}_check")
@@ -0,0 +1,219 @@
+"""
+Profiler render page Streamlit (opt-in).
+
+Aktif kalau URL ada ?profile=1 (atau ?profile=cprofile / ?profile=pyinstrument),
+atau env PPIC_PROFILE=1|cprofile|pyinstrument. Kalau tidak aktif semua hook di bawah no-op.
+
+Pemakaian di page:
+    prof = page_profiler("monitor_finishgood")
+    prof.mark("fetch")          # stage baru mulai di sini (stage sebelumnya selesai)
+    ...
+    with stage("style"): ...    # atau context manager / decorator @profiled("transform")
+    prof.finish()               # tampilkan waterfall rerun ini (taruh di akhir script)
+"""
+import functools
+import io
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_DIR = os.environ.get("PPIC_PROFILE_DIR", os.path.join(ROOT_DIR, ".profiles"))
+KEEP_SLOWEST = 5  # dump cProfile/pyinstrument hanya untuk N rerun paling lambat per page
+
+_local = threading.local()
+_slowest = {}      # page -> list durasi (detik) rerun yang sudah di-dump
+_slowest_lock = threading.Lock()
+_active_cprofile = {}  # "prof" & "thread": cProfile aktif (cuma boleh satu per process)
+
+
+def _profile_mode():
+    mode = os.environ.get("PPIC_PROFILE", "")
+    try:
+        mode = st.query_params.get("profile", mode)
+    except Exception:
+        pass
+    mode = str(mode).strip().lower()
+    return "" if mode in ("", "0", "false", "off") else mode
+
+
+class _NullProfiler:
+    enabled = False
+
+    def mark(self, name):
+        pass
+
+    def finish(self):
+        pass
+
+
+class PageProfiler:
+    """Catat stage bernama (start/end) untuk satu rerun page."""
+
+    enabled = True
+
+    def __init__(self, page, mode):
+        self.page = page
+        self.mode = mode
+        self.t0 = time.perf_counter()
+        self.stages = []       # dict name, start, end (detik relatif t0), depth
+        self._open_mark = None
+        self._depth = 0
+        self._deep = None
+        if mode == "cprofile":
+            import cProfile
+            with _slowest_lock:
+                # Rerun yang berhenti di tengah (st.stop / exception) tidak sempat disable cProfile-nya
+                old = _active_cprofile.get("prof")
+                if old is not None and not _active_cprofile["thread"].is_alive():
+                    old.disable()
+                    _active_cprofile.clear()
+                try:
+                    self._deep = cProfile.Profile()
+                    self._deep.enable()
+                    _active_cprofile.update(prof=self._deep, thread=threading.current_thread())
+                except ValueError:  # profiler lain (session lain) sedang aktif di process ini
+                    self._deep = None
+                    st.caption("⚠️ cProfile sedang dipakai session lain, profiling hanya waterfall stage.")
+        elif mode == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self._deep = Profiler()
+                self._deep.start()
+            except ImportError:
+                st.caption("⚠️ pyinstrument tidak terpasang, profiling hanya waterfall stage.")
+
+    def _now(self):
+        return time.perf_counter() - self.t0
+
+    def mark(self, name):
+        """Tutup stage mark sebelumnya dan mulai stage baru (buat script flat tanpa indent ulang)."""
+        now = self._now()
+        if self._open_mark is not None:
+            self._open_mark["end"] = now
+        self._open_mark = {"name": name, "start": now, "end": None, "depth": 0}
+        self.stages.append(self._open_mark)
+
+    def push(self, name):
+        self._depth += 1
+        entry = {"name": name, "start": self._now(), "end": None, "depth": self._depth}
+        self.stages.append(entry)
+        return entry
+
+    def pop(self, entry):
+        entry["end"] = self._now()
+        self._depth -= 1
+
+    def _stop_deep(self, total):
+        if self._deep is None:
+            return None
+        if self.mode == "cprofile":
+            self._deep.disable()
+            with _slowest_lock:
+                if _active_cprofile.get("prof") is self._deep:
+                    _active_cprofile.clear()
+        else:
+            self._deep.stop()
+
+        with _slowest_lock:
+            kept = _slowest.setdefault(self.page, [])
+            if len(kept) >= KEEP_SLOWEST and total <= min(kept):
+                return None
+            kept.append(total)
+            kept.sort(reverse=True)
+            del kept[KEEP_SLOWEST:]
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        if self.mode == "cprofile":
+            import pstats
+            path = os.path.join(PROFILE_DIR, f"{self.page}_{stamp}_{total * 1000:.0f}ms.prof")
+            self._deep.dump_stats(path)
+            buf = io.StringIO()
+            pstats.Stats(self._deep, stream=buf).sort_stats("cumulative").print_stats(25)
+            return path, buf.getvalue()
+        path = os.path.join(PROFILE_DIR, f"{self.page}_{stamp}_{total * 1000:.0f}ms.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self._deep.output_html())
+        return path, self._deep.output_text(unicode=True, color=False)
+
+    def finish(self):
+        """Tutup stage terakhir lalu tampilkan waterfall (dan hasil cProfile/pyinstrument kalau ada)."""
+        total = self._now()
+        if self._open_mark is not None and self._open_mark["end"] is None:
+            self._open_mark["end"] = total
+        _local.profiler = None
+        deep = self._stop_deep(total)
+
+        df = pd.DataFrame(self.stages, columns=["name", "start", "end", "depth"])
+        if not df.empty:
+            df["end"] = df["end"].fillna(total)
+            df["ms"] = (df["end"] - df["start"]) * 1000
+            df["start_ms"] = df["start"] * 1000
+            df["share"] = df["ms"] / (total * 1000) if total > 0 else 0.0
+            df["stage"] = ["  " * d + n for n, d in zip(df["name"], df["depth"])]
+
+        with st.expander(f"⏱️ Profiler {self.page}: {total * 1000:.0f} ms rerun ini", expanded=True):
+            if df.empty:
+                st.caption("Belum ada stage yang dicatat (pakai prof.mark / stage / @profiled).")
+            else:
+                st.dataframe(
+                    df[["stage", "start_ms", "ms", "share"]],
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "stage": "Stage",
+                        "start_ms": st.column_config.NumberColumn("Mulai (ms)", format="%.1f"),
+                        "ms": st.column_config.NumberColumn("Durasi (ms)", format="%.1f"),
+                        "share": st.column_config.ProgressColumn("Porsi", format="%.2f", min_value=0, max_value=1),
+                    },
+                )
+            if deep:
+                path, text = deep
+                st.caption(f"Profil detail (rerun lambat) disimpan: `{path}`")
+                st.code(text[:8000])
+
+
+def page_profiler(page):
+    """Mulai profiler untuk rerun ini kalau opt-in aktif, kalau tidak return profiler no-op."""
+    mode = _profile_mode()
+    if not mode:
+        _local.profiler = None
+        return _NullProfiler()
+    prof = PageProfiler(page, mode)
+    _local.profiler = prof
+    return prof
+
+
+class stage:
+    """Context manager stage bernama; no-op kalau profiler tidak aktif."""
+
+    def __init__(self, name):
+        self.name = name
+        self._entry = None
+
+    def __enter__(self):
+        prof = getattr(_local, "profiler", None)
+        if prof is not None:
+            self._entry = prof.push(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        prof = getattr(_local, "profiler", None)
+        if prof is not None and self._entry is not None:
+            prof.pop(self._entry)
+        return False
+
+
+def profiled(name=None):
+    """Decorator: seluruh pemanggilan fungsi dicatat sebagai stage (default nama fungsi)."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name or fn.__name__):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
@@ -0,0 +1,58 @@
+import numpy as np
+import streamlit as st
+
+from services import projection_service
+from utils.projection import (
+    CRITICAL_DAYS,
+    STATUS_CRITICAL,
+    STATUS_MINUS,
+    STATUS_SAFE,
+    STATUS_WARNING,
+    WARNING_DAYS,
+)
+
+STATUS_ICON = {
+    STATUS_MINUS: "🟥 STOCK MINUS",
+    STATUS_CRITICAL: "🟧 KRITIS",
+    STATUS_WARNING: "🟨 WASPADA",
+    STATUS_SAFE: "🟩 AMAN",
+}
+
+
+def show_stockout_ranking(kind, title, item_label="Item", unit="", top=20):
+    """Panel ranking urgensi stok (days of cover terpendek di atas) dari projection_service."""
+    with st.expander(f"⏳ {title}", expanded=False):
+        try:
+            df = projection_service.get_stockout_ranking(kind)
+        except Exception as e:
+            st.warning(f"Proyeksi stok belum bisa dihitung: {e}")
+            return
+
+        if df.empty:
+            st.info("Belum ada item untuk diproyeksikan.")
+            return
+
+        counts = df["status"].value_counts()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Stock Minus", int(counts.get(STATUS_MINUS, 0)))
+        c2.metric(f"Kritis (≤ {CRITICAL_DAYS} hari)", int(counts.get(STATUS_CRITICAL, 0)))
+        c3.metric(f"Waspada (≤ {WARNING_DAYS} hari)", int(counts.get(STATUS_WARNING, 0)))
+
+        view = df.head(top).copy()
+        view["days_of_cover"] = view["days_of_cover"].replace(np.inf, np.nan)
+        view["status"] = view["status"].map(STATUS_ICON)
+        st.dataframe(
+            view,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "item": item_label,
+                "on_hand": st.column_config.NumberColumn(f"Stok {unit}".strip(), format="%.1f"),
+                "avg_daily_demand": st.column_config.NumberColumn(f"Pakai/Hari {unit}".strip(), format="%.1f"),
+                "days_of_cover": st.column_config.NumberColumn("Cover (Hari)", format="%.1f", help="Kosong = aman sampai akhir horizon"),
+                "stockout_date": st.column_config.DateColumn("Proyeksi Stockout"),
+                "ending_balance": st.column_config.NumberColumn("Saldo Akhir Horizon", format="%.1f"),
+                "status": "Status",
+            },
+        )
+        st.caption(f"Horizon {projection_service.HORIZON_DAYS} hari: saldo sekarang + jadwal produksi/incoming/PO terbuka - konsumsi forecast.")
@@ -1,12 +1,13 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from supabase import create_client
+from supabase_client import create_client
 from postgrest.exceptions import APIError 
+from services.machine_service import get_machine_tonages, tonage_label
+from services.calendar_service import get_monthly_capacity_hours
 
 # --- KONSTANTA & CONFIG ---
 HOURS_PER_WORKDAY = 8.0 
-MACHINES = ['250T','850T','1500T']
 
 # Mapping Kolom Table Baru (forecast_monthly)
 FC_TABLE = 'forecast_monthly'
@@ -52,6 +53,15 @@ def fetch_master_rules():
         st.error(f"❌ Gagal ambil data Master/Rules: {e}")
         return pd.DataFrame(), pd.DataFrame()
 
+@st.cache_data(ttl=3600)
+def fetch_machine_list():
+    """Kelas tonase mesin aktif dari table machine: DataFrame [machine, n_machines]."""
+    try:
+        return get_machine_tonages()
+    except Exception as e:
+        st.error(f"❌ Gagal ambil data mesin: {e}")
+        return pd.DataFrame(columns=['machine', 'n_machines'])
+
 @st.cache_data(ttl=60) # Cache sebentar aja biar kalau ada upload baru cepet update
 def get_available_months():
     """Ambil list bulan unik yang ada di table forecast_monthly"""
@@ -105,22 +115,28 @@ def process_latest_revision(df_raw):
     
     return df_clean
 
-def calculate_naoh_monthly(rules_series, num_days=30):
-    """Hitung Kapasitas (Sama kayak sebelumnya)"""
-    MST_Hours = 24.0 * num_days
+def calculate_naoh_monthly(rules_series, df_machines, selected_month):
+    """Hitung Kapasitas per kelas tonase dari kalender kerja (SHIFT + holiday) x jumlah mesin"""
+    ym = str(selected_month)[:7]
+    shift_hours = float(rules_series.get('shift_hours', HOURS_PER_WORKDAY) or HOURS_PER_WORKDAY)
     efficiency = rules_series['efficiency'] # Asumsi 0.9 (90%)
     
+    # Jam kerja tersedia per kelas (sudah x n_machines) untuk bulan tsb
+    df_hours = get_monthly_capacity_hours(ym, 1, df_machines['n_machines'].to_numpy(dtype=float), shift_hours)
+    MST_Hours = df_hours[ym].to_numpy() if ym in df_hours.columns else np.zeros(len(df_machines))
+    
     NAOH_Hours = MST_Hours * efficiency
     NAOH_Days = NAOH_Hours / HOURS_PER_WORKDAY
     
     return pd.DataFrame({
-        'machine': MACHINES,
-        'Kapasitas (Hari)': [NAOH_Days] * len(MACHINES)
+        'machine': df_machines['machine'].values,
+        'Kapasitas (Hari)': NAOH_Days
     })
 
-def calculate_machine_load(df_fc_clean, df_mst, rules_series):
-    """Hitung Load Mesin"""
+def calculate_machine_load(df_fc_clean, df_mst, rules_series, machines):
+    """Hitung Load Mesin (qty x CT dihitung sekali sebagai kolom, lalu group sum native)"""
     # Cleanup Master
+    df_mst = df_mst.copy()
     df_mst[MST_COL_PART] = df_mst[MST_COL_PART].astype(str).str.strip().str.upper()
     
     # Merge Forecast (yang udah bersih revisinya) dengan Master
@@ -139,19 +155,21 @@ def calculate_machine_load(df_fc_clean, df_mst, rules_series):
             st.dataframe(unmatched[[FC_COL_PART, FC_COL_QTY]])
 
     # Filter data valid
-    df_valid = df_merged.dropna(subset=[MST_COL_TONAGE, MST_COL_CT])
+    df_valid = df_merged.dropna(subset=[MST_COL_TONAGE, MST_COL_CT]).copy()
     
     # Konversi Tipe Data
     df_valid[MST_COL_CT] = pd.to_numeric(df_valid[MST_COL_CT], errors='coerce').fillna(0)
     df_valid[FC_COL_QTY] = pd.to_numeric(df_valid[FC_COL_QTY], errors='coerce').fillna(0)
+    df_valid['machine'] = df_valid[MST_COL_TONAGE].map(tonage_label)
+    df_valid['prod_sec'] = df_valid[FC_COL_QTY].to_numpy() * df_valid[MST_COL_CT].to_numpy()
     
     # --- LOGIC BEBAN ---
     dandory_min = rules_series['dandory_min']
     startup_min = rules_series['startup_min']
     
     # Group by Mesin
-    df_load = df_valid.groupby(MST_COL_TONAGE).agg(
-        total_prod_sec = (FC_COL_QTY, lambda x: (x * df_valid.loc[x.index, MST_COL_CT]).sum()),
+    df_load = df_valid.groupby('machine').agg(
+        total_prod_sec = ('prod_sec', 'sum'),
         num_parts = (FC_COL_PART, 'nunique')
     ).reset_index()
     
@@ -164,9 +182,8 @@ def calculate_machine_load(df_fc_clean, df_mst, rules_series):
     df_load['total_hours'] = df_load['prod_hours'] + df_load['dandory_hours'] + df_load['setup_hours']
     df_load['Beban (Hari)'] = df_load['total_hours'] / HOURS_PER_WORKDAY
     
-    # Filter cuma mesin yang kita punya
-    df_final = df_load[df_load[MST_COL_TONAGE].isin(MACHINES)].copy()
-    df_final = df_final.rename(columns={MST_COL_TONAGE: 'machine'})
+    # Filter cuma mesin yang kita punya (dari table machine)
+    df_final = df_load[df_load['machine'].isin(machines)]
     
     return df_final[['machine', 'Beban (Hari)']]
 
@@ -184,6 +201,13 @@ if df_rules_raw.empty or df_master.empty:
 
 rules = df_rules_raw.iloc[0]
 
+df_machines = fetch_machine_list()
+if df_machines.empty:
+    # Fallback: kelas tonase dari MASTER (anggap 1 mesin per kelas)
+    st.warning("Table machine kosong / tidak ada mesin aktif. Pakai tonase dari MASTER (1 mesin per kelas).")
+    labels = df_master[MST_COL_TONAGE].dropna().map(tonage_label).dropna().unique()
+    df_machines = pd.DataFrame({'machine': sorted(labels, key=lambda x: float(x[:-1])), 'n_machines': 1})
+
 # 2. Select Month (Fetching Ringan)
 available_months = get_available_months()
 
@@ -214,10 +238,10 @@ col_b.metric("Part Unik (Max Rev)", len(df_fc_clean))
 col_c.metric("Total Qty", f"{df_fc_clean[FC_COL_QTY].sum():,}")
 
 # 5. Calculate & Visualize
-# Hitung NAOH (default 30 hari, bisa dibikin dinamis kalau mau)
-df_naoh = calculate_naoh_monthly(rules)
+# Hitung NAOH dari kalender kerja bulan terpilih (SHIFT WEEKDAY/SATURDAY, Minggu & holiday libur)
+df_naoh = calculate_naoh_monthly(rules, df_machines, selected_month)
 # Hitung Load
-df_load = calculate_machine_load(df_fc_clean, df_master, rules)
+df_load = calculate_machine_load(df_fc_clean, df_master, rules, df_machines['machine'].tolist())
 
 # Merge
 df_result = pd.merge(df_naoh, df_load, on='machine', how='left').fillna(0)
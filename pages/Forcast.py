@@ -10,6 +10,11 @@ import time
 from datetime import datetime, date
 from supabase_client import get_supabase
 from components.navbar import show_navbar
+from services.forecast_service import (
+    generate_model_forecast, get_forecast_history_page, count_forecast_history, get_forecast_filter_options,
+    publish_daily_latest, prune_daily_latest
+)
+from utils.forecast_reader import DAY_COLS, normalize_header, coerce_chunk, iter_forecast_chunks, peek_forecast_file
 
 # ===== PAGE CONFIG & INIT =====
 st.set_page_config(page_title="Forecast Management", page_icon="📊", layout="wide")
@@ -68,128 +73,160 @@ def generate_forecast_id(forecast_month, revision_no):
 
 def process_forecast_csv(df_raw, forecast_month, customer_name, forecast_source="manual", created_by=None):
     """
-    Convert uploaded DataFrame (columns: part_name, part_no, '1'..'31')
+    Convert uploaded data (columns: part_name, part_no, '1'..'31')
     into forecast_monthly + forecast_daily inserts to Supabase.
+    df_raw boleh DataFrame atau iterator chunk dari utils.forecast_reader.iter_forecast_chunks,
+    tiap chunk langsung diinsert begitu selesai dibaca (memori konstan untuk file besar).
     """
     # basic validation
     if forecast_month is None or len(forecast_month) != 7:
         st.error("Format forecast_month harus 'YYYY-MM' (contoh: 2025-12).")
         return None
 
-    # normalize column names and ensure strings
-    df = df_raw.copy()
-    df.columns = [str(c).strip() for c in df.columns]
+    if isinstance(df_raw, pd.DataFrame):
+        df_single = df_raw.copy()
+        df_single.columns = [normalize_header(c) for c in df_single.columns]
+        if "part_no" not in df_single.columns:
+            st.error("Kolom 'part_no' tidak ditemukan di file (setelah normalisasi).")
+            return None
+        chunks = [coerce_chunk(df_single)]
+    else:
+        chunks = df_raw
 
     # expected day columns as strings '1'..'31'
-    day_cols = [str(i) for i in range(1, 32)]
-    
-    # Check kolom Part No (bisa 'part_no' atau 'part no' atau 'material')
-    if "part_no" not in df.columns:
-        st.error("Kolom 'part_no' tidak ditemukan di file (setelah normalisasi).")
-        return None
+    day_cols = list(DAY_COLS)
 
-    # filter only valid rows with a part_no
-    df = df[df["part_no"].notna()].reset_index(drop=True)
+    year = int(forecast_month.split("-")[0])
+    month = int(forecast_month.split("-")[1])
+    last_day = calendar.monthrange(year, month)[1]
+    month_dates = [str(date(year, month, d)) for d in range(1, last_day + 1)]
 
-    # 🔰 HANDLING DUPLICATE PART_NO
-    dup_count = df["part_no"].duplicated().sum()
-    if dup_count > 0:
-        st.warning(f"Terdeteksi {dup_count} duplikat part_no pada file. Sistem otomatis menghapus duplikasi.")
-        df = df.drop_duplicates(subset=["part_no"], keep="first").reset_index(drop=True)
-
-    # calculate monthly totals (sum only available day cols)
-    def safe_sum_row(r):
-        s = 0
-        for c in day_cols:
-            if c in r and pd.notna(r[c]):
-                try:
-                    s += float(r[c])
-                except:
-                    pass
-        return int(round(s))
-
-    df["forecast_qty_monthly"] = df.apply(safe_sum_row, axis=1)
-
-    # determine revision number and generate forecast_id
+    # determine revision number and generate forecast_id (sekali per upload)
     revision_no = next_revision_number(supabase, forecast_month, customer_name)
     forecast_id = generate_forecast_id(forecast_month, revision_no)
+    upload_date = str(date.today())
 
-    # prepare monthly records
-    monthly_rows = []
-    for _, row in df.iterrows():
-        monthly_rows.append({
+    seen_parts = set()
+    dup_count = 0
+    total_parts = 0
+    total_daily = 0
+    chunk_size = 500
+    publish_error = None  # publish ke forecast_daily_latest gagal: data revision tetap tersimpan, dilaporkan terpisah
+
+    for df in chunks:
+        # 🔰 HANDLING DUPLICATE PART_NO (di dalam chunk maupun antar chunk)
+        dup_mask = df["part_no"].duplicated() | df["part_no"].isin(seen_parts)
+        if dup_mask.any():
+            dup_count += int(dup_mask.sum())
+            df = df[~dup_mask].reset_index(drop=True)
+        if df.empty:
+            continue
+        seen_parts.update(df["part_no"].tolist())
+
+        # matrix qty (part x hari), kolom yang tidak ada dianggap 0
+        qty = df.reindex(columns=day_cols).fillna(0).to_numpy(dtype=float)
+        monthly_qty = np.rint(qty.sum(axis=1)).astype(int)
+        part_nos = df["part_no"].tolist()
+
+        # prepare monthly records
+        monthly_rows = [{
             "forecast_id": forecast_id,
             "forecast_month": forecast_month,
-            "upload_date": str(date.today()),
+            "upload_date": upload_date,
             "forecast_source": forecast_source,
             "customer_name": customer_name,
-            "part_no": str(row["part_no"]).strip(),
-            "forecast_qty_monthly": int(row["forecast_qty_monthly"]),
+            "part_no": part_no,
+            "forecast_qty_monthly": int(q),
             "revision_no": revision_no,
             "min_days": 2.0, # Default logic
             "note": None,
             "created_by": created_by
-        })
+        } for part_no, q in zip(part_nos, monthly_qty)]
 
-    # insert monthly rows
-    res_monthly = safe_execute(supabase.table("forecast_monthly").insert(monthly_rows))
-    if res_monthly is None:
-        st.error("Gagal menyimpan ke tabel 'forecast_monthly'. Cek struktur database.")
-        return None
+        # insert monthly rows
+        res_monthly = safe_execute(supabase.table("forecast_monthly").insert(monthly_rows))
+        if res_monthly is None:
+            st.error(f"Gagal menyimpan ke tabel 'forecast_monthly' (setelah {total_parts} part tersimpan untuk {forecast_id}). Cek struktur database.")
+            return None
 
-    # prepare daily rows
-    year = int(forecast_month.split("-")[0])
-    month = int(forecast_month.split("-")[1])
-    last_day = calendar.monthrange(year, month)[1]
+        # prepare daily rows, skip entry kalo qty 0 biar hemat DB storage
+        daily_qty = np.rint(qty[:, :last_day]).astype(int)
+        idx_part, idx_day = np.nonzero(daily_qty > 0)
+        daily_rows = [{
+            "forecast_id": forecast_id,
+            "part_no": part_nos[p],
+            "forecast_date": month_dates[d],
+            "daily_demand": int(daily_qty[p, d]),
+            "revision_no": revision_no
+        } for p, d in zip(idx_part, idx_day)]
 
-    daily_rows = []
-    for _, row in df.iterrows():
-        part_no = str(row["part_no"]).strip()
-        for d in range(1, last_day + 1):
-            col = str(d)
-            qty = 0
-            if col in row and pd.notna(row[col]):
-                try:
-                    qty = int(round(float(row[col])))
-                except:
-                    qty = 0
-            
-            # Skip entry kalo qty 0 biar hemat DB storage
-            if qty > 0: 
-                forecast_date = date(year, month, d)
-                daily_rows.append({
-                    "forecast_id": forecast_id,
-                    "part_no": part_no,
-                    "forecast_date": str(forecast_date),
-                    "daily_demand": qty,
-                    "revision_no": revision_no
-                })
-
-    # insert daily rows in chunks
-    chunk_size = 500
-    if daily_rows:
+        # insert daily rows in chunks
         try:
             for i in range(0, len(daily_rows), chunk_size):
-                chunk = daily_rows[i:i+chunk_size]
-                safe_execute(supabase.table("forecast_daily").insert(chunk))
+                safe_execute(supabase.table("forecast_daily").insert(daily_rows[i:i+chunk_size]))
         except Exception as e:
             st.error(f"Error insert daily: {e}")
             return None
 
-    st.success(f"✅ Forecast uploaded. ID: **{forecast_id}** | Parts: {len(df)} | Daily Entries: {len(daily_rows)}")
-    return {"forecast_id": forecast_id, "parts": len(df)}
+        # refresh tabel materialisasi forecast_daily_latest (dipakai planning); setelah gagal sekali tidak dicoba lagi
+        if publish_error is None:
+            try:
+                publish_daily_latest(daily_rows, customer_name, forecast_month, forecast_source)
+            except Exception as e:
+                publish_error = e
+
+        total_parts += len(part_nos)
+        total_daily += len(daily_rows)
+
+    if dup_count > 0:
+        st.warning(f"Terdeteksi {dup_count} duplikat part_no pada file. Sistem otomatis menghapus duplikasi.")
+
+    if total_parts == 0:
+        st.error("Tidak ada baris dengan part_no yang valid di file.")
+        return None
+
+    if publish_error is not None:
+        # revision baru belum lengkap di forecast_daily_latest -> revision lama TIDAK di-prune
+        st.warning(
+            f"Forecast {forecast_id} tersimpan, tapi publish ke forecast_daily_latest gagal: {publish_error}. "
+            "Planning masih bisa memakai sebagian revision lama."
+        )
+    else:
+        # revision baru sudah lengkap -> buang sisa revision lama dari forecast_daily_latest
+        try:
+            prune_daily_latest(customer_name, forecast_month, revision_no)
+        except Exception as e:
+            st.warning(f"Forecast tersimpan, tapi refresh forecast_daily_latest gagal: {e}")
+
+    st.success(f"✅ Forecast uploaded. ID: **{forecast_id}** | Parts: {total_parts} | Daily Entries: {total_daily}")
+    return {"forecast_id": forecast_id, "parts": total_parts}
 
 # --- END NEW HELPER FUNCTIONS ---
 
-# --- EXISTING CACHED FETCH ---
+# --- CACHED FETCH (SERVER-SIDE PAGING) ---
+HISTORY_PAGE_SIZE = 100
+
+@st.cache_data(ttl=60)
+def fetch_history_page_cached(customer, month, revision, cursor, page_size=HISTORY_PAGE_SIZE):
+    rows, next_cursor = get_forecast_history_page(customer, month, revision, cursor, page_size)
+    return pd.DataFrame(rows), next_cursor
+
 @st.cache_data(ttl=60)
-def fetch_forecasts_cached(limit=3000):
-    query = supabase.table("forecast_monthly").select("*").order("created_at", desc=True).limit(limit)
-    data = safe_execute(query)
-    return pd.DataFrame(data) if data else pd.DataFrame()
+def count_history_cached(customer, month, revision):
+    return count_forecast_history(customer, month, revision)
+
+@st.cache_data(ttl=60)
+def fetch_filter_options_cached():
+    try:
+        return get_forecast_filter_options()
+    except Exception as e:
+        print(f"DB Error: {e}")
+        return pd.DataFrame(columns=["customer_name", "forecast_month", "revision_no"])
 
 def clear_cache():
-    fetch_forecasts_cached.clear()
+    fetch_history_page_cached.clear()
+    count_history_cached.clear()
+    fetch_filter_options_cached.clear()
 
 # ====== MAIN UI ====== #
 
@@ -197,26 +234,52 @@ st.title("📊 Forecast Management System")
 st.markdown("### Monthly Schedule Upload & Monitoring")
 st.divider()
 
-# --- 1. DATA LOADING ---
-df_all = fetch_forecasts_cached(limit=3000)
-
-# --- 2. GLOBAL FILTERS ---
-if not df_all.empty:
-    customers = ["All"] + sorted(df_all["customer_name"].dropna().unique().tolist())
-    c1, c2 = st.columns([1, 4]) 
-    with c1:
-        sel_customer = st.selectbox("🏢 Filter Customer", customers, index=0)
-    
-    # Filter View
-    df_view = df_all.copy()
-    if sel_customer != "All": df_view = df_view[df_view["customer_name"] == sel_customer]
-    
-    # Simple Metric
-    total_parts = len(df_view)
-    total_qty = df_view['forecast_qty_monthly'].sum() if 'forecast_qty_monthly' in df_view else 0
-    st.metric("Total Monthly Qty", f"{total_qty:,.0f}", f"{total_parts} Lines")
-else:
-    df_view = pd.DataFrame()
+# --- 1. GLOBAL FILTERS (dikirim ke server, bukan filter pandas) ---
+df_opts = fetch_filter_options_cached()
+customers = ["All"] + sorted(df_opts["customer_name"].dropna().unique().tolist())
+months = ["All"] + sorted(df_opts["forecast_month"].dropna().unique().tolist(), reverse=True)
+revisions = ["All"] + sorted(df_opts["revision_no"].dropna().astype(int).unique().tolist(), reverse=True)
+
+c1, c2, c3, c4 = st.columns([1, 1, 1, 2])
+with c1:
+    sel_customer = st.selectbox("🏢 Filter Customer", customers, index=0)
+with c2:
+    sel_month = st.selectbox("🗓️ Filter Month", months, index=0)
+with c3:
+    sel_revision = st.selectbox("🔁 Filter Rev", revisions, index=0)
+
+f_customer = None if sel_customer == "All" else sel_customer
+f_month = None if sel_month == "All" else sel_month
+f_revision = None if sel_revision == "All" else int(sel_revision)
+
+# --- 2. DATA LOADING (HANYA HALAMAN YANG TERLIHAT) ---
+# Stack cursor per halaman; reset kalau filter berubah
+filter_key = (f_customer, f_month, f_revision)
+if st.session_state.get("fc_filter_key") != filter_key:
+    st.session_state["fc_filter_key"] = filter_key
+    st.session_state["fc_cursors"] = [None]
+
+cursors = st.session_state["fc_cursors"]
+try:
+    df_view, next_cursor = fetch_history_page_cached(f_customer, f_month, f_revision, cursors[-1])
+except Exception as e:
+    st.error(f"❌ Gagal memuat history forecast: {e}")
+    df_view, next_cursor = pd.DataFrame(), None
+try:
+    total_lines = count_history_cached(f_customer, f_month, f_revision)
+except Exception as e:
+    print(f"DB Error (count history): {e}")
+    total_lines = None
+
+with c4:
+    page_qty = df_view['forecast_qty_monthly'].sum() if 'forecast_qty_monthly' in df_view else 0
+    st.metric(
+        "Total Lines",
+        "-" if total_lines is None else f"≈ {total_lines:,}",
+        f"Qty halaman ini: {page_qty:,.0f}",
+        delta_color="off",
+        help="Estimasi server (exact untuk data kecil)",
+    )
 
 
 # --- 3. SPLIT LAYOUT ---
@@ -226,7 +289,7 @@ left_panel, right_panel = st.columns([1.2, 2.5], gap="medium")
 with left_panel:
     st.info("📝 **Upload Monthly Schedule**")
     
-    tab_upload, tab_manual = st.tabs(["📂 Upload Matrix (1-31)", "✍️ Manual"])
+    tab_upload, tab_manual, tab_model = st.tabs(["📂 Upload Matrix (1-31)", "✍️ Manual", "🤖 Model"])
     
     # --- TAB 1: UPLOAD (REVISED for forecast_monthly -> forecast_daily) ---
     with tab_upload:
@@ -238,32 +301,12 @@ with left_panel:
 
         if file:
             try:
-                # read file into dataframe (accept .csv or .xlsx)
-                if file.type == "text/csv" or str(file.name).lower().endswith(".csv"):
-                    df_preview = pd.read_csv(file)
-                else:
-                    df_preview = pd.read_excel(file)
-
-                # normalize headers preview
-                df_preview.columns = [str(c).strip() for c in df_preview.columns]
-                st.dataframe(df_preview.head(5), use_container_width=True)
-                st.caption(f"Preview: {len(df_preview)} rows found.")
-
-                # show quick validation
-                missing = []
-                # Check case-insensitive part_no existence
-                if "part_no" not in [c.lower() for c in df_preview.columns]:
-                    missing.append("part_no")
-                
-                # check day columns 1..31 existence (at least one)
-                day_cols_exist = any(str(i) in df_preview.columns for i in range(1, 32))
-                if not day_cols_exist:
-                    st.warning("File tidak ditemukan kolom tanggal 1..31. Pastikan format: part_name, part_no, 1..31")
-                elif missing:
-                    st.error(f"Kolom wajib hilang: {missing}")
-                else:
-                    st.success("File valid untuk konversi.")
-                
+                # preview cuma baca beberapa baris pertama (header langsung divalidasi di reader)
+                df_preview = peek_forecast_file(file, file.name)
+                st.dataframe(df_preview, use_container_width=True)
+                st.caption(f"Preview: {len(df_preview)} baris pertama. File diproses bertahap (streaming) saat upload.")
+                st.success("File valid untuk konversi.")
+
                 if st.button("🚀 Process & Upload", type="primary", use_container_width=True):
                     # validate month format
                     try:
@@ -271,45 +314,21 @@ with left_panel:
                     except Exception:
                         st.error("Format Forecast Month harus 'YYYY-MM' (contoh: 2025-12).")
                     else:
-                        # lower-case column mapping for safety
-                        # but keep numeric day columns as strings '1'..'31' if present
-                        # ensure part_no column exists possibly with different case
-                        cols_lower = {c.lower(): c for c in df_preview.columns}
-                        
-                        if "part_no" not in cols_lower:
-                            st.error("Kolom 'part_no' tidak ditemukan (case-insensitive check failed).")
-                        else:
-                            # rename real column name to standard 'part_no' and keep day cols
-                            actual_part_col = cols_lower["part_no"]
-                            if actual_part_col != "part_no":
-                                df_preview = df_preview.rename(columns={actual_part_col: "part_no"})
-                            
-                            # ensure day columns are strings '1'..'31' (if excel has numeric header 1.0 convert)
-                            new_cols = {}
-                            for c in df_preview.columns:
-                                sc = str(c).strip()
-                                # some Excel exports can make numeric headers float -> '1.0'
-                                if sc.endswith(".0"):
-                                    sc2 = sc.replace(".0", "")
-                                    new_cols[c] = sc2
-                            if new_cols:
-                                df_preview = df_preview.rename(columns=new_cols)
-                            
-                            # run processing
-                            with st.spinner("Processing & Uploading..."):
-                                result = process_forecast_csv(
-                                    df_preview, 
-                                    forecast_month_input, 
-                                    customer_input, 
-                                    forecast_source=source_input, 
-                                    created_by=None
-                                )
-                                if result:
-                                    st.toast("✅ Forecast uploaded & daily generated!", icon="🎉")
-                                    st.balloons()
-                                    clear_cache()
-                                    time.sleep(1)
-                                    st.rerun()
+                        # run processing: chunk dibaca & langsung diinsert, header sudah dinormalisasi di reader
+                        with st.spinner("Processing & Uploading..."):
+                            result = process_forecast_csv(
+                                iter_forecast_chunks(file, file.name),
+                                forecast_month_input,
+                                customer_input,
+                                forecast_source=source_input,
+                                created_by=None
+                            )
+                            if result:
+                                st.toast("✅ Forecast uploaded & daily generated!", icon="🎉")
+                                st.balloons()
+                                clear_cache()
+                                time.sleep(1)
+                                st.rerun()
 
             except Exception as e:
                 st.error(f"Error saat membaca file: {e}")
@@ -318,6 +337,22 @@ with left_panel:
     with tab_manual:
         st.warning("Manual input logic is currently disabled. Please use Excel upload.")
 
+    # --- TAB 3: MODEL (SES / CROSTON DARI HISTORY DELIVERY) ---
+    with tab_model:
+        st.caption("Forecast statistik dari history delivery `fg_out` (SES untuk demand rutin, Croston untuk part intermittent). "
+                   "Mulai besok; hanya bulan yang tercakup penuh yang ditulis sebagai revision.")
+        hist_weeks = st.number_input("History (minggu)", min_value=8, max_value=156, value=52, step=4)
+        horizon_weeks = st.number_input("Horizon (minggu)", min_value=1, max_value=26, value=8, step=1)
+        if st.button("🤖 Generate Model Forecast", use_container_width=True):
+            with st.spinner("Fitting model untuk semua part..."):
+                summary = generate_model_forecast(history_weeks=int(hist_weeks), horizon_weeks=int(horizon_weeks))
+            if not summary:
+                st.warning("History delivery kosong atau horizon tidak mencakup bulan penuh, tidak ada forecast yang dibuat.")
+            else:
+                st.success(f"✅ {len(summary)} revision model dibuat (forecast_source='model').")
+                st.dataframe(pd.DataFrame(summary), use_container_width=True, hide_index=True)
+                clear_cache()
+
 # ================= RIGHT PANEL: DATA TABLE =================
 with right_panel:
     st.success("📋 **Forecast Monthly History**")
@@ -339,5 +374,19 @@ with right_panel:
             },
             hide_index=True
         )
+
+        # --- PAGING (KEYSET) ---
+        p1, p2, p3 = st.columns([1, 2, 1])
+        with p1:
+            if st.button("⬅️ Prev", disabled=len(cursors) <= 1, use_container_width=True):
+                cursors.pop()
+                st.rerun()
+        with p2:
+            n_pages = "?" if total_lines is None else max(len(cursors), -(-total_lines // HISTORY_PAGE_SIZE))
+            st.caption(f"Halaman {len(cursors)} / ≈{n_pages} • {HISTORY_PAGE_SIZE} baris per halaman")
+        with p3:
+            if st.button("Next ➡️", disabled=next_cursor is None, use_container_width=True):
+                cursors.append(next_cursor)
+                st.rerun()
     else:
         st.info("Belum ada data di tabel 'forecast_monthly'. Silakan upload data baru.")
\ No newline at end of file
@@ -4,11 +4,11 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from supabase_client import get_supabase
 from components.navbar import show_navbar
+from services.material_service import get_material_forecast_index
+from utils.facet_index import ALL
 
 # ===== INIT =====
-supabase = get_supabase()
 show_navbar()
 
 # ===== PAGE HEADER =====
@@ -17,34 +17,6 @@ st.caption("Monitor your forecast-based material demand.")
 st.divider()
 
 # ===== HELPER FUNCTION =====
-def safe_execute(query):
-    """Wrapper Supabase execution agar aman dari error"""
-    res = query.execute()
-    try:
-        if hasattr(res, "status_code") and res.status_code not in [200, 201]:
-            st.error(f"❌ Supabase Error {res.status_code}: {res.json()}")
-            return None
-        return res.data
-    except Exception as e:
-        st.error(f"⚠️ Unexpected response format: {e}")
-        return None
-
-def fetch_materials(customer=None, month=None, type_mat=None, grade=None, color=None, limit=2000):
-    query = supabase.table("material_forecast").select("*")
-    if customer and customer != "All":
-        query = query.eq("customer_name", customer)
-    if month and month != "All":
-        query = query.eq("month", month)
-    if type_mat and type_mat != "All":
-        query = query.eq("type_material", type_mat)
-    if grade and grade != "All":
-        query = query.eq("grade_material", grade)
-    if color and color != "All":
-        query = query.eq("color_material", color)
-    query = query.order("created_at", desc=True).limit(limit)
-    data = safe_execute(query)
-    return pd.DataFrame(data) if data else pd.DataFrame()
-
 def summarize_material(df):
     if df.empty:
         return pd.DataFrame()
@@ -54,32 +26,50 @@ def summarize_material(df):
         .sort_values("total_material_weight", ascending=False)
     )
 
+def month_sort_key(x):
+    try:
+        return datetime.strptime(x, "%B %Y")
+    except (TypeError, ValueError):
+        return datetime.min
+
 # ===== FILTER SECTION =====
-df_all = fetch_materials(limit=5000)
-if df_all.empty:
+# Index facet in-memory (semua baris material_forecast, di-share antar session & di-refresh incremental
+# oleh material_service). Ganti filter = boolean mask di memory, tidak ada fetch ulang ke Supabase.
+try:
+    index = get_material_forecast_index()
+except Exception as e:
+    st.error(f"⚠️ Gagal mengambil material_forecast: {e}")
+    st.stop()
+
+if len(index) == 0:
     st.info("No material forecast data found. Please generate material forecast first.")
     st.stop()
 
-customers = ["All"] + sorted(df_all["customer_name"].dropna().unique().tolist())
-months = ["All"] + sorted(df_all["month"].dropna().unique().tolist(), key=lambda x: datetime.strptime(x, "%B %Y"), reverse=True)
-types = ["All"] + sorted(df_all["type_material"].dropna().unique().tolist())
-grades = ["All"] + sorted(df_all["grade_material"].dropna().unique().tolist())
-colors = ["All"] + sorted(df_all["color_material"].dropna().unique().tolist())
+FILTERS = [
+    ("customer_name", "Customer"),
+    ("month", "Month"),
+    ("type_material", "Type"),
+    ("grade_material", "Grade"),
+    ("color_material", "Color"),
+]
+# Pilihan sekarang (dari rerun sebelumnya) untuk hitung facet count dimensi lain
+selected = {dim: st.session_state.get(f"mr_filter_{dim}", ALL) for dim, _ in FILTERS}
 
-c1, c2, c3, c4, c5 = st.columns(5)
-sel_customer = c1.selectbox("Customer", customers)
-sel_month = c2.selectbox("Month", months)
-sel_type = c3.selectbox("Type", types)
-sel_grade = c4.selectbox("Grade", grades)
-sel_color = c5.selectbox("Color", colors)
+for col, (dim, label) in zip(st.columns(len(FILTERS)), FILTERS):
+    options = index.options(dim)
+    if dim == "month":
+        options = sorted(options, key=month_sort_key, reverse=True)
+    counts = index.counts(dim, **selected)
+    selected[dim] = col.selectbox(
+        label,
+        [ALL] + options,
+        key=f"mr_filter_{dim}",
+        format_func=lambda v, c=counts: v if v == ALL else f"{v} ({c.get(v, 0)})",
+    )
 
-df_filtered = fetch_materials(
-    customer=sel_customer if sel_customer != "All" else None,
-    month=sel_month if sel_month != "All" else None,
-    type_mat=sel_type if sel_type != "All" else None,
-    grade=sel_grade if sel_grade != "All" else None,
-    color=sel_color if sel_color != "All" else None,
-)
+df_filtered = index.filter(**selected)
+if "created_at" in df_filtered.columns:
+    df_filtered = df_filtered.sort_values("created_at", ascending=False)
 
 st.divider()
 
@@ -1,12 +1,21 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import math
 from datetime import datetime, timedelta
 from ortools.sat.python import cp_model
-from supabase_client import get_supabase
+from supabase_client import get_supabase, fetch_all_rows
+from services.forecast_service import get_daily_forecast_matrix
+from services.calendar_service import get_holidays_for_window
+from services.schedule_service import save_production_schedule
+from utils.work_calendar import shift_slots
+from services.po_service import get_expected_receipts
+from services.projection_service import get_material_snapshot
+from utils.mrp import mrp_explosion, rows_in_kg
 
 # --- IMPORT NAVBAR DARI COMPONENTS ---
 from components.navbar import show_navbar
+from components.profiler import page_profiler, profiled
 
 # ==========================================
 # 1. KONFIGURASI HALAMAN & CSS
@@ -62,6 +71,7 @@ st.markdown("""
 def init_connection():
     return get_supabase()
 
+@profiled("fetch_master")
 def load_master_data(selected_machine_id):
     supabase = init_connection()
     
@@ -92,20 +102,14 @@ def load_master_data(selected_machine_id):
 
     return df_machine, df_shift, df_master
 
+@profiled("fetch_forecast_stock")
 def load_dynamic_data(part_list, start_date, days):
     supabase = init_connection()
     # Buffer forecast lebih panjang
-    end_date = start_date + timedelta(days=days+30) 
-    
-    # Forecast
-    fc_resp = supabase.table('v_daily_forecast')\
-        .select('*')\
-        .in_('part_no', part_list)\
-        .gte('forecast_date', start_date.strftime('%Y-%m-%d'))\
-        .lte('forecast_date', end_date.strftime('%Y-%m-%d'))\
-        .execute()
-    df_fc = pd.DataFrame(fc_resp.data)
-    if not df_fc.empty: df_fc.columns = [c.lower() for c in df_fc.columns]
+    buffer_days = days + 31
+
+    # Forecast: matrix [part x hari] dari tabel materialisasi forecast_daily_latest (NaN = forecast bolong)
+    df_fc = get_daily_forecast_matrix(part_list, start_date, buffer_days, fill_value=np.nan)
 
     # Stock (FG & WIP)
     fg_resp = supabase.table('v_fg_latest_stock').select('part_no, fg_stock').in_('part_no', part_list).execute()
@@ -126,19 +130,50 @@ def load_dynamic_data(part_list, start_date, days):
 
     return df_fc, df_stock_total
 
+MATERIAL_POSITION_TTL_SEC = 60
+
+# Expander MRP ikut jalan walau tertutup: posisi material di-cache per tanggal supaya rerun tidak query ulang
+@st.cache_data(ttl=MATERIAL_POSITION_TTL_SEC, show_spinner=False)
+@profiled("fetch_material_position")
+def load_material_position(as_of):
+    """Saldo kg per material s/d as_of (satu RPC snapshot) + incoming terbuka (kg): material_in bertanggal setelahnya & outstanding PO."""
+    supabase = init_connection()
+    as_of = pd.Timestamp(as_of).strftime('%Y-%m-%d')
+    material_cols = 'type_material, grade_material, color_material'
+
+    df_bal, _ = get_material_snapshot(pd.Timestamp(as_of))
+
+    df_inc = pd.DataFrame(fetch_all_rows(lambda: supabase.table('material_in')
+        .select(f'date, {material_cols}, qty, uom')
+        .gt('date', as_of).order('date')))
+    # Netting dalam kg: G dikonversi, UOM non-berat (BATCH/PCS) tidak ikut
+    df_inc = rows_in_kg(df_inc)
+
+    # Outstanding PO terbuka ikut jadi incoming di expected_date (PO telat = hari pertama)
+    df_po = get_expected_receipts()
+    df_inc = pd.concat([df_inc, df_po], ignore_index=True) if not df_po.empty else df_inc
+
+    return df_bal, df_inc
+
 # ==========================================
 # 3. THE BRAIN: INJECTION SIMULATION (MIN-MAX)
 # ==========================================
+@profiled("simulation")
 def run_injection_simulation(df_fc, df_stock, df_master, start_date, horizon_days):
+    """df_fc: matrix forecast harian [part_no x tanggal] mulai start_date, NaN = tidak ada forecast."""
     job_tickets = [] 
     
     # Satpam Data Kosong
-    if df_fc.empty or df_master.empty or 'part_no' not in df_fc.columns:
+    if df_fc.empty or df_master.empty:
         return pd.DataFrame()
     
     # STRATEGY SETTINGS
     MIN_COVERAGE_DAYS = 2   # Trigger Point
     MAX_COVERAGE_DAYS = 15  # Target Point (Agresif)
+
+    stock_map = df_stock.set_index('part_no')['total_stock'].to_dict() if not df_stock.empty else {}
+    sim_start = pd.to_datetime(start_date)
+    n_days_needed = horizon_days + MAX_COVERAGE_DAYS + 1
     
     for index, row_master in df_master.iterrows():
         part = row_master['part_no']
@@ -153,49 +188,38 @@ def run_injection_simulation(df_fc, df_stock, df_master, start_date, horizon_day
         if output_per_shift == 0: continue
 
         # Init Stock
-        stock_row = df_stock[df_stock['part_no'] == part]
-        current_stock = stock_row['total_stock'].values[0] if not stock_row.empty else 0
+        current_stock = stock_map.get(part, 0)
         
         # Forecast
-        fc_part = df_fc[df_fc['part_no'] == part].sort_values('forecast_date')
-        if fc_part.empty: continue
+        if part not in df_fc.index: continue
+        demand = df_fc.loc[part].to_numpy(dtype=float)
+        if np.isnan(demand).all(): continue
         
         # Avg Demand (Fallback jika forecast bolong)
-        avg_demand = fc_part['daily_qty'].mean()
+        avg_demand = np.nanmean(demand)
         if pd.isna(avg_demand) or avg_demand == 0: avg_demand = 1
 
+        # Hari tanpa forecast (atau di luar window) pakai avg_demand
+        demand = np.where(np.isnan(demand), avg_demand, demand)
+        if len(demand) < n_days_needed:
+            demand = np.concatenate([demand, np.full(n_days_needed - len(demand), avg_demand)])
+
         temp_stock = current_stock
-        sim_start = pd.to_datetime(start_date)
         
         for d in range(horizon_days):
             curr_sim_date = sim_start + timedelta(days=d)
             curr_date_str = curr_sim_date.strftime('%Y-%m-%d')
             
             # 1. Makan Stock
-            demand_row = fc_part[fc_part['forecast_date'] == curr_date_str]
-            if not demand_row.empty:
-                daily_demand = demand_row['daily_qty'].values[0]
-            else:
-                daily_demand = avg_demand 
-            temp_stock -= daily_demand
+            temp_stock -= demand[d]
             
             # 2. Cek Trigger (Min Coverage)
-            future_demand_min = 0
-            for k in range(1, MIN_COVERAGE_DAYS + 1):
-                check_date = curr_sim_date + timedelta(days=k)
-                chk_row = fc_part[fc_part['forecast_date'] == check_date.strftime('%Y-%m-%d')]
-                if not chk_row.empty: future_demand_min += chk_row['daily_qty'].values[0]
-                else: future_demand_min += avg_demand
+            future_demand_min = demand[d + 1:d + 1 + MIN_COVERAGE_DAYS].sum()
             
             # 3. Keputusan
             if temp_stock < future_demand_min:
                 # 4. Target Isi (Max Coverage)
-                future_demand_max = 0
-                for k in range(1, MAX_COVERAGE_DAYS + 1):
-                    check_date = curr_sim_date + timedelta(days=k)
-                    chk_row = fc_part[fc_part['forecast_date'] == check_date.strftime('%Y-%m-%d')]
-                    if not chk_row.empty: future_demand_max += chk_row['daily_qty'].values[0]
-                    else: future_demand_max += avg_demand
+                future_demand_max = demand[d + 1:d + 1 + MAX_COVERAGE_DAYS].sum()
                 
                 deficit = future_demand_max - temp_stock
                 if deficit <= 0: deficit = 1
@@ -210,7 +234,8 @@ def run_injection_simulation(df_fc, df_stock, df_master, start_date, horizon_day
                         'part_no': part,
                         'part_name': part_name,
                         'earliest_start_date': curr_sim_date, 
-                        'duration_shifts': 1
+                        'duration_shifts': 1,
+                        'qty': output_per_shift
                     })
                 
                 temp_stock += (shifts_needed * output_per_shift)
@@ -220,34 +245,14 @@ def run_injection_simulation(df_fc, df_stock, df_master, start_date, horizon_day
 # ==========================================
 # 4. THE SCHEDULER: OR-TOOLS (FIXED DATES)
 # ==========================================
+@profiled("timeline_slots")
 def generate_timeline_slots(start_date, days, df_shift):
-    slots = []
-    start_dt = pd.to_datetime(start_date)
-    
-    for i in range(days):
-        curr_date = start_dt + timedelta(days=i)
-        day_name = curr_date.strftime('%A')
-        
-        # Logic Mapping (Standard HURUF BESAR)
-        target_day_type = 'WEEKDAY'
-        if day_name == 'Saturday': target_day_type = 'SATURDAY'
-        elif day_name == 'Sunday': target_day_type = 'SUNDAY'
-        
-        if target_day_type == 'SUNDAY': continue
-        
-        # Filter (Sekarang aman karena df_shift udah dipaksa Upper)
-        rules = df_shift[df_shift['day_type'] == target_day_type]
-
-        for _, r in rules.iterrows():
-            s_name = r.get('shift_name', r.get('SHIFT_NAME'))
-            slots.append({
-                'date': curr_date,
-                'day_num': curr_date.day,
-                'assigned_shift': s_name, 
-                'slot_id': f"{curr_date}_{s_name}"
-            })
-    return pd.DataFrame(slots)
+    # Kalender kerja bersama (utils.work_calendar): tanggal x shift sesuai day_type, holiday di-skip
+    dates = pd.date_range(pd.to_datetime(start_date).normalize(), periods=days, freq='D')
+    holidays = get_holidays_for_window(start_date, days)
+    return shift_slots(dates, df_shift, holidays)
 
+@profiled("solve_cp_sat")
 def solve_schedule(df_slots, df_jobs):
     model = cp_model.CpModel()
     
@@ -299,6 +304,7 @@ def solve_schedule(df_slots, df_jobs):
                         'assigned_shift': df_slots.loc[s, 'assigned_shift'],
                         'part_name': df_jobs.loc[j, 'part_name'],
                         'part_no': df_jobs.loc[j, 'part_no'],
+                        'qty': df_jobs.loc[j, 'qty'],
                         'val': '1 Lot'
                     })
     return pd.DataFrame(res)
@@ -370,7 +376,7 @@ def main():
             part_list = df_master['part_no'].unique().tolist()
             df_fc, df_stock = load_dynamic_data(part_list, start_date, horizon)
             
-            if df_fc.empty:
+            if df_fc.empty or not df_fc.notna().to_numpy().any():
                 st.warning(f"⚠️ Mesin {mach_id} Santai: Tidak ada forecast di horizon ini.")
                 st.stop()
         
@@ -411,6 +417,47 @@ def main():
             with st.expander("📄 Lihat Detail 'Tiket' Pekerjaan (Raw Data)"):
                 st.dataframe(df_jobs)
 
+            with st.expander("🧱 Kebutuhan Material (MRP) dari Jadwal Ini"):
+                # Lot terjadwal; kalau solver gagal pakai tiket simulasi (tanggal earliest start)
+                if not df_schedule.empty:
+                    df_lots, lot_date_col = df_schedule, 'date'
+                else:
+                    df_lots, lot_date_col = df_jobs, 'earliest_start_date'
+                df_bal, df_inc = load_material_position(datetime.now().strftime('%Y-%m-%d'))
+                df_req, df_proj, df_net, df_mrp = mrp_explosion(
+                    df_lots, df_master, df_bal, df_inc, start_date, horizon, date_col=lot_date_col
+                )
+
+                if df_req.empty:
+                    st.info("Tidak ada kebutuhan material (cek GROSS & material di MASTER).")
+                else:
+                    n_short = int(df_mrp['shortage_date'].notna().sum())
+                    k1, k2, k3 = st.columns(3)
+                    k1.metric("Jenis Material", f"{len(df_mrp)}")
+                    k2.metric("Total Kebutuhan", f"{df_mrp['required_kg'].sum():,.1f} Kg")
+                    k3.metric("Material Shortage", f"{n_short}", delta_color="inverse")
+
+                    st.dataframe(
+                        df_mrp,
+                        use_container_width=True,
+                        hide_index=True,
+                        column_config={
+                            "material_id_unique": "Material",
+                            "on_hand_kg": st.column_config.NumberColumn("Stok (Kg)", format="%.1f"),
+                            "required_kg": st.column_config.NumberColumn("Kebutuhan (Kg)", format="%.1f"),
+                            "incoming_kg": st.column_config.NumberColumn("Incoming + PO (Kg)", format="%.1f"),
+                            "ending_kg": st.column_config.NumberColumn("Saldo Akhir (Kg)", format="%.1f"),
+                            "shortage_kg": st.column_config.NumberColumn("Kurang (Kg)", format="%.1f"),
+                            "shortage_date": st.column_config.DateColumn("Tanggal Shortage"),
+                            "cover_days": "Cover (Hari)",
+                        },
+                    )
+
+                    st.caption("Kebutuhan material harian (Kg)")
+                    df_req_view = df_req.copy()
+                    df_req_view.columns = df_req_view.columns.strftime('%d (%a)')
+                    st.dataframe(df_req_view.round(1), use_container_width=True)
+
             if not df_schedule.empty:
                 st.subheader(f"📅 Schedule Board: {mach_id}")
                 
@@ -441,5 +488,16 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
 
+                # Jadwal tersimpan dipakai proyeksi stockout FG/WIP & resin (monitor + alert bot)
+                if st.button("💾 Simpan Jadwal", help="Ganti jadwal mesin ini di window planning dengan hasil di atas"):
+                    n_saved = save_production_schedule(mach_id, df_schedule, start_date, horizon + 7)
+                    st.success(f"✅ {n_saved} lot jadwal {mach_id} tersimpan.")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    prof = page_profiler("app_planning")  # opt-in: ?profile=1
+    prof.mark("main")
+    try:
+        main()
+    finally:
+        # st.stop() / return awal di main tetap menutup & menampilkan profil rerun ini
+        prof.finish()
\ No newline at end of file
@@ -6,8 +6,9 @@ from datetime import datetime
 import calendar
 # --- FIX IMPORT BARU ---
 from streamlit_javascript import st_javascript 
-from pages.data_loader import calculate_capacity_report, get_rules_params
+from pages.data_loader import report_input_version, save_capacity_cube
 from components.navbar import show_navbar
+from components.job_status import job_result
 # ---------------------
 
 # --- FUNGSI 1: MENENTUKAN STATUS KAPASITAS ---
@@ -89,14 +90,22 @@ selected_period = st.sidebar.selectbox(
 st.header(f"Forecast untuk Bulan: **{selected_period}**")
 
 # --- 3. Memuat dan Menjalankan Perhitungan ---
-@st.cache_data(ttl=600)
-def load_and_calculate_data(period: str):
-    rules = get_rules_params()
-    report_data = calculate_capacity_report(period)
-    return report_data, rules
+# Cube semua periode di picker dihitung sekali di worker background (services/job_service),
+# per versi input (jumlah baris + marker updated_at/created_at forcast/MASTER/rules).
+# Page tidak pernah menunggu hitung ulang.
+@st.cache_data(ttl=60)
+def load_input_version():
+    return report_input_version()
 
 # Memuat data dan hasil perhitungan
-report_data, rules = load_and_calculate_data(selected_period)
+capacity_job = job_result(
+    "capacity_cube",
+    {"start_ym": year_month_options[0], "months": len(year_month_options)},
+    load_input_version(),
+    label="Report Kapasitas",
+) or {}
+capacity_cube, rules = capacity_job.get('cube', {}), capacity_job.get('rules', {})
+report_data = capacity_cube.get(selected_period, {})
 
 if not report_data:
     st.error(f"⚠️ Tidak ada data forecast atau terjadi kesalahan perhitungan untuk periode {selected_period}.")
@@ -121,6 +130,13 @@ else:
     col2.metric("Dandory/Pergantian", f"{rules.get('dandory_min', 0)} Menit")
     col3.metric("Start Up/Pergantian", f"{rules.get('startup_min', 0)} Menit")
     
+    # Simpan ke CAPACITY_REPORT hanya lewat aksi eksplisit ini (hitung ulang di background tidak menulis ke DB)
+    if st.button("💾 Simpan Report ke CAPACITY_REPORT", key="save_capacity_report"):
+        if save_capacity_cube(capacity_cube):
+            st.success(f"✅ Report {len(capacity_cube)} periode tersimpan.")
+        else:
+            st.error("❌ Gagal menyimpan report ke CAPACITY_REPORT.")
+
     st.markdown("---")
 
     # 5. Iterasi dan Tampilan per Mesin (TONAGE)
@@ -1,10 +1,10 @@
 import streamlit as st
-import pandas as pd
-from supabase import create_client
+from supabase_client import create_client
 from datetime import datetime
-from fpdf import FPDF
-import os
 from components.navbar import show_navbar
+from services import document_service
+from components.pdf_download import show_pdf_download, submit_pdf
+from components.material_picker import material_selectboxes
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Material Out | Production", layout="wide", page_icon="📤")
@@ -112,34 +112,13 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# --- AMBIL DATA REFERENSI ---
-try:
-    response = supabase.table("List_Material").select("*").execute()
-    df_ref = pd.DataFrame(response.data)
-except:
-    df_ref = pd.DataFrame()
-
-# Helper list
-if not df_ref.empty:
-    list_type = sorted(df_ref["TYPE"].dropna().unique().tolist())
-    list_grade = sorted(df_ref["GRADE"].dropna().unique().tolist())
-    list_color = sorted(df_ref["COLOR"].dropna().unique().tolist())
-else:
-    list_type, list_grade, list_color = [], [], []
-
 # --- MAIN FORM ---
 with st.container():
+    # Section 1 (di luar form): Type -> Grade -> Color bertingkat dari vocabulary material yang di-cache
+    st.markdown('<div class="form-section-title">📦 1. Identitas Material</div>', unsafe_allow_html=True)
+    in_type, in_grade, in_color = material_selectboxes("out")
+
     with st.form("out_form", clear_on_submit=False):
-        
-        # Section 1
-        st.markdown('<div class="form-section-title">📦 1. Identitas Material</div>', unsafe_allow_html=True)
-        c1, c2, c3 = st.columns(3)
-        with c1:
-            in_type = st.selectbox("Type Material", list_type) if list_type else st.text_input("Type Material")
-        with c2:
-            in_grade = st.selectbox("Grade Material", list_grade) if list_grade else st.text_input("Grade Material")
-        with c3:
-            in_color = st.selectbox("Color Material", list_color) if list_color else st.text_input("Color Material")
 
         # Section 2
         st.markdown('<div class="form-section-title">⚖️ 2. Kuantitas & Traceability</div>', unsafe_allow_html=True)
@@ -204,49 +183,46 @@ if submit:
         # Success UI
         st.success("✅ BERHASIL! Material Out tercatat di Database.")
         
-        # PDF Generation
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", "B", 16)
-        pdf.cell(0, 10, "BUKTI PENGELUARAN MATERIAL", ln=True, align="C")
-        pdf.ln(5)
-        
-        pdf.set_font("Arial", size=10)
-        pdf.cell(0, 6, f"Created: {datetime.now().strftime('%Y-%m-%d %H:%M')}", ln=True)
-        pdf.line(10, 30, 200, 30)
-        pdf.ln(10)
-        
-        # Table-like content
-        fields = [
-            ("Material", f"{in_type} {in_grade}"),
-            ("Color", in_color),
-            ("Quantity", f"{in_qty} {in_uom}"),
-            ("Lot Number", in_lot),
-            ("Line / Shift", f"{in_line} / {in_shift}"),
-            ("No SPK", in_spk),
-            ("PIC", in_pic)
-        ]
-        
-        pdf.set_font("Arial", size=12)
-        for label, value in fields:
-            pdf.cell(40, 8, label, 0, 0)
-            pdf.cell(5, 8, ":", 0, 0)
-            pdf.cell(0, 8, value, 0, 1)
-            
-        # File output
-        pdf_filename = f"MaterialOut_{in_lot}_{datetime.now().strftime('%H%M%S')}.pdf"
-        pdf.output(pdf_filename)
-        
-        with open(pdf_filename, "rb") as f:
-            st.download_button(
-                label="📄 Download Bukti (PDF)",
-                data=f,
-                file_name=pdf_filename,
-                mime="application/pdf"
-            )
-            
-        # Optional: remove file after read to save space (uncomment if needed)
-        # os.remove(pdf_filename)
+        # PDF dirender di worker thread (in-memory); tombol download di bawah menunggu hasilnya sebentar
+        submit_pdf(
+            "material_out_pdf",
+            document_service.KIND_MATERIAL_OUT,
+            [{**data_payload, "created_at": datetime.now()}],
+            f"MaterialOut_{in_lot}_{datetime.now().strftime('%H%M%S')}.pdf",
+            "📄 Download Bukti (PDF)",
+        )
 
     except Exception as e:
-        st.error(f"❌ Terjadi kesalahan sistem: {e}")
\ No newline at end of file
+        st.error(f"❌ Terjadi kesalahan sistem: {e}")
+
+# --- DOWNLOAD BUKTI TERAKHIR ---
+show_pdf_download("material_out_pdf")
+
+# --- CETAK BATCH AKHIR SHIFT ---
+st.markdown('<div class="form-section-title">🖨️ Cetak Batch Akhir Shift</div>', unsafe_allow_html=True)
+p1, p2, p3 = st.columns([1, 1, 1])
+with p1:
+    print_date = st.date_input("Tanggal Transaksi", value=datetime.now(), key="print_date")
+with p2:
+    print_shift = st.selectbox("Shift", ["1", "2", "3"], key="print_shift")
+with p3:
+    st.write("")
+    print_btn = st.button("🖨️ Siapkan PDF Batch")
+
+if print_btn:
+    res = supabase.table("material_out").select("*")\
+        .eq("date", str(print_date)).eq("shift", print_shift)\
+        .order("waktu").execute()
+    docs = res.data or []
+    if not docs:
+        st.warning("Tidak ada transaksi material out di tanggal & shift ini.")
+    else:
+        # Semua bukti shift -> satu PDF multi-halaman, dirender di worker thread
+        submit_pdf(
+            "material_out_batch_pdf",
+            document_service.KIND_MATERIAL_OUT,
+            docs,
+            f"MaterialOut_{print_date}_Shift{print_shift}.pdf",
+            f"📄 Download {len(docs)} Bukti (PDF)",
+        )
+show_pdf_download("material_out_batch_pdf")
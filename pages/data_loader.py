@@ -1,48 +1,55 @@
 # pages/data_loader.py
 
 import pandas as pd
-from supabase import Client
-import calendar
+import numpy as np
 from datetime import datetime
 import sys
 import os
 import time
 
 # --- PENYESUAIAN PATH UNTUK IMPORT DARI ROOT ---
-try:
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    from supabase_client import get_supabase
-except ImportError as e:
-    print(f"FATAL ERROR: Gagal import supabase_client. Menggunakan Mock Data. Detail: {e}")
-    # (Kode Mock Client yang diperlukan jika koneksi gagal harus ada di sini)
-    class MockClient:
-        def table(self, table_name):
-            class MockTable:
-                def select(self, columns):
-                    class MockResponse:
-                        def execute(self):
-                            if table_name == "rules":
-                                return type('obj', (object,), {'data' : [{'id': 1, 'shift_hours': 8, 'shift_per_day': 3, 'efficiency': 0.85, 'dandory_min': 30, 'startup_min': 15, 'weekend_overtime': 4, 'created_at': '...'}]})
-                            elif table_name == "MASTER":
-                                # Menggunakan nama kolom yang benar: part_no, tonage, cycle_time
-                                return type('obj', (object,), {'data' : [{'part_no': 'A101', 'tonage': '250 T', 'cycle_time': 30}, {'part_no': 'B202', 'tonage': '450 T', 'cycle_time': 45}]})
-                            elif table_name == "forcast":
-                                # Mock data forecast
-                                period = datetime.now().strftime("%Y-%m")
-                                return type('obj', (object,), {'data' : [{'delivery_date': f'{period}-10 08:00:00', 'part_name': 'Handle', 'part_no': 'A101', 'forecast_qty': 5000}, {'delivery_date': f'{period}-11 12:00:00', 'part_name': 'Cover', 'part_no': 'B202', 'forecast_qty': 8000}, {'delivery_date': f'{period}-11 15:00:00', 'part_name': 'Handle', 'part_no': 'A101', 'forecast_qty': 3000}]})
-                            return type('obj', (object,), {'data' : []})
-                def upsert(self, data, on_conflict):
-                    print(f"DEBUG: Mock Supabase UPSERT to {table_name} executed.")
-                    return type('obj', (object,), {'data' : data})
-            return MockTable()
-        
-    def get_supabase():
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from supabase_client import LazyClient, get_supabase, fetch_all_rows
+
+
+class MockClient:
+    """Client pengganti kalau library supabase tidak bisa di-load (data dummy)."""
+
+    def table(self, table_name):
+        class MockTable:
+            def select(self, columns):
+                class MockResponse:
+                    def execute(self):
+                        if table_name == "rules":
+                            return type('obj', (object,), {'data' : [{'id': 1, 'shift_hours': 8, 'shift_per_day': 3, 'efficiency': 0.85, 'dandory_min': 30, 'startup_min': 15, 'weekend_overtime': 4, 'created_at': '...'}]})
+                        elif table_name == "MASTER":
+                            # Menggunakan nama kolom yang benar: part_no, tonage, cycle_time
+                            return type('obj', (object,), {'data' : [{'part_no': 'A101', 'tonage': '250 T', 'cycle_time': 30}, {'part_no': 'B202', 'tonage': '450 T', 'cycle_time': 45}]})
+                        elif table_name == "forcast":
+                            # Mock data forecast
+                            period = datetime.now().strftime("%Y-%m")
+                            return type('obj', (object,), {'data' : [{'delivery_date': f'{period}-10 08:00:00', 'part_name': 'Handle', 'part_no': 'A101', 'forecast_qty': 5000}, {'delivery_date': f'{period}-11 12:00:00', 'part_name': 'Cover', 'part_no': 'B202', 'forecast_qty': 8000}, {'delivery_date': f'{period}-11 15:00:00', 'part_name': 'Handle', 'part_no': 'A101', 'forecast_qty': 3000}]})
+                        return type('obj', (object,), {'data' : []})
+            def upsert(self, data, on_conflict):
+                print(f"DEBUG: Mock Supabase UPSERT to {table_name} executed.")
+                return type('obj', (object,), {'data' : data})
+        return MockTable()
+
+
+def _connect():
+    """Client Supabase; fallback ke MockClient kalau library supabase gagal di-import."""
+    try:
+        return get_supabase()
+    except ImportError as e:
+        print(f"FATAL ERROR: Gagal import supabase. Menggunakan Mock Data. Detail: {e}")
         return MockClient()
 
 
 # --- KONEKSI SUPABASE ---
-supabase: Client = get_supabase()
+# Dibuat saat query pertama (bukan saat import), bisa di-inject lewat supabase.use(client)
+supabase = LazyClient(_connect)
 
+# =========================================================================
 # FUNGSI GETTER (get_rules_params, get_master_data, get_filtered_forecast)
 # =========================================================================
 
@@ -84,119 +91,227 @@ def get_master_data() -> pd.DataFrame:
         print(f"ERROR saat mengambil data MASTER: {e}")
         return pd.DataFrame() 
 
-def get_filtered_forecast(year_month: str) -> pd.DataFrame:
-    """Mengambil data dari tabel 'forcast' berdasarkan 'YYYY-MM'."""
-    print(f"-> Mengambil data 'forcast' untuk periode {year_month}...")
+def _period_bounds(start_ym: str, months: int) -> tuple:
+    """Tanggal awal & akhir (inklusif, sampai 23:59:59) untuk window N bulan mulai start_ym."""
+    start = pd.Timestamp(f"{start_ym}-01")
+    end = start + pd.DateOffset(months=months) - pd.Timedelta(days=1)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d") + " 23:59:59"
+
+def get_forecast_window(start_ym: str, months: int) -> pd.DataFrame:
+    """Mengambil data 'forcast' untuk N bulan sekaligus mulai 'YYYY-MM' (satu query berpaging)."""
+    print(f"-> Mengambil data 'forcast' untuk {months} bulan mulai {start_ym}...")
     try:
-        year, month = map(int, year_month.split('-'))
-        _, last_day = calendar.monthrange(year, month)
-        
-        start_date = f"{year_month}-01"
-        end_date = f"{year_month}-{last_day} 23:59:59" # FIX TIMESTAMP
-        
-        response = supabase.table("forcast") \
-                           .select("delivery_date, part_name, part_no, forecast_qty") \
-                           .gte("delivery_date", start_date) \
-                           .lte("delivery_date", end_date) \
-                           .execute()
-        
-        df_forecast = pd.DataFrame(response.data)
+        start_date, end_date = _period_bounds(start_ym, months) # FIX TIMESTAMP
+
+        rows = fetch_all_rows(lambda: supabase.table("forcast")
+                              .select("delivery_date, part_name, part_no, forecast_qty")
+                              .gte("delivery_date", start_date)
+                              .lte("delivery_date", end_date)
+                              .order("delivery_date"))
+
+        df_forecast = pd.DataFrame(rows)
         if df_forecast.empty:
-            print(f"   [INFO] Tidak ada data 'forcast' untuk periode {year_month}.")
+            print(f"   [INFO] Tidak ada data 'forcast' untuk window {start_ym} (+{months} bulan).")
             return df_forecast
 
         df_forecast['forecast_qty'] = pd.to_numeric(df_forecast['forecast_qty'], errors='coerce')
         return df_forecast
-        
+
     except Exception as e:
         print(f"ERROR saat mengambil data forcast: {e}")
         return pd.DataFrame() 
 
+def get_filtered_forecast(year_month: str) -> pd.DataFrame:
+    """Mengambil data dari tabel 'forcast' berdasarkan 'YYYY-MM'."""
+    return get_forecast_window(year_month, 1)
+
 # FUNGSI SAVE REPORT
 # =========================================================================
 
 def save_capacity_report(report_data: dict, year_month: str) -> None:
     """Menyimpan hasil perhitungan kapasitas ke tabel CAPACITY_REPORT."""
-    print(f"-> Menyimpan report kapasitas untuk {year_month}...")
+    save_capacity_cube({year_month: report_data})
+
+def save_capacity_cube(cube: dict) -> bool:
+    """Menyimpan seluruh cube {period: {tonage: report}} ke CAPACITY_REPORT dalam satu upsert. Return False kalau gagal."""
+    print(f"-> Menyimpan report kapasitas untuk {len(cube)} periode...")
     data_to_insert = []
     
-    for tonage, data in report_data.items():
-        if 'total_sum_day' in data and 'total_changes' in data and 'total_noa_hours' in data:
-            row = {
-                'period_ym': year_month,
-                'tonage': tonage,
-                'total_sum_day': round(data['total_sum_day'], 4),
-                'total_changes': data['total_changes'],
-                'total_noa_hours': round(data['total_noa_hours'], 4),
-            }
-            data_to_insert.append(row)
+    for year_month, report_data in cube.items():
+        for tonage, data in report_data.items():
+            if 'total_sum_day' in data and 'total_changes' in data and 'total_noa_hours' in data:
+                row = {
+                    'period_ym': year_month,
+                    'tonage': tonage if isinstance(tonage, str) else float(tonage),
+                    'total_sum_day': round(float(data['total_sum_day']), 4),
+                    'total_changes': int(data['total_changes']),
+                    'total_noa_hours': round(float(data['total_noa_hours']), 4),
+                }
+                data_to_insert.append(row)
 
     if not data_to_insert:
-        return
+        return True
 
     try:
         supabase.table("CAPACITY_REPORT").upsert(data_to_insert, on_conflict='period_ym,tonage').execute()
     except Exception as e:
         print(f"ERROR saat menyimpan report kapasitas ke DB: {e}")
+        return False
+    return True
 
 # FUNGSI UTAMA PERHITUNGAN
 # =========================================================================
-def calculate_capacity_report(year_month: str) -> dict:
-    """Fungsi utama untuk menggabungkan data, menghitung kapasitas, dan menyimpan hasilnya."""
-    print("\n--- Memulai Perhitungan Kapasitas ---")
-    
-    df_forecast = get_filtered_forecast(year_month)
-    df_master = get_master_data()
-    rules = get_rules_params()
-    
+LOT_COVER_DAYS = 15 # 1 run produksi menutup demand min 15 hari (sama dengan max coverage planner)
+
+def lot_cover_days(df_joined: pd.DataFrame, setup_hours: float, hours_per_day: float, min_cover_days: float = LOT_COVER_DAYS) -> pd.Series:
+    """
+    Lot-sizing per press (period_ym, tonage) dengan rotation cycle: press merotasi semua part-nya, tiap putaran
+    butuh n_part x setup_hours. Siklus terpendek yang masih muat = n_part * setup / (jam_per_hari * (1 - utilisasi)).
+    Press yang padat dipaksa lot lebih besar (cover lebih lama); minimal min_cover_days (target planner), maksimal
+    1 bulan (utilisasi >= 100% -> 1 run per part). Return Series index (period_ym, tonage) -> cover hari.
+    """
+    g = df_joined.groupby(['period_ym', 'tonage'])
+    n_parts = g['part_no'].nunique()
+    period_days = pd.Series(
+        pd.PeriodIndex(n_parts.index.get_level_values('period_ym'), freq='M').days_in_month, index=n_parts.index, dtype=float
+    )
+    slack = 1 - g['total_hours'].sum() / (period_days * hours_per_day)
+    min_cycle = (n_parts * setup_hours / (hours_per_day * slack)).where(slack > 0, np.inf)
+    return min_cycle.clip(lower=min_cover_days).clip(upper=period_days)
+
+def estimate_changeovers(df_joined: pd.DataFrame, cover_days: pd.Series) -> pd.Series:
+    """
+    Estimasi jumlah pergantian (setup) dari lot-sizing: demand tiap part digabung jadi run ekonomis,
+    1 run per window cover hari press-nya (lot_cover_days, dihitung dari delivery pertama part di bulan tsb).
+    1 run = 1 setup. Return Series index (period_ym, tonage) -> jumlah run. Vectorized (tanpa loop per part).
+    """
+    if df_joined.empty:
+        return pd.Series(dtype=int)
+    keys = ['period_ym', 'tonage', 'part_no']
+    dates = pd.to_datetime(df_joined['delivery_date']).dt.normalize()
+    first = dates.groupby([df_joined[k] for k in keys]).transform('min')
+    cover = pd.MultiIndex.from_frame(df_joined[['period_ym', 'tonage']]).map(cover_days).to_numpy(dtype=float)
+    bucket = np.floor((dates - first).dt.days.to_numpy() / np.maximum(cover, 1))
+    runs = pd.Series(bucket, index=df_joined.index).groupby([df_joined[k] for k in keys]).nunique()
+    return runs.groupby(level=['period_ym', 'tonage']).sum()
+
+def compute_capacity_cube(df_forecast: pd.DataFrame, df_master: pd.DataFrame, rules: dict) -> dict:
+    """
+    Hitung kapasitas untuk SEMUA (bulan, tonage) dalam satu pass grouped.
+    Pergantian diestimasi dari lot-sizing per press (lot_cover_days; minimal rules 'lot_cover_days').
+    Return {period_ym: {tonage: report}} dengan bentuk report sama seperti calculate_capacity_report.
+    """
     if df_forecast.empty or df_master.empty or not rules:
-        print("PERINGATAN: Data tidak lengkap. Perhitungan dibatalkan.")
         return {}
-    
+
     # 1. PEMBERSIHAN DATA & JOIN
+    df_forecast = df_forecast.copy()
     df_forecast['part_no'] = df_forecast['part_no'].astype(str).str.strip().str.upper() # Fix case & whitespace
     df_joined = df_forecast.merge(df_master.reset_index(), on='part_no', how='left')
 
     # 2. FILTRASI DATA
-    df_joined = df_joined[df_joined['tonage'].notna() & df_joined['cycle_time'].notna()]
-    
+    df_joined = df_joined[df_joined['tonage'].notna() & df_joined['cycle_time'].notna()].copy()
     if df_joined.empty:
         print("PERINGATAN: Semua data dibuang karena tidak ada pasangan part_no di MASTER.")
         return {}
 
-    # --- LANJUTAN PERHITUNGAN (Sama seperti sebelumnya) ---
-    CT_IN_HOURS = df_joined['cycle_time'] / 3600
-    df_joined['total_hours'] = df_joined['forecast_qty'] * CT_IN_HOURS
-    
-    df_joined.sort_values(by=['tonage', 'delivery_date'], inplace=True)
-    df_joined['is_change'] = (df_joined['part_no'] != df_joined.groupby('tonage')['part_no'].shift(1))
-    total_changes = df_joined[df_joined['is_change'] == True].groupby('tonage')['part_no'].count().reset_index(name='total_changes')
-    
-    df_report = df_joined.groupby(['tonage', 'part_name', 'part_no', 'cycle_time']).agg(total_hours=('total_hours', 'sum')).reset_index()
-    
-    rules['dandory_hours'] = rules.get('dandory_min', 0) / 60
-    rules['startup_hours'] = rules.get('startup_min', 0) / 60
-    
+    df_joined['period_ym'] = pd.to_datetime(df_joined['delivery_date']).dt.strftime('%Y-%m')
+    df_joined['total_hours'] = df_joined['forecast_qty'] * (df_joined['cycle_time'] / 3600)
+
+    dandory_hours = rules.get('dandory_min', 0) / 60
+    startup_hours = rules.get('startup_min', 0) / 60
     POTENTIAL_HOURS_PER_DAY = rules.get('shift_hours', 8) * rules.get('shift_per_day', 3) * rules.get('efficiency', 0.85)
-    
-    final_report = {}
-    
-    for tonase, df_group in df_report.groupby('tonage'):
-        changes_row = total_changes[total_changes['tonage'] == tonase]
-        change_count = changes_row['total_changes'].iloc[0] if not changes_row.empty else 0
-        total_noa_hours = change_count * (rules['dandory_hours'] + rules['startup_hours'])
-        df_group['total_day'] = df_group['total_hours'] / POTENTIAL_HOURS_PER_DAY
-        total_sum_day = df_group['total_day'].sum()
-        
-        final_report[tonase] = {
-            'data_detail': df_group.to_dict(orient='records'),
+
+    # 3. PERGANTIAN (CHANGE) per bulan + tonage: 1 setup per run lot-sizing per press, bukan per baris delivery
+    cover_days = lot_cover_days(df_joined, dandory_hours + startup_hours, POTENTIAL_HOURS_PER_DAY,
+                                rules.get('lot_cover_days') or LOT_COVER_DAYS)
+    total_changes = estimate_changeovers(df_joined, cover_days)
+
+    # 4. JAM & HARI per part
+    df_report = df_joined.groupby(['period_ym', 'tonage', 'part_name', 'part_no', 'cycle_time']).agg(total_hours=('total_hours', 'sum')).reset_index()
+
+    df_report['total_day'] = df_report['total_hours'] / POTENTIAL_HOURS_PER_DAY
+    total_days = df_report.groupby(['period_ym', 'tonage'])['total_day'].sum()
+
+    cube = {}
+    for (period, tonase), df_group in df_report.groupby(['period_ym', 'tonage']):
+        change_count = int(total_changes.get((period, tonase), 0))
+        cube.setdefault(period, {})[tonase] = {
+            'data_detail': df_group.drop(columns=['period_ym']).to_dict(orient='records'),
             'total_changes': change_count,
-            'total_noa_hours': total_noa_hours,
+            'total_noa_hours': change_count * (dandory_hours + startup_hours),
             'potential_hours_per_day': POTENTIAL_HOURS_PER_DAY,
-            'total_sum_day': total_sum_day
+            'total_sum_day': float(total_days[(period, tonase)])
         }
-        
-    print(f"   [SELESAI] Perhitungan kapasitas berhasil.")
-    save_capacity_report(final_report, year_month)
-    
-    return final_report
\ No newline at end of file
+    return cube
+
+def build_capacity_cube(start_ym: str, months: int, rules: dict = None, persist: bool = False) -> dict:
+    """
+    Load forecast N bulan + MASTER + rules SEKALI, hitung cube kapasitas semua bulan. Bulan tanpa forecast tidak ada di cube.
+    Hanya simpan ke CAPACITY_REPORT (satu upsert) kalau persist=True, yaitu dari aksi simpan eksplisit;
+    hitung ulang di job background / page load tidak menulis ke database.
+    """
+    print(f"\n--- Memulai Perhitungan Cube Kapasitas ({start_ym}, {months} bulan) ---")
+
+    df_forecast = get_forecast_window(start_ym, months)
+    df_master = get_master_data()
+    rules = rules if rules is not None else get_rules_params()
+
+    if df_forecast.empty or df_master.empty or not rules:
+        print("PERINGATAN: Data tidak lengkap. Perhitungan dibatalkan.")
+        return {}
+
+    cube = compute_capacity_cube(df_forecast, df_master, rules)
+    print(f"   [SELESAI] Cube kapasitas {len(cube)} periode berhasil dihitung.")
+    if persist and cube:
+        save_capacity_cube(cube)
+    return cube
+
+def capacity_cube_job(start_ym: str, months: int) -> dict:
+    """Entry point job_service 'capacity_cube': cube + rules yang dipakai (buat ditampilkan di page)."""
+    rules = get_rules_params()
+    return {'cube': build_capacity_cube(start_ym, months, rules=rules), 'rules': rules}
+
+VERSION_MARKER_COLS = ("updated_at", "created_at")  # updated_at diisi trigger server (sql/report_updated_at.sql)
+UNDEFINED_COLUMN = "42703"  # kode error Postgres: kolom tidak ada
+_version_markers = {}  # table -> kolom marker yang benar-benar ada
+
+def _latest_markers(table):
+    """
+    Nilai terbaru kolom updated_at / created_at table, satu request kecil per kolom. Kolom hanya dibuang kalau
+    error-nya memang kolom tidak ada; error lain (network / timeout) diteruskan ke pemanggil dan tidak di-cache.
+    """
+    values = []
+    found = []
+    for col in _version_markers.get(table, VERSION_MARKER_COLS):
+        try:
+            res = supabase.table(table).select(col).not_.is_(col, "null").order(col, desc=True).limit(1).execute()
+        except Exception as e:
+            if str(getattr(e, "code", "")) == UNDEFINED_COLUMN:
+                continue
+            raise
+        found.append(col)
+        values.append(res.data[0][col] if res.data else None)
+    _version_markers[table] = tuple(found)
+    return values
+
+def report_input_version(tables=("forcast", "MASTER", "rules")) -> str:
+    """
+    Fingerprint ringan input report: jumlah baris + updated_at/created_at terbaru tiap table (tanpa ambil data).
+    Insert/edit mengganti updated_at (trigger), hapus mengganti jumlah baris. Dipakai sebagai input version
+    di job_service: report dihitung ulang sekali per versi, tanpa TTL.
+    """
+    parts = []
+    for table in tables:
+        try:
+            res = supabase.table(table).select("*", count="exact").limit(1).execute()
+            markers = ",".join(str(v) for v in _latest_markers(table))
+            parts.append(f"{table}={getattr(res, 'count', None)}@{markers}")
+        except Exception as e:
+            print(f"ERROR saat cek versi table {table}: {e}")
+            parts.append(f"{table}=?")
+    return "|".join(parts)
+
+def calculate_capacity_report(year_month: str) -> dict:
+    """Fungsi utama untuk menggabungkan data, menghitung kapasitas, dan menyimpan hasilnya."""
+    return build_capacity_cube(year_month, 1, persist=True).get(year_month, {})
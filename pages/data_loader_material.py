@@ -2,7 +2,6 @@
 # Logika Perhitungan Kebutuhan Material (Kg)
 
 import pandas as pd
-from supabase import Client
 import time
 import sys
 import os
@@ -10,12 +9,14 @@ import os
 # --- IMPORT DARI ROOT (supabase_client) & DATA LOADER UTAMA ---
 # Memastikan akses ke root directory dan fungsi data umum
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from supabase_client import get_supabase
+from supabase_client import LazyClient
 # Asumsi: get_filtered_forecast ada di pages/data_loader.py
 from pages.data_loader import get_filtered_forecast 
+from services.material_service import encode_materials
 
 # --- KONEKSI SUPABASE ---
-supabase: Client = get_supabase()
+# Client dibuat saat query pertama (bukan saat import)
+supabase = LazyClient()
 
 # =========================================================================
 # 1. GETTER: Mengambil Data MASTER untuk BOM
@@ -122,29 +123,18 @@ def calculate_material_report(year_month: str) -> pd.DataFrame:
         # Total Kg = (forecast_qty * gross (gram)) / 1000
         material_needs['required_kg'] = (material_needs['forecast_qty'] * material_needs['gross']) / 1000
         
-        # 6. Buat Material ID Unik (Concatenation, Tahan NULL/Kosong)
-        cols_to_combine = ['type_material', 'grade_material', 'color_material']
-        
-        for col in cols_to_combine:
-            # Isi NULL dengan string kosong dan konversi ke UPPERCASE untuk konsistensi grouping
-            material_needs[col] = material_needs.get(col, pd.Series([''] * len(material_needs))).fillna('').astype(str).str.strip().str.upper()
-                
-        # Concatenate: Gabungkan semua kolom dengan pemisah '-'
-        material_needs['material_id_unique'] = material_needs[cols_to_combine].apply(
-            lambda row: '-'.join(row.values), axis=1
-        )
-        
-        # 7. Rangkum Total Kebutuhan per Material
-        material_report = material_needs.groupby([
-            'material_id_unique', 
-            'type_material', 
-            'grade_material', 
-            'color_material'
-        ]).agg(
+        # 6. Material code integer dari dimensi List_Material (key TYPE-GRADE-COLOR, vectorized)
+        material_needs, dim = encode_materials(material_needs)
+
+        # 7. Rangkum Total Kebutuhan per Material (satu groupby integer)
+        material_report = material_needs.groupby('material_code').agg(
             total_required_kg=('required_kg', 'sum'),
-            total_forecast_parts=('forecast_qty', 'sum') 
-        ).reset_index()
-        
+            total_forecast_parts=('forecast_qty', 'sum')
+        )
+        material_report = pd.concat(
+            [dim.attributes(material_report.index), material_report.reset_index(drop=True)], axis=1
+        ).drop(columns='material_code')
+
         material_report.rename(columns={
             'type_material': 'material_type',
             'grade_material': 'material_grade',
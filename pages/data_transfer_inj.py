@@ -1,5 +1,5 @@
 import streamlit as st
-from supabase import create_client
+from supabase_client import create_client
 import datetime
 from datetime import timedelta
 from components.navbar import show_navbar 
@@ -1,8 +1,13 @@
 from supabase_client import get_supabase
 import streamlit as st
+import pandas as pd
 from datetime import date, datetime
 
 from components.navbar import show_navbar
+from components.material_picker import material_selectboxes
+from components.stockout_panel import show_stockout_ranking
+from services import po_service
+from services.material_service import get_material_options
 
 # Initialize Supabase client
 supabase = get_supabase()
@@ -14,6 +19,15 @@ def insert_material(data: dict):
     except Exception as e:
         return {"error": str(e)}
 
+@st.cache_data(ttl=30)
+def load_open_po():
+    # Di-cache supaya ganti pilihan material (rerun) tidak query PO lagi; dikosongkan saat PO berubah
+    return po_service.get_open_po()
+
+def po_label(row):
+    return (f"{row['po_number']} | {row['type_material']} {row['grade_material']} {row['color_material']}"
+            f" | sisa {row['outstanding']:,.1f} {row['uom']} | ETA {row['expected_date']}")
+
 def main():
     # Setup Page Config (Optional, agar lebih rapi)
     st.set_page_config(page_title="Incoming Material", page_icon="📦", layout="centered")
@@ -86,28 +100,30 @@ def main():
     st.caption("Form pencatatan material masuk ke warehouse produksi.")
     
     # --- DATA FETCHING ---
-    # Mengambil data hanya sekali dan fix bug duplicate assignment
+    # Pilihan dari dimensi material bersama (List_Material, di-cache di material_service)
+    material_options = get_material_options()
+    type_options = material_options["type_material"]
+    grade_options = material_options["grade_material"]
+    color_options = material_options["color_material"]
+
     try:
-        material_data = supabase.table("List_Material").select("TYPE, GRADE, COLOR").execute().data
-    except Exception:
-        material_data = []
+        df_open_po = load_open_po()
+    except Exception as e:
+        st.warning(f"Data PO terbuka tidak bisa dibaca: {e}")
+        df_open_po = pd.DataFrame()
+    po_options = {po_label(r): r for r in df_open_po.to_dict("records")}
 
-    type_options = sorted(list({item["TYPE"] for item in material_data})) if material_data else []
-    grade_options = sorted(list({item["GRADE"] for item in material_data})) if material_data else []
-    color_options = sorted(list({item["COLOR"] for item in material_data})) if material_data else []
+    # SECTION 1: SPESIFIKASI MATERIAL (di luar form: grade/color ikut ter-filter sesuai pilihan di atasnya)
+    st.markdown("### 🛠️ Spesifikasi Material")
+    type_material, grade_material, color_material = material_selectboxes("incoming")
+    picked = tuple(str(v or "").strip().upper() for v in (type_material, grade_material, color_material))
+    po_for_material = {
+        label: r for label, r in po_options.items()
+        if tuple(str(r[c] or "").strip().upper() for c in ("type_material", "grade_material", "color_material")) == picked
+    }
 
     # --- FORM UI ---
     with st.form("incoming_form", clear_on_submit=False):
-        
-        # SECTION 1: SPESIFIKASI MATERIAL
-        st.markdown("### 🛠️ Spesifikasi Material")
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            type_material = st.selectbox("Type Material", type_options)
-        with col2:
-            grade_material = st.selectbox("Grade Material", grade_options)
-        with col3:
-            color_material = st.selectbox("Color Material", color_options)
 
         # SECTION 2: KUANTITAS
         st.markdown("### ⚖️ Kuantitas")
@@ -130,6 +146,8 @@ def main():
         with l_col2:
             po_number = st.text_input("PO Number")
             lot_no = st.text_input("Lot Number")
+        po_pick = st.selectbox("Terima untuk PO Terbuka (opsional)", ["-- Tanpa PO --"] + list(po_for_material),
+                               help="Outstanding PO berkurang sebesar qty terima.")
 
         # Row 2 Waktu & PIC
         l_col3, l_col4, l_col5 = st.columns(3)
@@ -151,6 +169,9 @@ def main():
                  st.warning("⚠️ Mohon lengkapi minimal Type Material dan Supplier Name.")
             else:
                 with st.spinner("Menyimpan ke database..."):
+                    po_row = po_for_material.get(po_pick)
+                    if po_row and not po_number:
+                        po_number = po_row["po_number"]
                     data = {
                         "type_material": type_material,
                         "grade_material": grade_material,
@@ -166,13 +187,91 @@ def main():
                         "prepared_by": prepared_by,
                     }
 
-                    result = insert_material(data)
-
-                    if "error" in result:
-                        st.error(f"❌ Gagal menyimpan: {result['error']}")
+                    if po_row:
+                        # material_in + outstanding PO satu transaksi: dua-duanya tersimpan atau tidak sama sekali
+                        try:
+                            po_qty = po_service.qty_in_po_uom(qty, uom, po_row["uom"])
+                            po_after = po_service.receive_material(data, po_row["id"], po_qty)
+                            load_open_po.clear()
+                            st.success("✅ Data berhasil disimpan ke Supabase!")
+                            st.info(f"PO {po_row['po_number']} diupdate (status {po_after['status']}).")
+                        except Exception as e:
+                            st.error(f"❌ Gagal menyimpan: {e}")
                     else:
-                        st.success("✅ Data berhasil disimpan ke Supabase!")
-                        # Opsional: st.rerun() jika ingin mereset form total
+                        result = insert_material(data)
+
+                        if "error" in result:
+                            st.error(f"❌ Gagal menyimpan: {result['error']}")
+                        else:
+                            st.success("✅ Data berhasil disimpan ke Supabase!")
+                    # Opsional: st.rerun() jika ingin mereset form total
+
+    # --- OPEN PO / EXPECTED RECEIPT ---
+    st.divider()
+    st.markdown("### 📋 PO Material Terbuka")
+    st.caption("Outstanding PO ikut dihitung sebagai incoming di tanggal ETA pada proyeksi stok resin & MRP.")
+
+    with st.expander("➕ Input PO Baru"):
+        with st.form("po_form", clear_on_submit=True):
+            p1, p2 = st.columns(2)
+            with p1:
+                new_po_number = st.text_input("PO Number", key="po_new_number")
+                new_supplier = st.text_input("Supplier Name", key="po_new_supplier")
+            with p2:
+                new_eta = st.date_input("ETA (Expected Date)", value=date.today(), key="po_new_eta")
+                new_uom = st.selectbox("UOM", ["KG", "G", "BATCH", "PCS"], key="po_new_uom")
+            p3, p4, p5, p6 = st.columns(4)
+            with p3:
+                new_type = st.selectbox("Type", type_options, key="po_new_type")
+            with p4:
+                new_grade = st.selectbox("Grade", grade_options, key="po_new_grade")
+            with p5:
+                new_color = st.selectbox("Color", color_options, key="po_new_color")
+            with p6:
+                new_qty = st.number_input("Qty Order", min_value=0.0, step=1.0, key="po_new_qty")
+            if st.form_submit_button("💾 Simpan PO"):
+                if not new_po_number or new_qty <= 0:
+                    st.warning("⚠️ PO Number dan Qty Order wajib diisi.")
+                else:
+                    try:
+                        po_service.create_po([{
+                            "po_number": new_po_number,
+                            "supplier_name": new_supplier,
+                            "type_material": new_type,
+                            "grade_material": new_grade,
+                            "color_material": new_color,
+                            "qty_order": new_qty,
+                            "uom": new_uom,
+                            "expected_date": new_eta,
+                        }])
+                        st.success(f"✅ PO {new_po_number} tersimpan.")
+                        load_open_po.clear()
+                        st.rerun()
+                    except Exception as e:
+                        st.error(f"❌ Gagal menyimpan PO: {e}")
+
+    if df_open_po.empty:
+        st.info("Tidak ada PO terbuka.")
+    else:
+        late = pd.to_datetime(df_open_po["expected_date"]).dt.date < date.today()
+        m1, m2, m3 = st.columns(3)
+        m1.metric("Baris PO Terbuka", len(df_open_po))
+        m2.metric("Outstanding (Kg)", f"{df_open_po['outstanding_kg'].sum():,.1f}")
+        m3.metric("PO Telat", int(late.sum()))
+        st.dataframe(
+            df_open_po[["po_number", "supplier_name", "type_material", "grade_material", "color_material",
+                        "qty_order", "qty_received", "outstanding", "uom", "expected_date"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+        cancel_pick = st.multiselect("Batalkan PO", list(po_options))
+        if cancel_pick and st.button("🗑️ Batalkan PO Terpilih"):
+            po_service.cancel_po([po_options[label]["id"] for label in cancel_pick])
+            load_open_po.clear()
+            st.rerun()
+
+    # Shortage semua resin sekaligus: saldo + incoming + outstanding PO - konsumsi jadwal/forecast
+    show_stockout_ranking("resin", "Proyeksi Stockout Resin (termasuk PO Terbuka)", item_label="Material", unit="(Kg)")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
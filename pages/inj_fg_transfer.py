@@ -1,6 +1,6 @@
 import streamlit as st
 import pandas as pd
-from supabase import create_client
+from supabase_client import create_client
 from datetime import datetime, date, timedelta
 from fpdf import FPDF
 import time
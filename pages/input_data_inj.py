@@ -1,9 +1,10 @@
 import streamlit as st
-from supabase import create_client
+from supabase_client import create_client
 import datetime
 from datetime import timedelta
 import pandas as pd
 from components.navbar import show_navbar
+from services.master_service import get_part_vocabulary
 
 # ==================== CONFIG & CSS (TRUE DARK MODE) ==================== #
 # st.set_page_config(page_title="Input Produksi", layout="wide") # Uncomment jika ini page utama
@@ -104,12 +105,11 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ==================== HELPER FUNCTIONS ==================== #
-@st.cache_data(ttl=60)
-def get_all_parts():
+def get_part_options():
+    # Vocabulary List_Part (nama urut + dict nama -> part no), di-cache per process di master_service
     try:
-        res = supabase.table("List_Part").select("PART_NO, PART_NAME").execute()
-        return res.data
-    except: return []
+        return get_part_vocabulary("List_Part")
+    except: return {"names": [], "part_no_by_name": {}}
 
 def get_production_data(selected_month=None):
     try:
@@ -141,8 +141,8 @@ def get_available_months():
         return [datetime.datetime.now().strftime('%Y-%m')]
 
 # ==================== LOGIC INPUT ==================== #
-all_parts = get_all_parts()
-part_names = sorted(list(set([p['PART_NAME'] for p in all_parts]))) if all_parts else []
+part_vocab = get_part_options()
+part_names = part_vocab["names"]
 
 # --- BAGIAN 1: PILIH PART (Diluar Form) ---
 st.markdown("##### 1️⃣ Identitas Part & Waktu")
@@ -152,10 +152,7 @@ with col_sel1:
     selected_name = st.selectbox("Pilih Nama Part", options=[""] + part_names, index=0)
 
 with col_sel2:
-    part_no_val = ""
-    if selected_name:
-        match = next((p for p in all_parts if p['PART_NAME'] == selected_name), None)
-        if match: part_no_val = match['PART_NO']
+    part_no_val = part_vocab["part_no_by_name"].get(selected_name, "") if selected_name else ""
     
     st.text_input("Part Number (Auto)", value=part_no_val, disabled=True)
 
@@ -0,0 +1,84 @@
+import sys, os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import time
+
+import streamlit as st
+from components.navbar import show_navbar
+from services import trace_service
+from utils.trace_index import CONSUME_HOURS, DOWNSTREAM_DAYS
+
+# ===== INIT =====
+st.set_page_config(page_title="Lot Traceability", layout="wide")
+show_navbar()
+
+# ===== PAGE HEADER =====
+st.title("🔎 Lot Traceability")
+st.caption("Telusuri lot material ke produksi, WIP, FG dan pengiriman (forward) atau dari surat jalan balik ke lot material (backward).")
+st.divider()
+
+SECTIONS = [
+    ("receipts", "📥 Penerimaan Lot (material_in)"),
+    ("issues", "📤 Pengeluaran ke Line (material_out)"),
+    ("production", "🏭 Produksi (monitor_per_hour / Hasil_Produksi)"),
+    ("wip", "🏗️ Masuk WIP (wip_in)"),
+    ("fg", "✅ Masuk FG (fg_in)"),
+    ("delivery", "🚚 Pengiriman (Delivery_FG)"),
+]
+
+# ===== INPUT =====
+c1, c2 = st.columns([1, 2])
+with c1:
+    mode = st.radio("Arah Trace", ["Forward: Lot ➡️ Delivery", "Backward: Surat Jalan ➡️ Lot"])
+with c2:
+    forward = mode.startswith("Forward")
+    query = st.text_input("Lot Number" if forward else "No. Delivery (Surat Jalan)", placeholder="LOT-xxxx" if forward else "SSP-2025-0001")
+
+if not query.strip():
+    st.info("Masukkan nomor lot atau surat jalan untuk mulai trace.")
+    st.stop()
+
+# ===== TRACE =====
+try:
+    with st.spinner("Menyiapkan index traceability..."):
+        trace_service.get_trace_index()
+    t0 = time.perf_counter()
+    result = trace_service.trace_lot(query) if forward else trace_service.trace_delivery(query)
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+except Exception as e:
+    st.error(f"Gagal trace: {e}")
+    st.stop()
+
+counts = {stage: len(result[stage]) for stage, _ in SECTIONS}
+if not any(counts.values()):
+    st.warning("Tidak ditemukan transaksi untuk nomor ini.")
+    st.stop()
+
+cols = st.columns(len(SECTIONS))
+for col, (stage, label) in zip(cols, SECTIONS):
+    col.metric(label.split(" (")[0], counts[stage])
+st.caption(
+    f"Trace {elapsed_ms:.1f} ms. Link tanpa nomor lot memakai jendela waktu: issue ➡️ produksi {CONSUME_HOURS} jam, "
+    f"produksi ➡️ WIP/FG/delivery {DOWNSTREAM_DAYS} hari — hasil = range suspect untuk containment."
+)
+
+if forward and not result["delivery"].empty:
+    st.markdown("### 🚨 Customer Terdampak")
+    impacted = (
+        result["delivery"].groupby(["customer", "ref", "part_no"], dropna=False, as_index=False)["qty"].sum()
+        .rename(columns={"ref": "no_delivery"})
+    )
+    st.dataframe(impacted, use_container_width=True, hide_index=True)
+
+for stage, label in SECTIONS:
+    df = result[stage]
+    with st.expander(f"{label} — {len(df)} baris", expanded=stage in ("issues", "production") and not df.empty):
+        if df.empty:
+            st.caption("Tidak ada.")
+        else:
+            st.dataframe(
+                df,
+                use_container_width=True,
+                hide_index=True,
+                column_config={"ts": st.column_config.DatetimeColumn("Waktu", format="DD/MM/YY HH:mm")},
+            )
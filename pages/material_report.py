@@ -4,10 +4,11 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 
-# Impor dari file loader material yang baru
-from pages.data_loader_material import calculate_material_report
+# Report material dihitung di job_service, page cuma butuh versi input
+from pages.data_loader import report_input_version
 # Impor navbar
 from components.navbar import show_navbar
+from components.job_status import job_result
 
 # --- FUNGSI HALAMAN UTAMA ---
 def material_report_page():
@@ -44,11 +45,19 @@ def material_report_page():
     st.header(f"Kebutuhan Material untuk Bulan: **{selected_period}**")
 
     # --- 3. Memuat dan Menjalankan Perhitungan ---
-    @st.cache_data(ttl=600)
-    def load_material_data(period: str):
-        return calculate_material_report(period)
+    # Dihitung di worker background (services/job_service), sekali per periode & versi input
+    @st.cache_data(ttl=60)
+    def load_input_version():
+        return report_input_version(("forcast", "MASTER"))
 
-    material_report_df = load_material_data(selected_period)
+    material_report_df = job_result(
+        "material_report",
+        {"year_month": selected_period},
+        load_input_version(),
+        label="Report Material",
+    )
+    if material_report_df is None:
+        material_report_df = pd.DataFrame()
 
     if material_report_df.empty:
         st.error(f"⚠️ Tidak ada data atau terjadi kegagalan saat JOIN/perhitungan Material untuk periode {selected_period}. Cek data 'forcast' dan 'MASTER' (GROSS/Material Specs).")
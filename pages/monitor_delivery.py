@@ -1,18 +1,18 @@
 import streamlit as st
 import pandas as pd
-from supabase import create_client
+from supabase_client import get_supabase
 from datetime import datetime, date
-from fpdf import FPDF
 from io import BytesIO
 from components.navbar import show_navbar  # ✅ Navbar
+from services import document_service
+from components.pdf_download import show_pdf_download, submit_pdf
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="🚚 Monitor Delivery (Finish Good)", layout="wide")
 
 # --- CONNECT SUPABASE ---
-url = st.secrets["SUPABASE_URL"]
-key = st.secrets["SUPABASE_KEY"]
-supabase = create_client(url, key)
+# Lewat supabase_client supaya semua round trip tercatat di panel debug navbar
+supabase = get_supabase()
 
 # --- NAVBAR ---
 show_navbar()
@@ -64,57 +64,6 @@ def convert_df_to_excel_bytes(df: pd.DataFrame):
         writer.save()
     return output.getvalue()
 
-def create_pdf_bytes(header_info, parts_list):
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Arial", "B", 14)
-    pdf.cell(0, 8, "PT. SHIN SAM PLUS INDUSTRY", ln=True, align="C")
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(0, 7, "SURAT JALAN PENGIRIMAN BARANG (FINISH GOOD)", ln=True, align="C")
-    pdf.ln(6)
-
-    pdf.set_font("Arial", size=11)
-    pdf.cell(100, 7, f"No. Delivery : {header_info['NO_DELIVERY']}", ln=0)
-    pdf.cell(0, 7, f"No. PO : {header_info['NO_PO']}", ln=1)
-    pdf.cell(100, 7, f"Customer     : {header_info['CUSTOMER']}", ln=0)
-    pdf.cell(0, 7, f"Tanggal : {header_info['DATE_DELIVERY'].strftime('%d-%b-%Y')}", ln=1)
-    pdf.cell(0, 7, f"Prepared By  : {header_info['PREPARED_BY']}", ln=1)
-    pdf.ln(6)
-
-    # Table header
-    pdf.set_font("Arial", "B", 11)
-    pdf.cell(10, 8, "No", border=1, align="C")
-    pdf.cell(40, 8, "Part No", border=1, align="C")
-    pdf.cell(90, 8, "Part Name", border=1, align="C")
-    pdf.cell(30, 8, "Qty", border=1, align="C")
-    pdf.ln()
-
-    pdf.set_font("Arial", size=11)
-    for i, (pno, pname, qty) in enumerate(parts_list, start=1):
-        pdf.cell(10, 8, str(i), border=1, align="C")
-        pdf.cell(40, 8, str(pno), border=1)
-        x_pos = pdf.get_x()
-        y_pos = pdf.get_y()
-        pdf.multi_cell(90, 8, str(pname), border=1)
-        new_y = pdf.get_y()
-        pdf.set_xy(x_pos + 90, y_pos)
-        pdf.cell(30, 8, f"{qty:,}", border=1, align="R")
-        pdf.ln()
-        if pdf.get_y() < new_y:
-            pdf.set_y(new_y)
-
-    pdf.ln(8)
-    pdf.set_font("Arial", size=11)
-    pdf.cell(0, 6, "Diterima oleh: ____________________", ln=1)
-    pdf.cell(0, 6, "Tanggal: ___________________________", ln=1)
-    pdf.cell(0, 6, "Tanda tangan: ______________________", ln=1)
-
-    s = pdf.output(dest="S")
-    if isinstance(s, str):
-        s = s.encode("latin-1")
-    return s
-
 # -------------------------
 # Load Stock FG
 # -------------------------
@@ -232,13 +181,13 @@ if submit:
             "PREPARED_BY": prepared_by
         }
         parts_pdf = [(p["PART_NO"], p["PART_NAME"], p["QTY"]) for p in filled]
-        pdf_bytes = create_pdf_bytes(header, parts_pdf)
-
-        st.download_button(
-            label="📄 Download Surat Jalan (PDF)",
-            data=pdf_bytes,
-            file_name=f"{no_delivery}.pdf",
-            mime="application/pdf"
+        # PDF dirender di worker thread; tombol download tampil setelah refresh
+        submit_pdf(
+            "delivery_pdf",
+            document_service.KIND_DELIVERY,
+            [{**header, "PARTS": parts_pdf}],
+            f"{no_delivery}.pdf",
+            f"📄 Download Surat Jalan {no_delivery} (PDF)",
         )
         st.info("Halaman akan direfresh untuk menampilkan data terbaru.")
         st.rerun()
@@ -246,6 +195,8 @@ if submit:
     except Exception as e:
         st.error(f"Gagal menyimpan data pengiriman: {e}")
 
+show_pdf_download("delivery_pdf")
+
 # -------------------------
 # Riwayat pengiriman
 # -------------------------
@@ -282,3 +233,27 @@ if not df_hist.empty:
     )
 else:
     st.info("Belum ada data pengiriman.")
+
+# -------------------------
+# Cetak batch Surat Jalan (data riwayat yang sedang difilter)
+# -------------------------
+if not df_hist.empty and st.button("🖨️ Siapkan PDF Batch Surat Jalan (sesuai filter)"):
+    docs = [
+        {
+            "NO_DELIVERY": no_deliv,
+            "NO_PO": g["NO_PO"].iloc[0],
+            "CUSTOMER": g["CUSTOMER"].iloc[0],
+            "DATE_DELIVERY": g["DATE_DELIVERY"].iloc[0],
+            "PREPARED_BY": g["PREPARED_BY"].iloc[0],
+            "PARTS": list(zip(g["PART_NO"], g["PART_NAME"], g["QTY_DELIVERY"].apply(to_int_safe))),
+        }
+        for no_deliv, g in df_hist.groupby("NO_DELIVERY", sort=True)
+    ]
+    submit_pdf(
+        "delivery_batch_pdf",
+        document_service.KIND_DELIVERY,
+        docs,
+        f"SuratJalan_Batch_{datetime.now().strftime('%Y%m%d_%H%M')}.pdf",
+        f"📄 Download {len(docs)} Surat Jalan (PDF)",
+    )
+show_pdf_download("delivery_batch_pdf")
@@ -1,23 +1,29 @@
 import streamlit as st
 import pandas as pd
-from supabase import create_client
+from supabase_client import create_client, get_supabase
 from datetime import datetime, date
 from io import BytesIO
 # Pastikan file components/navbar.py ada
 from components.navbar import show_navbar 
+from components.profiler import page_profiler
+from components.stockout_panel import show_stockout_ranking
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="🏭 Monitor Integrated Stock", layout="wide")
 
 # --- CONNECT SUPABASE ---
-# st.secrets harus tersedia saat deployment
-url = st.secrets.get("SUPABASE_URL", "URL_NOT_FOUND")
-key = st.secrets.get("SUPABASE_KEY", "KEY_NOT_HING")
-supabase = create_client(url, key)
+# Lewat supabase_client supaya query identik dari banyak supervisor di-coalesce (single-flight).
+# st.secrets tetap dipakai kalau ada (deployment); kalau tidak, default SUPABASE_URL/KEY supabase_client.
+url = st.secrets.get("SUPABASE_URL")
+key = st.secrets.get("SUPABASE_KEY")
+supabase = create_client(url, key) if url and key else get_supabase()
 
 # --- NAVBAR (Diaktifkan) ---
 show_navbar()
 
+# --- PROFILER (opt-in: ?profile=1) ---
+prof = page_profiler("monitor_finishgood")
+
 # --- FUNGSI STATUS OTOMATIS ---
 def status_label(balance):
     """Fungsi untuk menentukan status stok berdasarkan BALANCE (BAL)"""
@@ -184,6 +190,7 @@ with col_date:
     selected_date_str = selected_date.strftime("%Y-%m-%d") 
     
 # --- LOAD DATA ---
+prof.mark("fetch")
 df_integrated = load_integrated_data(selected_date_str)
 
 # --- CEK DATA KOSONG ---
@@ -202,6 +209,7 @@ search_query = st.text_input("🔍 Cari berdasarkan Part No atau Part Name", val
 
 
 # --- APLIKASIKAN SEMUA FILTER ---
+prof.mark("transform")
 df_filtered = df_integrated.copy()
 
 # 1. Filter Status
@@ -222,6 +230,7 @@ if df_filtered.empty:
     st.stop()
     
 # --- FORMAT ANGKA UNTUK TAMPILAN ---
+prof.mark("style")
 df_display = df_filtered.copy()
 # Format QTY dan BAL dengan separator ribuan
 for col in ["QTY_IN", "QTY_OUT", "BAL", "SPQ"]:
@@ -240,6 +249,7 @@ count_minus = len(df_filtered[df_filtered["STATUS"] == "🟥 STOCK MINUS"].drop_
 count_ready = len(df_filtered[df_filtered["STATUS"] == "🟩 READY DELIVERY"].drop_duplicates(subset=['PART NO']))
 
 
+prof.mark("render")
 st.markdown("### 📊 Ringkasan Stok Integrated")
 # Menggunakan 3 kolom: Total Part, Count Ready, Count Minus
 c1, c2, c3 = st.columns(3) 
@@ -251,6 +261,9 @@ with c2:
 with c3:
     st.metric("Total Stock Minus", f"🟥 {count_minus:,}")
 
+# --- PROYEKSI STOCKOUT (urut urgensi, bukan cuma saldo) ---
+show_stockout_ranking("fg", "Proyeksi Stockout FG + WIP (Days of Cover)", item_label="Part No", unit="(pcs)")
+
 # --- TAMPILKAN DATA ---
 st.markdown("### 📦 Data Integrated STOCK")
 # Urutan kolom sesuai permintaan
@@ -290,6 +303,7 @@ def convert_df_to_excel(df):
             worksheet.set_column(i, i, max_len)
     return output.getvalue()
 
+prof.mark("export")
 excel_data = convert_df_to_excel(df_filtered) # Ekspor data yang sudah difilter
 
 # --- DOWNLOAD BUTTON ---
@@ -303,4 +317,6 @@ st.download_button(
 # --- REFRESH BUTTON ---
 if st.button("🔄 Refresh Data"):
     st.cache_data.clear()
-    st.rerun()
\ No newline at end of file
+    st.rerun()
+
+prof.finish()
@@ -1,8 +1,12 @@
 import streamlit as st
 import pandas as pd
-from supabase import create_client
-from datetime import datetime, date, timedelta
+from supabase_client import create_client
+from datetime import date
 from components.navbar import show_navbar
+from components.profiler import page_profiler
+from services import bon_service, projection_service
+from services.material_service import encode_materials
+from components.stockout_panel import show_stockout_ranking
 
 # -----------------------------
 # CONFIG
@@ -82,6 +86,7 @@ st.markdown(
 # NAVBAR
 # -----------------------------
 show_navbar()
+prof = page_profiler("monitor_material")  # opt-in: ?profile=1
 
 # -----------------------------
 # HEADER
@@ -132,6 +137,7 @@ with filter_col4:
 # Important: we load ALL transactions up to the snapshot_date (inclusive)
 # -----------------------------
 st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
+prof.mark("fetch")
 try:
     # Query all rows with date <= snapshot_date
     res = supabase.table("v_material_balance").select("*").lte("date", snapshot_date.isoformat()).execute()
@@ -142,6 +148,7 @@ except Exception as e:
 
 # --- TAMBAHAN PENTING DI SINI ---
 # Paksa kolom 'date' jadi object date python biar match sama snapshot_date
+prof.mark("transform")
 if not df_view.empty:
     df_view["date"] = pd.to_datetime(df_view["date"]).dt.date
 
@@ -157,67 +164,38 @@ else:
     # LOGIC UPDATE: PISAHKAN KUMULATIF & HARIAN
     # -----------------------------
 
+    # Material code integer dari dimensi List_Material -> semua grouping cukup satu kolom int
+    df_view, dim = encode_materials(df_view)
+
     # 1. Hitung BALANCE KUMULATIF (Total Masuk - Total Keluar dari awal s/d snapshot_date)
-    cumulative_agg = (
-        df_view.groupby(["type_material", "grade_material", "color_material"], as_index=False)
-        .agg({"qty_in_harian": "sum", "qty_out_harian": "sum"})
-    )
+    cumulative_agg = df_view.groupby("material_code")[["qty_in_harian", "qty_out_harian"]].sum()
     # Balance = Total In - Total Out
-    cumulative_agg["balance"] = cumulative_agg["qty_in_harian"] - cumulative_agg["qty_out_harian"]
-    
+    balance = cumulative_agg["qty_in_harian"] - cumulative_agg["qty_out_harian"]
+
     # Siapkan Master Stock (Type, Grade, Color, Balance)
-    master_stock = cumulative_agg[["type_material", "grade_material", "color_material", "balance"]].rename(columns={
+    snapshot = dim.attributes(balance.index)[["type_material", "grade_material", "color_material"]].rename(columns={
         "type_material": "TYPE",
         "grade_material": "GRADE",
         "color_material": "COLOR"
     })
+    snapshot["balance"] = balance.to_numpy()
 
     # 2. Hitung PERGERAKAN HARIAN (Khusus tanggal snapshot_date)
-    daily_df = df_view[df_view["date"] == snapshot_date]
-    
-    if daily_df.empty:
-        # Jika hari ini tidak ada transaksi, Qty In/Out 0
-        daily_agg = pd.DataFrame(columns=["TYPE", "GRADE", "COLOR", "QTY_IN", "QTY_OUT"])
-    else:
-        daily_agg = (
-            daily_df.groupby(["type_material", "grade_material", "color_material"], as_index=False)
-            .agg({"qty_in_harian": "sum", "qty_out_harian": "sum"})
-            .rename(columns={
-                "type_material": "TYPE",
-                "grade_material": "GRADE",
-                "color_material": "COLOR",
-                "qty_in_harian": "QTY_IN",
-                "qty_out_harian": "QTY_OUT"
-            })
-        )
-
-    # 3. MERGE (GABUNGKAN)
-    # Left join Master Stock dengan Daily Agg
-    snapshot = pd.merge(master_stock, daily_agg, how="left", on=["TYPE", "GRADE", "COLOR"])
-
-    # Isi NaN dengan 0 untuk pergerakan harian
-    snapshot["QTY_IN"] = snapshot["QTY_IN"].fillna(0).astype(float)
-    snapshot["QTY_OUT"] = snapshot["QTY_OUT"].fillna(0).astype(float)
+    # Jika hari ini tidak ada transaksi, Qty In/Out 0
+    daily_agg = (
+        df_view[df_view["date"] == snapshot_date]
+        .groupby("material_code")[["qty_in_harian", "qty_out_harian"]].sum()
+        .reindex(balance.index)
+    )
+    snapshot["QTY_IN"] = daily_agg["qty_in_harian"].fillna(0).to_numpy(dtype=float)
+    snapshot["QTY_OUT"] = daily_agg["qty_out_harian"].fillna(0).to_numpy(dtype=float)
 
     # -----------------------------
-    # 4. AMBIL INFO TAMBAHAN (Last Update Saja)
+    # 3. AMBIL INFO TAMBAHAN (Last Update Saja)
     # -----------------------------
     # Kita ambil tanggal created_at dari transaksi paling terakhir sebagai "Last Update"
-    meta_df = (
-        df_view.sort_values("created_at", ascending=False)
-        .drop_duplicates(subset=["type_material", "grade_material", "color_material"])
-    )
-    # Cuma ambil kolom kunci + created_at (PART_NAME dibuang sesuai request)
-    meta_df = meta_df[["type_material", "grade_material", "color_material", "created_at"]]
-    meta_df = meta_df.rename(columns={
-        "type_material": "TYPE", 
-        "grade_material": "GRADE", 
-        "color_material": "COLOR",
-        "created_at": "LAST_UPDATE_RAW"
-    })
-    
-    # Gabung ke snapshot
-    snapshot = snapshot.merge(meta_df, how="left", on=["TYPE", "GRADE", "COLOR"])
+    last_update = pd.to_datetime(df_view["created_at"]).groupby(df_view["material_code"]).max()
+    snapshot["LAST_UPDATE_RAW"] = last_update.reindex(balance.index).to_numpy()
     
     # Format Tanggal
     if "LAST_UPDATE_RAW" in snapshot.columns:
@@ -257,6 +235,7 @@ else:
         snapshot = snapshot[snapshot["STATUS"] == status_filter]
 
     # summary cards
+    prof.mark("render")
     total_item = snapshot.shape[0]
     total_ready = (snapshot["STATUS"] == "READY DELIVERY").sum()
     total_minus = (snapshot["STATUS"] == "STOCK MINUS").sum()
@@ -286,6 +265,9 @@ else:
 
     st.markdown("<div style='height:10px'></div>", unsafe_allow_html=True)
 
+    # Proyeksi stockout resin: konsumsi jadwal/forecast x GROSS vs saldo + incoming
+    show_stockout_ranking("resin", "Proyeksi Stockout Resin (Days of Cover)", item_label="Material", unit="(Kg)")
+
     # -----------------------------
     # DATA TABLE DENGAN WARNA (PANDAS STYLER)
     # -----------------------------
@@ -312,9 +294,11 @@ else:
         return f'background-color: {color}; color: {font_color}; font-weight: bold; border-radius: 4px; text-align: center;'
 
     # Apply style ke dataframe
+    prof.mark("style")
     styled_df = snapshot[present_cols].sort_values(["TYPE","GRADE","COLOR"]).style.map(highlight_status, subset=['STATUS'])
     
     # Render Dataframe
+    prof.mark("render")
     st.dataframe(
         styled_df, 
         use_container_width=True, 
@@ -335,48 +319,89 @@ else:
         res = supabase.table("BON_MATERIAL").select("*").order("NO_BON", desc=True).execute()
         return pd.DataFrame(res.data)
 
+    prof.mark("fetch_bon")
     df_bon = load_bon_data()
+    prof.mark("render_bon")
     if df_bon.empty:
         st.info("Belum ada data permintaan material dari Injection.")
     else:
         # show BON table
         st.dataframe(df_bon[["NO_BON","TYPE","GRADE","COLOR","QTY","REQUESTER","STATUS","APPROVED_AT"]], use_container_width=True)
 
-        # actions: approve / reject with insertion to material_out
-        pending = df_bon[df_bon["STATUS"] == "Menunggu Konfirmasi"]
+        # actions: approve / reject batch (checkbox), stok dicek sekaligus terhadap snapshot
+        pending = df_bon[df_bon["STATUS"] == bon_service.STATUS_PENDING]
         if not pending.empty:
             st.markdown("#### 🔧 Konfirmasi Permintaan Material")
-            for i, row in pending.iterrows():
-                with st.container():
-                    r1, r2, r3, r4 = st.columns([2,3,1,1])
-                    with r1:
-                        st.write(f"**No BON:** {row['NO_BON']}")
-                        st.write(f"{row['TYPE']} | {row['GRADE']} | {row['COLOR']}")
-                    with r2:
-                        st.write(f"Requester: {row.get('REQUESTER','-')} — Qty: {row['QTY']}")
-                    with r3:
-                        if st.button(f"✅ Approve {row['NO_BON']}", key=f"approve_{i}"):
-                            now_iso = datetime.now().isoformat()
-                            # update BON
-                            supabase.table("BON_MATERIAL").update({"STATUS":"Disetujui","APPROVED_AT":now_iso}).eq("NO_BON",row["NO_BON"]).execute()
-                            # insert material_out
-                            supabase.table("material_out").insert({
-                                "type_material": row["TYPE"],
-                                "grade_material": row["GRADE"],
-                                "color_material": row["COLOR"],
-                                "qty": int(row["QTY"]),
-                                "created_at": now_iso,
-                                "prepared_by": row.get("REQUESTER","system")
-                            }).execute()
-                            st.success(f"BON {row['NO_BON']} disetujui. Material keluar tercatat.")
-                            st.experimental_rerun()
-                    with r4:
-                        if st.button(f"❌ Tolak {row['NO_BON']}", key=f"reject_{i}"):
-                            now_iso = datetime.now().isoformat()
-                            supabase.table("BON_MATERIAL").update({"STATUS":"Ditolak","APPROVED_AT": now_iso}).eq("NO_BON", row["NO_BON"]).execute()
-                            st.warning(f"BON {row['NO_BON']} ditolak.")
-                            st.experimental_rerun()
+            # Saldo per material_id_unique dari snapshot (sebelum filter search/status)
+            stock_by_key = pd.Series(balance.to_numpy(), index=dim.attributes(balance.index)["material_id_unique"].to_numpy())
+
+            df_pick = pending[["NO_BON","TYPE","GRADE","COLOR","QTY","REQUESTER"]].copy()
+            df_pick.insert(0, "PILIH", False)
+            df_pick = st.data_editor(
+                df_pick,
+                use_container_width=True,
+                hide_index=True,
+                disabled=[c for c in df_pick.columns if c != "PILIH"],
+                column_config={"PILIH": st.column_config.CheckboxColumn("Pilih", default=False)},
+                key="bon_batch_editor",
+            )
+            selected = df_pick.loc[df_pick["PILIH"], "NO_BON"].tolist()
+
+            # Validasi stok semua BON terpilih sekaligus (qty kumulatif per material, BON lama duluan)
+            check = bon_service.validate_bon_stock(pending[pending["NO_BON"].isin(selected)], stock_by_key)
+            short = check[~check["ok"]]
+            if not short.empty:
+                st.error(f"{len(short)} BON melebihi stok snapshot:")
+                st.dataframe(
+                    short[["NO_BON","TYPE","GRADE","COLOR","QTY","stock","remaining"]],
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={
+                        "stock": st.column_config.NumberColumn("Stok", format="%.1f"),
+                        "remaining": st.column_config.NumberColumn("Sisa Setelah BON", format="%.1f"),
+                    },
+                )
+
+            b1, b2, b3 = st.columns([1,1,2])
+            with b3:
+                allow_minus = st.checkbox("Tetap approve walau stok kurang", value=False, disabled=short.empty)
+            with b1:
+                approve_clicked = st.button(f"✅ Approve {len(selected)} BON", disabled=not selected or (not short.empty and not allow_minus))
+            with b2:
+                reject_clicked = st.button(f"❌ Tolak {len(selected)} BON", disabled=not selected)
+
+            if approve_clicked:
+                try:
+                    approved = bon_service.approve_bon_batch(check["NO_BON"].tolist())
+                except Exception as e:
+                    st.error(f"Gagal approve BON: {e}")
+                else:
+                    # Refresh incremental proyeksi resin: baca material_in/out setelah watermark (termasuk material_out BON ini)
+                    # + outstanding PO terbaru; bukan rebuild penuh, tapi juga tidak terbatas ke material BON terpilih
+                    moved = check[check["NO_BON"].astype(str).isin([str(n) for n in approved])]
+                    try:
+                        projection_service.refresh_projection(projection_service.KIND_RESIN)
+                    except Exception as e:
+                        print(f"[monitor_material] refresh proyeksi resin gagal: {e}")
+                    st.session_state["bon_batch_result"] = (
+                        f"{len(approved)} BON disetujui, {moved['material_id_unique'].nunique()} material terupdate. Material keluar tercatat."
+                    )
+                    st.rerun()
+
+            if reject_clicked:
+                try:
+                    rejected = bon_service.reject_bon_batch(selected)
+                except Exception as e:
+                    st.error(f"Gagal menolak BON: {e}")
+                else:
+                    st.session_state["bon_batch_result"] = f"{len(rejected)} BON ditolak."
+                    st.rerun()
+
+        if "bon_batch_result" in st.session_state:
+            st.success(st.session_state.pop("bon_batch_result"))
 
 # auto refresh on button
 if refresh_btn:
-    st.experimental_rerun()
\ No newline at end of file
+    st.experimental_rerun()
+
+prof.finish()
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from supabase_client import get_supabase
+from components.stockout_panel import show_stockout_ranking
 
 # -----------------------------------------------------------------------------
 # 1. KONFIGURASI HALAMAN
@@ -236,6 +237,9 @@ if not final_display.empty:
 # -----------------------------------------------------------------------------
 # 7. KPI & TABLE RENDER
 # -----------------------------------------------------------------------------
+# Proyeksi part (saldo FG + WIP vs forecast & jadwal injection), urut urgensi
+show_stockout_ranking("fg", "Proyeksi Stockout FG + WIP (Days of Cover)", item_label="Part No", unit="(pcs)")
+
 if not final_display.empty:
     total_part = len(final_display)
     bal_col = final_display['BAL'] if 'BAL' in final_display.columns else pd.Series([0]*len(final_display))
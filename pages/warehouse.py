@@ -227,7 +227,15 @@ draw_wh_card(
     is_active=True 
 )
 
-# Kolom 2 dan 3 di baris ini dibiarkan kosong untuk saat ini
+# 8. LOT TRACEABILITY
+draw_wh_card(
+    row3_col2, "Lot Traceability", "🔎", 
+    "Trace lot material ke produksi & pengiriman.", 
+    "pages/lot_trace.py", 
+    is_active=True 
+)
+
+# Kolom 3 di baris ini dibiarkan kosong untuk saat ini
 # Bisa dipakai untuk menu masa depan
 
 st.markdown("<br><br>", unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pandas as pd
+
+from supabase_client import LazyClient
+from utils.material_key import LIST_MATERIAL_COLS, material_key
+
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
+
+STATUS_PENDING = "Menunggu Konfirmasi"
+STATUS_APPROVED = "Disetujui"
+STATUS_REJECTED = "Ditolak"
+
+
+def validate_bon_stock(df_bon, stock):
+    """
+    Cek stok untuk sekumpulan BON sekaligus. Qty BON di-akumulasi per material (urut NO_BON, BON lama dapat stok duluan)
+    lalu dibanding saldo snapshot. stock: Series saldo per material_id_unique.
+    Return salinan df_bon + material_id_unique, stock, cum_qty, remaining, ok.
+    """
+    df = df_bon.sort_values("NO_BON").copy()
+    df["material_id_unique"] = material_key(df, LIST_MATERIAL_COLS).to_numpy()
+    qty = pd.to_numeric(df["QTY"], errors="coerce").fillna(0)
+    df["cum_qty"] = qty.groupby(df["material_id_unique"]).cumsum()
+    df["stock"] = stock.reindex(df["material_id_unique"]).fillna(0).to_numpy()
+    df["remaining"] = df["stock"] - df["cum_qty"]
+    df["ok"] = df["remaining"] >= 0
+    return df
+
+
+def approve_bon_batch(no_bons, approved_at=None):
+    """
+    Approve BON terpilih: insert material_out + update status dalam SATU transaksi (fungsi approve_bon_batch,
+    sql/approve_bon_batch.sql). Return list NO_BON yang disetujui (yang sudah diproses user lain di-skip).
+    """
+    if not no_bons:
+        return []
+    approved_at = (approved_at or datetime.now()).isoformat()
+    res = supabase.rpc("approve_bon_batch", {"p_no_bon": [str(n) for n in no_bons], "p_approved_at": approved_at}).execute()
+    return [r if isinstance(r, str) else next(iter(r.values())) for r in res.data or []]
+
+
+def reject_bon_batch(no_bons, rejected_at=None):
+    """Tolak BON terpilih dengan satu request update. Return list NO_BON yang ditolak."""
+    if not no_bons:
+        return []
+    rejected_at = (rejected_at or datetime.now()).isoformat()
+    res = supabase.table("BON_MATERIAL")\
+        .update({"STATUS": STATUS_REJECTED, "APPROVED_AT": rejected_at})\
+        .in_("NO_BON", list(no_bons))\
+        .eq("STATUS", STATUS_PENDING)\
+        .execute()
+    return [r["NO_BON"] for r in res.data or []]
@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from supabase_client import LazyClient
+from utils.work_calendar import (
+    DEFAULT_SHIFT_HOURS,
+    day_hours,
+    hours_per_day_type,
+    machine_day_hours,
+    monthly_totals,
+    normalize_shift_table,
+)
+
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
+
+
+def use_client(client):
+    """supabase.use(client) + buang cache jam kapasitas bulanan dari client lama."""
+    supabase.use(client)
+    clear_cache()
+
+
+CACHE_TTL_SEC = 3600
+_month_cache = {}
+
+
+def get_shift_table():
+    """Ambil table SHIFT (kolom lowercase, day_type UPPER)."""
+    res = supabase.table("SHIFT").select("*").execute()
+    return normalize_shift_table(pd.DataFrame(res.data if hasattr(res, "data") else res))
+
+
+def get_holidays(start_date, end_date):
+    """Ambil tanggal libur dari table holiday di rentang [start_date, end_date]. Kosong kalau table belum ada."""
+    try:
+        res = (
+            supabase.table("holiday")
+            .select("date")
+            .gte("date", str(start_date))
+            .lte("date", str(end_date))
+            .execute()
+        )
+    except Exception as e:
+        print(f"[calendar_service] holiday tidak bisa dibaca: {e}")
+        return pd.DatetimeIndex([])
+    return pd.DatetimeIndex(pd.to_datetime([r["date"] for r in res.data or []], errors="coerce")).dropna()
+
+
+def _month_dates(ym):
+    start = pd.Timestamp(f"{ym}-01")
+    return pd.date_range(start, start + pd.offsets.MonthEnd(0), freq="D")
+
+
+def get_month_day_hours(ym, default_shift_hours=DEFAULT_SHIFT_HOURS):
+    """
+    Jam kerja per tanggal untuk satu bulan 'YYYY-MM' dari SHIFT + holiday.
+    Di-cache per bulan (TTL CACHE_TTL_SEC), return (DatetimeIndex, array jam).
+    """
+    key = (ym, float(default_shift_hours))
+    hit = _month_cache.get(key)
+    if hit and time.time() - hit[0] < CACHE_TTL_SEC:
+        return hit[1], hit[2]
+
+    dates = _month_dates(ym)
+    hours = day_hours(
+        dates,
+        hours_per_day_type(get_shift_table(), default_shift_hours),
+        get_holidays(dates[0].date(), dates[-1].date()),
+    )
+    _month_cache[key] = (time.time(), dates, hours)
+    return dates, hours
+
+
+def get_day_hours(start_date, days, default_shift_hours=DEFAULT_SHIFT_HOURS):
+    """Jam kerja per tanggal untuk N hari mulai start_date (gabungan cache bulanan)."""
+    start = pd.Timestamp(start_date).normalize()
+    end = start + pd.Timedelta(days=days - 1)
+    months = pd.period_range(start, end, freq="M").strftime("%Y-%m")
+
+    parts = [get_month_day_hours(ym, default_shift_hours) for ym in months]
+    dates = pd.DatetimeIndex(np.concatenate([d.to_numpy() for d, _ in parts]))
+    hours = np.concatenate([h for _, h in parts])
+    mask = (dates >= start) & (dates <= end)
+    return dates[mask], hours[mask]
+
+
+def get_holidays_for_window(start_date, days):
+    """Tanggal libur untuk N hari mulai start_date."""
+    start = pd.Timestamp(start_date).normalize()
+    return get_holidays(start.date(), (start + pd.Timedelta(days=days - 1)).date())
+
+
+def get_monthly_capacity_hours(start_ym, months, availability, default_shift_hours=DEFAULT_SHIFT_HOURS):
+    """
+    Jam kerja tersedia per mesin per bulan: [mesin x bulan] dalam satu operasi array.
+    availability: array per mesin (1 aktif, 0 non-aktif, atau jumlah mesin per kelas tonase).
+    Return DataFrame index = urutan availability, kolom = 'YYYY-MM'.
+    """
+    start = pd.Timestamp(f"{start_ym}-01")
+    days = (start + pd.DateOffset(months=months) - start).days
+    dates, hours = get_day_hours(start, days, default_shift_hours)
+    periods, totals = monthly_totals(dates, machine_day_hours(availability, hours))
+    return pd.DataFrame(totals, columns=periods)
+
+
+def clear_cache():
+    _month_cache.clear()
@@ -1,26 +1,46 @@
+import numpy as np
+import pandas as pd
+
 from utils.calculator import output_per_hour, required_hours, required_days
 
-def calculate_part_capacity(forecast_row, master_row, rules, working_days):
-    ct = master_row["cycle_time"]
-    cav = master_row["cavity"]
-    tonage = master_row["tonage"]
-    qty = forecast_row["forecast_qty"]
+MASTER_COLUMNS = ["part_no", "part_name", "cycle_time", "cavity", "tonage"]
+CAPACITY_COLUMNS = [
+    "part_no", "part_name", "tonage", "forecast_qty", "cycle_time", "cavity",
+    "output_per_hour", "required_hours", "required_days",
+]
+
+
+def _master_frame(master):
+    """Terima master_map (dict part_no -> row, dari get_master_map) atau DataFrame, return DataFrame MASTER_COLUMNS."""
+    if isinstance(master, dict):
+        master = pd.DataFrame.from_dict(master, orient="index")
+    df = master.reset_index(drop=True)
+    for col in MASTER_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+    return df[MASTER_COLUMNS]
+
+
+def calculate_capacity_batch(df_forecast, master, rules, working_days=None):
+    """
+    Hitung kapasitas SEMUA part sekaligus.
+    df_forecast: DataFrame [part_no, forecast_qty]; master: master_map atau DataFrame.
+    Return DataFrame CAPACITY_COLUMNS (part tanpa master ikut dengan cycle_time NaN -> output 0).
+    """
+    df = df_forecast[["part_no", "forecast_qty"]].merge(_master_frame(master), on="part_no", how="left")
 
     eff = rules["efficiency"]
     eff_hours_day = rules["shift_hours"] * rules["shift_per_day"] * rules["efficiency"]
 
-    out_hr = output_per_hour(ct, cav, eff)
-    req_hr = required_hours(qty, out_hr)
-    req_days = required_days(req_hr, eff_hours_day)
-
-    return {
-        "part_no": forecast_row["part_no"],
-        "part_name": master_row["part_name"],
-        "tonage": tonage,
-        "forecast_qty": qty,
-        "cycle_time": ct,
-        "cavity": cav,
-        "output_per_hour": out_hr,
-        "required_hours": req_hr,
-        "required_days": req_days,
-    }
+    # Versi array utils.calculator: CT 0/kosong -> output 0, output 0 -> jam 0, jam/hari 0 -> hari 0
+    df["output_per_hour"] = output_per_hour(df["cycle_time"], df["cavity"], eff)
+    df["required_hours"] = required_hours(df["forecast_qty"], df["output_per_hour"])
+    df["required_days"] = required_days(df["required_hours"], eff_hours_day)
+    return df[CAPACITY_COLUMNS]
+
+
+def calculate_part_capacity(forecast_row, master_row, rules, working_days):
+    """Versi satu part (wrapper tipis di atas calculate_capacity_batch)."""
+    df_fc = pd.DataFrame([{"part_no": forecast_row["part_no"], "forecast_qty": forecast_row["forecast_qty"]}])
+    df_mst = pd.DataFrame([{**master_row, "part_no": forecast_row["part_no"]}])
+    return calculate_capacity_batch(df_fc, df_mst, rules, working_days).iloc[0].to_dict()
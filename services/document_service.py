@@ -0,0 +1,159 @@
+"""
+Render dokumen PDF (bukti material out, surat jalan) di memory, tanpa file di working directory.
+
+Template = fungsi yang menggambar SATU dokumen ke halaman baru; batch banyak dokumen = satu FPDF multi-halaman
+(setup font & page sekali per batch). Metrik core font (Arial) sudah dimuat sekali per process oleh fpdf; yang
+di-cache di sini adalah hasil render: dokumen yang sama (mis. download ulang / rerun) tidak dirender lagi.
+submit_render() menjalankan render di worker thread supaya submit form langsung kembali; hasilnya diambil dari
+Future saat halaman butuh tombol download.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+from fpdf import FPDF
+
+KIND_MATERIAL_OUT = "material_out"
+KIND_DELIVERY = "delivery"
+
+COMPANY = "PT. SHIN SAM PLUS INDUSTRY"
+
+RENDER_CACHE_SIZE = 32  # jumlah PDF terakhir yang disimpan (bytes) per process
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf")
+_rendered = OrderedDict()
+_rendered_lock = threading.Lock()
+
+
+def _fmt_date(value, fmt="%d-%b-%Y"):
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    if isinstance(value, (date, datetime)):
+        return value.strftime(fmt)
+    return "-"
+
+
+def _text(value):
+    # Core font FPDF cuma latin-1: karakter lain diganti '?' daripada render gagal
+    return str("" if value is None else value).encode("latin-1", "replace").decode("latin-1")
+
+
+def _draw_material_out(pdf, doc):
+    """doc: satu baris material_out (type_material, grade_material, color_material, qty, uom, lot_no, ...)."""
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, "BUKTI PENGELUARAN MATERIAL", ln=True, align="C")
+    pdf.ln(5)
+
+    pdf.set_font("Arial", size=10)
+    pdf.cell(0, 6, f"Created: {_fmt_date(doc.get('created_at') or datetime.now(), '%Y-%m-%d %H:%M')}", ln=True)
+    y = pdf.get_y() + 2
+    pdf.line(10, y, 200, y)
+    pdf.ln(10)
+
+    fields = [
+        ("Material", f"{doc.get('type_material', '')} {doc.get('grade_material', '')}"),
+        ("Color", doc.get("color_material")),
+        ("Quantity", f"{doc.get('qty', '')} {doc.get('uom') or ''}"),
+        ("Lot Number", doc.get("lot_no")),
+        ("Line / Shift", f"{doc.get('line_production') or '-'} / {doc.get('shift') or '-'}"),
+        ("No SPK", doc.get("no_spk")),
+        ("PIC", doc.get("pic_material")),
+        ("Tanggal", f"{_fmt_date(doc.get('date'))} {doc.get('waktu') or ''}"),
+    ]
+    pdf.set_font("Arial", size=12)
+    for label, value in fields:
+        pdf.cell(40, 8, label, 0, 0)
+        pdf.cell(5, 8, ":", 0, 0)
+        pdf.cell(0, 8, _text(value), 0, 1)
+
+
+def _draw_delivery(pdf, doc):
+    """doc: header surat jalan (NO_DELIVERY, NO_PO, CUSTOMER, DATE_DELIVERY, PREPARED_BY) + PARTS [(part_no, part_name, qty)]."""
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 8, COMPANY, ln=True, align="C")
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(0, 7, "SURAT JALAN PENGIRIMAN BARANG (FINISH GOOD)", ln=True, align="C")
+    pdf.ln(6)
+
+    pdf.set_font("Arial", size=11)
+    pdf.cell(100, 7, _text(f"No. Delivery : {doc['NO_DELIVERY']}"), ln=0)
+    pdf.cell(0, 7, _text(f"No. PO : {doc.get('NO_PO', '')}"), ln=1)
+    pdf.cell(100, 7, _text(f"Customer     : {doc.get('CUSTOMER', '')}"), ln=0)
+    pdf.cell(0, 7, f"Tanggal : {_fmt_date(doc.get('DATE_DELIVERY'))}", ln=1)
+    pdf.cell(0, 7, _text(f"Prepared By  : {doc.get('PREPARED_BY', '')}"), ln=1)
+    pdf.ln(6)
+
+    # Table header
+    pdf.set_font("Arial", "B", 11)
+    pdf.cell(10, 8, "No", border=1, align="C")
+    pdf.cell(40, 8, "Part No", border=1, align="C")
+    pdf.cell(90, 8, "Part Name", border=1, align="C")
+    pdf.cell(30, 8, "Qty", border=1, align="C")
+    pdf.ln()
+
+    pdf.set_font("Arial", size=11)
+    for i, (pno, pname, qty) in enumerate(doc["PARTS"], start=1):
+        pdf.cell(10, 8, str(i), border=1, align="C")
+        pdf.cell(40, 8, _text(pno), border=1)
+        x_pos = pdf.get_x()
+        y_pos = pdf.get_y()
+        pdf.multi_cell(90, 8, _text(pname), border=1)
+        new_y = pdf.get_y()
+        pdf.set_xy(x_pos + 90, y_pos)
+        pdf.cell(30, 8, f"{int(qty):,}", border=1, align="R")
+        pdf.ln()
+        if pdf.get_y() < new_y:
+            pdf.set_y(new_y)
+
+    pdf.ln(8)
+    pdf.set_font("Arial", size=11)
+    pdf.cell(0, 6, "Diterima oleh: ____________________", ln=1)
+    pdf.cell(0, 6, "Tanggal: ___________________________", ln=1)
+    pdf.cell(0, 6, "Tanda tangan: ______________________", ln=1)
+
+
+TEMPLATES = {
+    KIND_MATERIAL_OUT: _draw_material_out,
+    KIND_DELIVERY: _draw_delivery,
+}
+
+
+def _cache_key(kind, docs):
+    return kind, tuple(tuple(sorted((k, repr(v)) for k, v in d.items())) for d in docs)
+
+
+def render(kind, docs):
+    """Semua dokumen -> satu PDF (satu dokumen per halaman baru), return bytes. Hasil di-cache (LRU) per isi dokumen."""
+    key = _cache_key(kind, docs)
+    with _rendered_lock:
+        if key in _rendered:
+            _rendered.move_to_end(key)
+            return _rendered[key]
+    data = _render(kind, docs)
+    with _rendered_lock:
+        _rendered[key] = data
+        while len(_rendered) > RENDER_CACHE_SIZE:
+            _rendered.popitem(last=False)
+    return data
+
+
+def _render(kind, docs):
+    draw = TEMPLATES[kind]
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    for doc in docs:
+        pdf.add_page()
+        draw(pdf, doc)
+    s = pdf.output(dest="S")
+    if isinstance(s, str):
+        s = s.encode("latin-1")
+    return bytes(s)
+
+
+def submit_render(kind, docs):
+    """Render di worker thread; return Future[bytes]. docs disalin supaya aman diubah pemanggil."""
+    return _executor.submit(render, kind, [dict(d) for d in docs])
@@ -1,8 +1,16 @@
-print(">>> LOADING forecast_service.py FROM:", __file__)
+from datetime import date, timedelta
 
-from supabase_client import get_supabase
+import numpy as np
+import pandas as pd
 
-supabase = get_supabase()
+from supabase_client import LazyClient, fetch_all_rows
+from utils.demand_model import build_history_matrix, forecast_parts, spread_weekly_to_days
+
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
+
+MODEL_SOURCE = "model"
+MODEL_CUSTOMER = "MODEL"
+HISTORY_COLUMNS = "id, forecast_id, forecast_month, customer_name, part_no, forecast_qty_monthly, revision_no, forecast_source, created_at"
 
 def get_forecast_by_month(month):
     """Ambil forecast berdasarkan month field (ex: 'November 2025')"""
@@ -11,3 +19,214 @@ def get_forecast_by_month(month):
     if hasattr(res, "data"):
         return res.data
     return res
+
+def _history_query(columns, customer=None, month=None, revision=None, count=None):
+    query = supabase.table("forecast_monthly").select(columns, count=count)
+    if customer:
+        query = query.eq("customer_name", customer)
+    if month:
+        query = query.eq("forecast_month", month)
+    if revision is not None:
+        query = query.eq("revision_no", revision)
+    return query
+
+def get_forecast_history_page(customer=None, month=None, revision=None, cursor=None, page_size=100):
+    """
+    Satu halaman history forecast_monthly, terbaru dulu (created_at DESC, id DESC).
+    Keyset pagination: cursor = (created_at, id) baris terakhir halaman sebelumnya, None = halaman pertama.
+    Return (rows, next_cursor); next_cursor None kalau sudah halaman terakhir.
+    """
+    query = _history_query(HISTORY_COLUMNS, customer, month, revision)
+    if cursor:
+        created_at, row_id = cursor
+        query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})')
+    res = query.order("created_at", desc=True).order("id", desc=True).limit(page_size + 1).execute()
+    rows = res.data or []
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1]["created_at"], rows[-1]["id"])
+    return rows, next_cursor
+
+def count_forecast_history(customer=None, month=None, revision=None):
+    """
+    Perkiraan jumlah baris history sesuai filter, tanpa ambil datanya. count="estimated": exact selama kecil,
+    di atas batas max-rows PostgREST pakai estimasi planner (tidak full scan tiap page load).
+    """
+    res = _history_query("id", customer, month, revision, count="estimated").limit(1).execute()
+    return res.count or 0
+
+def get_forecast_filter_options():
+    """Daftar customer / bulan / revision dari tabel forecast_filter_options (dijaga trigger, sql/forecast_history.sql)."""
+    columns = ["customer_name", "forecast_month", "revision_no"]
+    rows = fetch_all_rows(
+        lambda: supabase.table("forecast_filter_options").select(", ".join(columns)),
+        unique_by=tuple(columns),
+    )
+    return pd.DataFrame(rows, columns=columns)
+
+def publish_daily_latest(daily_rows, customer_name, forecast_month, forecast_source):
+    """
+    Upsert baris forecast_daily sebuah revision ke tabel materialisasi forecast_daily_latest.
+    Dipanggil per chunk saat revision ditulis; sisa revision lama dibuang via prune_daily_latest.
+    """
+    latest_rows = [{
+        "customer_name": customer_name,
+        "part_no": r["part_no"],
+        "forecast_date": r["forecast_date"],
+        "forecast_month": forecast_month,
+        "daily_qty": r["daily_demand"],
+        "forecast_id": r["forecast_id"],
+        "revision_no": r["revision_no"],
+        "forecast_source": forecast_source,
+    } for r in daily_rows]
+    for i in range(0, len(latest_rows), 500):
+        supabase.table("forecast_daily_latest")\
+            .upsert(latest_rows[i:i + 500], on_conflict="customer_name,part_no,forecast_date")\
+            .execute()
+
+def prune_daily_latest(customer_name, forecast_month, revision_no):
+    """Hapus baris revision lama (tanggal/part yang tidak ada lagi di revision terbaru)."""
+    supabase.table("forecast_daily_latest").delete()\
+        .eq("customer_name", customer_name)\
+        .eq("forecast_month", forecast_month)\
+        .lt("revision_no", revision_no)\
+        .execute()
+
+def get_daily_forecast_matrix(part_list, start_date, days, fill_value=0.0, include_model=False):
+    """
+    Forecast harian revision terbaru sebagai matrix dense [part_no x tanggal] (days kolom mulai start_date).
+    Qty dari beberapa customer dijumlah. Sel tanpa forecast diisi fill_value (pakai np.nan untuk
+    membedakan "tidak ada forecast" dengan demand 0). Forecast model diabaikan kecuali include_model=True.
+    """
+    start = pd.Timestamp(start_date).normalize()
+    dates = pd.date_range(start, periods=days, freq="D")
+    parts = list(dict.fromkeys(part_list))
+    if not parts or days <= 0:
+        return pd.DataFrame(index=pd.Index(parts, name="part_no"), columns=dates, dtype=float)
+
+    def build_query():
+        query = supabase.table("forecast_daily_latest")\
+            .select("part_no, forecast_date, daily_qty")\
+            .in_("part_no", parts)\
+            .gte("forecast_date", dates[0].strftime("%Y-%m-%d"))\
+            .lte("forecast_date", dates[-1].strftime("%Y-%m-%d"))
+        if not include_model:
+            query = query.or_(f"forecast_source.is.null,forecast_source.neq.{MODEL_SOURCE}")
+        return query.order("part_no").order("forecast_date")
+
+    # PK forecast_daily_latest = (customer_name, part_no, forecast_date)
+    df = pd.DataFrame(fetch_all_rows(build_query, unique_by=("customer_name",)), columns=["part_no", "forecast_date", "daily_qty"])
+
+    total = np.zeros((len(parts), days))
+    seen = np.zeros((len(parts), days), dtype=bool)
+    if not df.empty:
+        row_idx = pd.Index(parts).get_indexer(df["part_no"])
+        col_idx = (pd.to_datetime(df["forecast_date"]) - start).dt.days.to_numpy()
+        qty = pd.to_numeric(df["daily_qty"], errors="coerce").fillna(0).to_numpy(dtype=float)
+        ok = (row_idx >= 0) & (col_idx >= 0) & (col_idx < days)
+        np.add.at(total, (row_idx[ok], col_idx[ok]), qty[ok])
+        seen[row_idx[ok], col_idx[ok]] = True
+
+    matrix = np.where(seen, total, fill_value)
+    return pd.DataFrame(matrix, index=pd.Index(parts, name="part_no"), columns=dates)
+
+def get_delivery_history(start_date, end_date):
+    """Ambil transaksi fg_out (part_no, qty_out, date) di rentang tanggal [start_date, end_date)."""
+    rows = fetch_all_rows(lambda: supabase.table("fg_out")
+                      .select("part_no, qty_out, date")
+                      .gte("date", str(start_date))
+                      .lt("date", str(end_date))
+                      .order("date"))
+    return pd.DataFrame(rows, columns=["part_no", "qty_out", "date"])
+
+def next_revision_number(forecast_month, customer_name):
+    """Revision berikutnya untuk forecast_month + customer (sama seperti upload manual)."""
+    res = supabase.table("forecast_monthly").select("revision_no")\
+        .eq("forecast_month", forecast_month)\
+        .eq("customer_name", customer_name)\
+        .order("revision_no", desc=True).limit(1).execute()
+    if res.data:
+        return int(res.data[0].get("revision_no") or 0) + 1
+    return 1
+
+def generate_model_forecast(history_weeks=52, horizon_weeks=8, customer_name=MODEL_CUSTOMER, created_by=None, today=None):
+    """
+    Fit model statistik (SES / Croston) untuk semua part dari history delivery fg_out, lalu tulis forecast
+    mulai besok sebagai revision baru dengan forecast_source="model". Horizon N minggu diperpanjang sampai akhir
+    bulan terakhirnya; hanya bulan yang tercakup PENUH (tgl 1 s/d akhir bulan) yang ditulis, supaya revision
+    MDL-{bulan} tidak menimpa hari yang sudah lewat / belum dihitung. Return ringkasan per bulan yang ditulis.
+    """
+    today = today or date.today()
+    # minggu history dihitung penuh (Senin - Minggu), minggu berjalan tidak ikut
+    this_monday = today - timedelta(days=today.weekday())
+    hist_start = this_monday - timedelta(weeks=history_weeks)
+
+    df_hist = get_delivery_history(hist_start, this_monday)
+    parts, history = build_history_matrix(df_hist, hist_start, history_weeks)
+    if len(parts) == 0:
+        return []
+
+    start = pd.Timestamp(today) + pd.Timedelta(days=1)
+    end = (start + pd.Timedelta(weeks=horizon_weeks, days=-1)).to_period("M").end_time.normalize()
+    # model mingguan mulai minggu berjalan (Senin); hari sampai hari ini dibuang setelah spread ke harian
+    n_weeks = -(-((end - pd.Timestamp(this_monday)).days + 1) // 7)
+
+    result = forecast_parts(history, n_weeks)
+    daily = spread_weekly_to_days(result["forecast"])
+    horizon_dates = pd.date_range(this_monday, periods=daily.shape[1], freq="D")
+    in_horizon = (horizon_dates >= start) & (horizon_dates <= end)
+    daily, horizon_dates = daily[:, in_horizon], horizon_dates[in_horizon]
+    months = horizon_dates.strftime("%Y-%m").to_numpy()
+
+    notes = np.array([
+        f"{m} | 95% PI/minggu: {lo:,.0f} - {hi:,.0f}"
+        for m, lo, hi in zip(result["method"], result["lower"][:, 0], result["upper"][:, 0])
+    ], dtype=object)
+
+    summary = []
+    for forecast_month in pd.unique(months):
+        in_month = months == forecast_month
+        if in_month.sum() < horizon_dates[in_month][0].days_in_month:
+            continue  # bulan parsial (bulan berjalan): tidak dijadikan revision
+        qty_month = daily[:, in_month]
+        keep = qty_month.sum(axis=1) > 0
+        if not keep.any():
+            continue
+
+        revision_no = next_revision_number(forecast_month, customer_name)
+        forecast_id = f"MDL-{forecast_month}-R{revision_no}"
+        month_dates = horizon_dates[in_month].strftime("%Y-%m-%d").to_numpy()
+
+        monthly_rows = [{
+            "forecast_id": forecast_id,
+            "forecast_month": forecast_month,
+            "upload_date": str(today),
+            "forecast_source": MODEL_SOURCE,
+            "customer_name": customer_name,
+            "part_no": part_no,
+            "forecast_qty_monthly": int(q),
+            "revision_no": revision_no,
+            "min_days": 2.0,
+            "note": note,
+            "created_by": created_by
+        } for part_no, q, note in zip(parts[keep], qty_month[keep].sum(axis=1), notes[keep])]
+        supabase.table("forecast_monthly").insert(monthly_rows).execute()
+
+        idx_part, idx_day = np.nonzero(qty_month > 0)
+        daily_rows = [{
+            "forecast_id": forecast_id,
+            "part_no": parts[p],
+            "forecast_date": month_dates[d],
+            "daily_demand": int(qty_month[p, d]),
+            "revision_no": revision_no
+        } for p, d in zip(idx_part, idx_day)]
+        for i in range(0, len(daily_rows), 500):
+            supabase.table("forecast_daily").insert(daily_rows[i:i + 500]).execute()
+        publish_daily_latest(daily_rows, customer_name, forecast_month, MODEL_SOURCE)
+        prune_daily_latest(customer_name, forecast_month, revision_no)
+
+        summary.append({"forecast_id": forecast_id, "forecast_month": forecast_month,
+                        "parts": int(keep.sum()), "daily_entries": len(daily_rows)})
+    return summary
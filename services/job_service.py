@@ -0,0 +1,306 @@
+"""
+Job queue lokal (SQLite) untuk report berat (kapasitas, material).
+
+Page cukup submit job lalu polling statusnya; perhitungan jalan di worker process terpisah
+(python -m services.job_service --worker). Job dengan kind + params + input version yang sama
+hanya dihitung sekali dan hasilnya dipakai bareng semua user.
+"""
+import hashlib
+import importlib
+import json
+import os
+import pickle
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import traceback
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOB_DB_PATH = os.environ.get("PPIC_JOB_DB", os.path.join(ROOT_DIR, ".jobs", "jobs.sqlite3"))
+
+HEARTBEAT_SEC = 5
+WORKER_STALE_SEC = 30
+POLL_SEC = 1.0
+JOB_RETENTION_SEC = 7 * 24 * 3600
+
+# kind -> "module:function". Function dipanggil dengan **params, return value di-pickle.
+JOB_KINDS = {
+    "capacity_cube": "pages.data_loader:capacity_cube_job",
+    "material_report": "pages.data_loader_material:calculate_material_report",
+}
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+_SCHEMA = """
+create table if not exists jobs (
+    id integer primary key autoincrement,
+    job_key text unique not null,
+    kind text not null,
+    params text not null,
+    params_key text not null,
+    input_version text,
+    status text not null,
+    result blob,
+    error text,
+    worker_pid integer,
+    created_at real not null,
+    started_at real,
+    finished_at real
+);
+create index if not exists idx_jobs_status on jobs (status, id);
+create index if not exists idx_jobs_params on jobs (kind, params_key, status, finished_at);
+create table if not exists workers (
+    pid integer primary key,
+    heartbeat_at real not null
+);
+"""
+
+
+def _connect():
+    os.makedirs(os.path.dirname(JOB_DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(JOB_DB_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("pragma journal_mode=wal")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _params_key(kind, params):
+    return hashlib.sha1(f"{kind}|{json.dumps(params, sort_keys=True, default=str)}".encode()).hexdigest()
+
+
+def job_key(kind, params, input_version=None):
+    """Key unik job = hash(kind, params, input_version)."""
+    return hashlib.sha1(f"{_params_key(kind, params)}|{input_version}".encode()).hexdigest()
+
+
+def submit(kind, params, input_version=None):
+    """
+    Enqueue job kalau belum ada (atau sebelumnya gagal). Aman dipanggil berkali-kali / dari banyak user:
+    job yang sama cuma masuk antrian sekali. Return job_key.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Job kind tidak dikenal: {kind}")
+    key = job_key(kind, params, input_version)
+    conn = _connect()
+    try:
+        conn.execute(
+            "insert or ignore into jobs (job_key, kind, params, params_key, input_version, status, created_at) "
+            "values (?, ?, ?, ?, ?, ?, ?)",
+            (key, kind, json.dumps(params, default=str), _params_key(kind, params), input_version, STATUS_QUEUED, time.time()),
+        )
+        conn.execute(
+            "update jobs set status = ?, error = null, created_at = ? where job_key = ? and status = ?",
+            (STATUS_QUEUED, time.time(), key, STATUS_FAILED),
+        )
+    finally:
+        conn.close()
+    return key
+
+
+def _row_to_job(row, with_result=True):
+    if row is None:
+        return None
+    job = {k: row[k] for k in row.keys() if k != "result"}
+    job["params"] = json.loads(job["params"])
+    job["result"] = pickle.loads(row["result"]) if with_result and row["result"] is not None else None
+    return job
+
+
+def get_job(key, with_result=True):
+    """Status job (dict) termasuk result kalau sudah done. None kalau key tidak ada."""
+    conn = _connect()
+    try:
+        row = conn.execute("select * from jobs where job_key = ?", (key,)).fetchone()
+    finally:
+        conn.close()
+    return _row_to_job(row, with_result)
+
+
+def get_latest_result(kind, params):
+    """Hasil job DONE terbaru untuk kind + params (versi input apa pun), buat ditampilkan selama versi baru dihitung."""
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "select * from jobs where kind = ? and params_key = ? and status = ? order by finished_at desc limit 1",
+            (kind, _params_key(kind, params), STATUS_DONE),
+        ).fetchone()
+    finally:
+        conn.close()
+    return _row_to_job(row)
+
+
+def request(kind, params, input_version=None, start_worker=True):
+    """
+    Helper buat page: submit job (idempotent), pastikan worker hidup, lalu return
+    (job saat ini, hasil terakhir yang tersedia atau None). Tidak pernah menunggu perhitungan.
+    """
+    key = submit(kind, params, input_version)
+    if start_worker:
+        ensure_worker()
+    job = get_job(key)
+    if job and job["status"] == STATUS_DONE:
+        return job, job["result"]
+    latest = get_latest_result(kind, params)
+    return job, (latest["result"] if latest else None)
+
+
+# =========================================================================
+# WORKER
+# =========================================================================
+
+def _heartbeat(conn, pid):
+    conn.execute("insert or replace into workers (pid, heartbeat_at) values (?, ?)", (pid, time.time()))
+
+
+def _requeue_orphans(conn):
+    """Job RUNNING yang worker-nya sudah mati (heartbeat basi) dikembalikan ke antrian."""
+    conn.execute(
+        "update jobs set status = ?, worker_pid = null where status = ? and worker_pid not in "
+        "(select pid from workers where heartbeat_at >= ?)",
+        (STATUS_QUEUED, STATUS_RUNNING, time.time() - WORKER_STALE_SEC),
+    )
+
+
+def _claim_next(conn, pid):
+    conn.execute("begin immediate")
+    try:
+        row = conn.execute("select * from jobs where status = ? order by id limit 1", (STATUS_QUEUED,)).fetchone()
+        if row is not None:
+            conn.execute(
+                "update jobs set status = ?, worker_pid = ?, started_at = ? where id = ?",
+                (STATUS_RUNNING, pid, time.time(), row["id"]),
+            )
+        conn.execute("commit")
+    except Exception:
+        conn.execute("rollback")
+        raise
+    return _row_to_job(row, with_result=False)
+
+
+def _resolve(kind):
+    module_name, func_name = JOB_KINDS[kind].split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def run_job(job):
+    """Jalankan satu job dan simpan hasil/error-nya."""
+    conn = _connect()
+    try:
+        try:
+            result = _resolve(job["kind"])(**job["params"])
+            conn.execute(
+                "update jobs set status = ?, result = ?, finished_at = ? where id = ?",
+                (STATUS_DONE, pickle.dumps(result), time.time(), job["id"]),
+            )
+        except Exception as e:
+            print(f"[job_service] job {job['kind']} gagal: {e}")
+            conn.execute(
+                "update jobs set status = ?, error = ?, finished_at = ? where id = ?",
+                (STATUS_FAILED, traceback.format_exc(), time.time(), job["id"]),
+            )
+    finally:
+        conn.close()
+
+
+def _heartbeat_loop(pid, stop):
+    """Heartbeat di thread terpisah supaya job lama (> WORKER_STALE_SEC) tidak dianggap worker mati."""
+    conn = _connect()
+    try:
+        while not stop.wait(HEARTBEAT_SEC):
+            _heartbeat(conn, pid)
+            _requeue_orphans(conn)
+            conn.execute(
+                "delete from jobs where finished_at < ? and id not in "
+                "(select max(id) from jobs where status = ? group by kind, params_key)",
+                (time.time() - JOB_RETENTION_SEC, STATUS_DONE),
+            )
+    finally:
+        conn.close()
+
+
+def run_worker(poll_sec=POLL_SEC, idle_exit_sec=None):
+    """Loop worker: ambil job QUEUED satu per satu. idle_exit_sec=None artinya jalan terus."""
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    pid = os.getpid()
+    print(f"[job_service] worker {pid} start, db={JOB_DB_PATH}", flush=True)
+    conn = _connect()
+    _heartbeat(conn, pid)
+    _requeue_orphans(conn)
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat_loop, args=(pid, stop), daemon=True)
+    beat.start()
+    idle_since = time.time()
+    try:
+        while True:
+            job = _claim_next(conn, pid)
+            if job is None:
+                if idle_exit_sec is not None and time.time() - idle_since > idle_exit_sec:
+                    break
+                time.sleep(poll_sec)
+                continue
+
+            print(f"[job_service] run {job['kind']} {job['params']} (v={job['input_version']})", flush=True)
+            run_job(job)
+            idle_since = time.time()
+    finally:
+        stop.set()
+        beat.join()
+        conn.execute("delete from workers where pid = ?", (pid,))
+        conn.close()
+
+
+def worker_alive():
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "select count(*) from workers where heartbeat_at >= ?", (time.time() - WORKER_STALE_SEC,)
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0] > 0
+
+
+def ensure_worker():
+    """Start worker background kalau belum ada yang hidup (dicek dari heartbeat). Return True kalau baru di-start."""
+    if worker_alive():
+        return False
+    conn = _connect()
+    try:
+        # Reservasi slot worker dulu biar dua page yang render bareng tidak spawn dua worker
+        conn.execute("begin immediate")
+        alive = conn.execute(
+            "select count(*) from workers where heartbeat_at >= ?", (time.time() - WORKER_STALE_SEC,)
+        ).fetchone()[0]
+        if alive:
+            conn.execute("commit")
+            return False
+        with open(os.path.join(os.path.dirname(JOB_DB_PATH), "worker.log"), "a") as log:
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "services.job_service", "--worker"],
+                cwd=ROOT_DIR,
+                start_new_session=True,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        _heartbeat(conn, proc.pid)
+        conn.execute("commit")
+        return True
+    except Exception:
+        conn.execute("rollback")
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    if "--worker" in sys.argv:
+        run_worker()
+    else:
+        print("Usage: python -m services.job_service --worker")
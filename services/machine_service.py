@@ -1,17 +1,69 @@
-from supabase_client import get_supabase
+import re
 
-supabase = get_supabase()
+import pandas as pd
+
+from supabase_client import LazyClient
+
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
 
 def get_machines_by_tonage(tonage):
     """
     Ambil semua mesin dari table INFO.machine berdasarkan TONAGE.
     Return: list of machine_id (ex: ['MC 450T-1', 'MC 450T-2'])
+    Untuk banyak tonase sekaligus pakai get_machines_grouped_by_tonage (1 query).
     """
-    res = supabase.table("machine").select("*").eq("tonage", tonage).order("machine_id").execute()
+    return get_machines_grouped_by_tonage(active_only=False).get(parse_tonage(tonage), [])
+
+def parse_tonage(value):
+    """Ambil angka tonase dari format campur ('250T', '250 T', 250, '1500.0') -> float, None kalau tidak valid."""
+    if value is None:
+        return None
+    match = re.search(r"\d+(?:\.\d+)?", str(value))
+    return float(match.group()) if match else None
+
+def tonage_label(value):
+    """Label tonase standar, ex: 250 -> '250T' (dipakai untuk join MASTER.TONAGE dengan table machine)."""
+    ton = parse_tonage(value)
+    if ton is None:
+        return None
+    return f"{int(ton)}T" if ton.is_integer() else f"{ton}T"
+
+def get_machine_table(active_only=True):
+    """
+    Ambil table machine sebagai DataFrame (kolom lowercase) + kolom 'tonage' numerik & 'tonage_label'.
+    Kolom tonase di DB bisa 'tonnage' atau 'tonage', dua-duanya didukung.
+    """
+    res = supabase.table("machine").select("*").order("machine_id").execute()
+    df = pd.DataFrame(res.data if hasattr(res, "data") else res)
+    if df.empty:
+        return pd.DataFrame(columns=["machine_id", "tonage", "tonage_label", "status"])
+
+    df.columns = [c.lower() for c in df.columns]
+    ton_col = "tonnage" if "tonnage" in df.columns else "tonage"
+    df["tonage"] = df[ton_col].map(parse_tonage)
+    df["tonage_label"] = df["tonage"].map(tonage_label)
+    if active_only and "status" in df.columns:
+        df = df[df["status"].astype(str).str.strip().str.upper() == "ACTIVE"]
+    return df.dropna(subset=["tonage"]).reset_index(drop=True)
+
+def get_machine_tonages(active_only=True):
+    """Daftar kelas tonase yang benar-benar ada + jumlah mesinnya: DataFrame [machine, n_machines]."""
+    df = get_machine_table(active_only)
+    if df.empty:
+        return pd.DataFrame(columns=["machine", "n_machines"])
+    out = df.groupby(["tonage", "tonage_label"]).size().reset_index(name="n_machines")
+    return out.sort_values("tonage")[["tonage_label", "n_machines"]].rename(columns={"tonage_label": "machine"}).reset_index(drop=True)
 
-    if hasattr(res, "data"):
-        rows = res.data
-    else:
-        rows = res
+def get_compatible_machines(min_tonage):
+    """List machine_id aktif dengan tonase >= kebutuhan mold (urut tonase terkecil dulu)."""
+    ton = parse_tonage(min_tonage) or 0
+    df = get_machine_table()
+    df = df[df["tonage"] >= ton].sort_values(["tonage", "machine_id"])
+    return df["machine_id"].tolist()
 
-    return [r["machine_id"] for r in rows]
+def get_machines_grouped_by_tonage(active_only=False):
+    """Ambil table machine SEKALI, return dict {tonase (float): [machine_id, ...]} urut machine_id."""
+    df = get_machine_table(active_only)
+    if df.empty:
+        return {}
+    return df.sort_values("machine_id").groupby("tonage")["machine_id"].apply(list).to_dict()
@@ -1,9 +1,19 @@
-print("LOADING master_service.py FROM:", __file__)
+import time
 
+import pandas as pd
 
-from supabase_client import get_supabase
+from supabase_client import LazyClient, fetch_all_rows
 
-supabase = get_supabase()
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
+
+CACHE_TTL_SEC = 600
+PART_SOURCES = {"MASTER": "part_no, PART_NAME", "List_Part": "PART_NO, PART_NAME"}  # table -> kolom part no & nama
+_cache = {}
+
+def use_client(client):
+    """supabase.use(client) + buang cache vocabulary part dari client lama."""
+    supabase.use(client)
+    clear_cache()
 
 def get_master_map():
     """Ambil seluruh MASTER dan kembalikan dict dengan key=part_no"""
@@ -25,3 +35,34 @@ def get_master_map():
         }
 
     return master_map
+
+def get_part_vocabulary(table="MASTER"):
+    """
+    Vocabulary part untuk form: {'names': [PART_NAME urut], 'part_no_by_name': {PART_NAME: part_no}}.
+    PART_NAME disimpan dengan ejaan asli (tanpa strip) supaya yang tampil & ditulis balik sama dengan di DB;
+    strip hanya dipakai untuk buang duplikat / nama kosong dan untuk urutan.
+    Semua baris diambil berpaging (fetch_all_rows), di-cache per process (TTL CACHE_TTL_SEC). table: MASTER / List_Part.
+    """
+    hit = _cache.get(table)
+    if hit and time.time() - hit[0] < CACHE_TTL_SEC:
+        return hit[1]
+    columns = PART_SOURCES[table]
+    rows = fetch_all_rows(
+        lambda: supabase.table(table).select(columns),
+        unique_by=tuple(c.strip() for c in columns.split(",")),
+    )
+    df = pd.DataFrame(rows)
+    if df.empty:
+        vocab = {"names": [], "part_no_by_name": {}}
+    else:
+        df.columns = [c.lower() for c in df.columns]
+        df = df.dropna(subset=["part_name"])
+        df["part_name"] = df["part_name"].astype(str)
+        key = df["part_name"].str.strip()
+        df = df.assign(key=key)[key != ""].drop_duplicates("key", keep="first").sort_values("key", kind="stable")
+        vocab = {"names": df["part_name"].tolist(), "part_no_by_name": dict(zip(df["part_name"], df["part_no"]))}
+    _cache[table] = (time.time(), vocab)
+    return vocab
+
+def clear_cache():
+    _cache.clear()
@@ -0,0 +1,123 @@
+import time
+
+import pandas as pd
+
+from supabase_client import LazyClient, fetch_all_rows
+from utils.facet_index import FacetIndex
+from utils.material_key import MATERIAL_COLS, MaterialDimension
+
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
+
+
+def use_client(client):
+    """supabase.use(client) + buang cache dimensi, vocabulary & index forecast material dari client lama."""
+    supabase.use(client)
+    clear_cache()
+
+
+CACHE_TTL_SEC = 600
+FORECAST_CHECK_SEC = 60  # versi material_forecast dicek paling sering sekali per ini
+FORECAST_REBUILD_SEC = 600  # reload penuh paling lambat segini: UPDATE baris lama tidak mengubah versi (count, created_at)
+FORECAST_DIMS = ("customer_name", "month", "type_material", "grade_material", "color_material")
+_cache = {}
+
+
+def get_material_dimension():
+    """
+    Dimensi material dari table List_Material (TYPE, GRADE, COLOR) dengan material_code integer.
+    Di-cache per process (TTL CACHE_TTL_SEC); kalau List_Material gagal dibaca, dimensi kosong.
+    """
+    hit = _cache.get("dimension")
+    if hit and time.time() - hit[0] < CACHE_TTL_SEC:
+        return hit[1]
+    try:
+        res = supabase.table("List_Material").select("TYPE, GRADE, COLOR").execute()
+        df = pd.DataFrame(res.data if hasattr(res, "data") else res)
+    except Exception as e:
+        print(f"[material_service] List_Material tidak bisa dibaca: {e}")
+        return MaterialDimension.from_frame(None)
+    dim = MaterialDimension.from_frame(df)
+    _cache["dimension"] = (time.time(), dim)
+    return dim
+
+
+def get_material_vocabulary():
+    """
+    Vocabulary form material, dihitung sekali per dimensi (ikut cache dimensi, tanpa network per rerun):
+    pilihan per atribut + dict dependent 'grade_by_type' {type: [grade]} & 'color_by_type_grade' {(type, grade): [color]}.
+    """
+    dim = get_material_dimension()
+    hit = _cache.get("vocabulary")
+    if hit and hit[0] is dim:
+        return hit[1]
+    grade_by_type, color_by_type_grade = dim.dependent_options()
+    vocab = {col: dim.options(col) for col in MATERIAL_COLS}
+    vocab.update(grade_by_type=grade_by_type, color_by_type_grade=color_by_type_grade)
+    _cache["vocabulary"] = (dim, vocab)
+    return vocab
+
+
+def get_material_options():
+    """Pilihan selectbox per atribut: {'type_material': [...], 'grade_material': [...], 'color_material': [...]}."""
+    vocab = get_material_vocabulary()
+    return {col: vocab[col] for col in MATERIAL_COLS}
+
+
+def encode_materials(df, cols=MATERIAL_COLS):
+    """
+    Tambah kolom material_code (int) ke salinan df berdasarkan dimensi List_Material.
+    Return (df, dimensi) — material di luar List_Material ikut dapat kode di dimensi yang dikembalikan.
+    """
+    codes, dim = get_material_dimension().encode(df, cols)
+    return df.assign(material_code=codes), dim
+
+
+def _material_forecast_version():
+    """(jumlah baris, created_at terbaru) material_forecast: satu request kecil."""
+    res = supabase.table("material_forecast").select("created_at", count="exact")\
+        .order("created_at", desc=True).limit(1).execute()
+    return res.count, (res.data[0]["created_at"] if res.data else None)
+
+
+def _fetch_material_forecast(since=None):
+    """Semua baris material_forecast (paging, tanpa cap), opsional hanya yang created_at > since."""
+    def build_query():
+        query = supabase.table("material_forecast").select("*")
+        if since:
+            query = query.gt("created_at", since)
+        return query.order("created_at").order("customer_name").order("part_no")
+    return pd.DataFrame(fetch_all_rows(build_query))
+
+
+def get_material_forecast_index(check_sec=FORECAST_CHECK_SEC):
+    """
+    FacetIndex material_forecast untuk filter Material Requirement (dimensi FORECAST_DIMS).
+    Versi (count, created_at terbaru) dicek max sekali per check_sec: cuma ada baris baru -> fetch baris baru
+    saja & append, jumlah baris tidak cocok (hapus) -> reload penuh. UPDATE baris lama tidak terdeteksi versi,
+    jadi index juga di-reload penuh tiap FORECAST_REBUILD_SEC. Di antaranya filter dilayani dari memory tanpa network.
+    """
+    hit = _cache.get("forecast_index")
+    now = time.time()
+    if hit and now - hit["checked_at"] < check_sec:
+        return hit["index"]
+
+    version = _material_forecast_version()
+    index = None
+    reuse = hit and now - hit["built_at"] <= FORECAST_REBUILD_SEC  # lewat interval -> reload penuh
+    built_at = hit["built_at"] if reuse else now
+    if reuse and version == hit["version"]:
+        index = hit["index"]
+    elif reuse and hit["version"][1] and version[1] and version[1] > hit["version"][1] and version[0] > hit["version"][0]:
+        index = hit["index"].append(_fetch_material_forecast(since=hit["version"][1]))
+        if len(index) != version[0]:
+            index = None  # selain insert ada perubahan lain
+    if index is None:
+        index = FacetIndex(_fetch_material_forecast(), FORECAST_DIMS)
+        built_at = now
+
+    _cache["forecast_index"] = {"index": index, "version": version, "checked_at": now, "built_at": built_at}
+    return index
+
+
+def clear_cache():
+    _cache.clear()
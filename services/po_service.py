@@ -0,0 +1,101 @@
+"""
+PO material terbuka & expected receipt (table material_po, sql/material_po.sql).
+Outstanding PO (kg) digabung ke timeline proyeksi resin / MRP sebagai incoming terjadwal.
+"""
+import pandas as pd
+
+from supabase_client import LazyClient, fetch_all_rows
+from utils.mrp import incoming_matrix, qty_in_kg
+
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
+
+STATUS_OPEN = "OPEN"
+STATUS_CLOSED = "CLOSED"
+STATUS_CANCELLED = "CANCELLED"
+
+PO_COLUMNS = [
+    "id", "po_number", "supplier_name", "type_material", "grade_material", "color_material",
+    "qty_order", "qty_received", "uom", "expected_date", "status",
+]
+
+
+def create_po(lines):
+    """Insert baris PO (list dict: po_number, supplier_name, type/grade/color_material, qty_order, uom, expected_date)."""
+    rows = [{**line, "expected_date": str(line["expected_date"]), "status": STATUS_OPEN} for line in lines]
+    if not rows:
+        return []
+    return supabase.table("material_po").insert(rows).execute().data
+
+
+def get_open_po():
+    """Semua baris PO OPEN + kolom outstanding (uom PO) dan outstanding_kg (NaN untuk uom non-berat)."""
+    df = pd.DataFrame(fetch_all_rows(lambda: supabase.table("material_po")
+        .select(", ".join(PO_COLUMNS))
+        .eq("status", STATUS_OPEN)
+        .order("expected_date")))
+    if df.empty:
+        return pd.DataFrame(columns=PO_COLUMNS + ["outstanding", "outstanding_kg"])
+    order = pd.to_numeric(df["qty_order"], errors="coerce").fillna(0)
+    received = pd.to_numeric(df["qty_received"], errors="coerce").fillna(0)
+    df["outstanding"] = (order - received).clip(lower=0)
+    df["outstanding_kg"] = qty_in_kg(df["outstanding"], df["uom"])
+    return df[df["outstanding"] > 0].reset_index(drop=True)
+
+
+def get_expected_receipts():
+    """Outstanding PO dalam bentuk incoming (date, type/grade/color_material, qty kg) untuk utils.mrp."""
+    df = get_open_po().dropna(subset=["outstanding_kg"])
+    return pd.DataFrame({
+        "date": df["expected_date"],
+        "type_material": df["type_material"],
+        "grade_material": df["grade_material"],
+        "color_material": df["color_material"],
+        "qty": df["outstanding_kg"],
+        "po_number": df["po_number"],
+    })
+
+
+def expected_receipt_matrix(materials, start_date, days):
+    """Outstanding PO -> matrix [materials x days] kg (PO telat masuk hari 0)."""
+    return incoming_matrix(get_expected_receipts(), materials, start_date, days)
+
+
+def receive_po(po_id, qty):
+    """Penerimaan material untuk satu baris PO (atomik di DB, auto CLOSED kalau penuh). Return baris PO terbaru."""
+    res = supabase.rpc("receive_material_po", {"p_id": int(po_id), "p_qty": float(qty)}).execute()
+    return _updated_po(po_id, res.data)
+
+
+def receive_material(receipt, po_id, qty):
+    """
+    Insert material_in (receipt) + kurangi outstanding baris PO sebesar qty (uom PO) dalam satu transaksi DB.
+    Error kalau baris PO sudah tidak OPEN; material_in tidak tersimpan. Return baris PO terbaru.
+    """
+    res = supabase.rpc("receive_material_with_po", {"p_receipt": receipt, "p_po_id": int(po_id), "p_qty": float(qty)}).execute()
+    return _updated_po(po_id, res.data)
+
+
+def _updated_po(po_id, data):
+    # Function SQL raise kalau tidak ada baris OPEN; cek lagi di sini supaya versi DB lama pun tidak lolos diam-diam
+    row = data[0] if isinstance(data, list) and data else data
+    if not row or row.get("id") is None:
+        raise ValueError(f"PO line {po_id} tidak ditemukan atau sudah tidak {STATUS_OPEN}")
+    return row
+
+
+def qty_in_po_uom(qty, uom, po_uom):
+    """Qty terima -> satuan PO: KG <-> G dikonversi; satuan non-berat (BATCH/PCS/...) harus sama dengan uom PO."""
+    qty_kg, po_factor = qty_in_kg(pd.Series([qty]), [uom]).iloc[0], qty_in_kg(pd.Series([1.0]), [po_uom]).iloc[0]
+    if pd.isna(qty_kg) or pd.isna(po_factor):
+        if str(uom or "KG").strip().upper() != str(po_uom or "KG").strip().upper():
+            raise ValueError(f"UOM terima {uom} tidak bisa dikonversi ke UOM PO {po_uom}")
+        return float(qty)
+    return float(qty_kg / po_factor)
+
+
+def cancel_po(po_ids):
+    """Batalkan baris PO (outstanding tidak dihitung lagi)."""
+    if not po_ids:
+        return []
+    return supabase.table("material_po").update({"status": STATUS_CANCELLED})\
+        .in_("id", [int(i) for i in po_ids]).execute().data
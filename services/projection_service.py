@@ -0,0 +1,209 @@
+"""
+Proyeksi stockout resin & part FG/WIP (days of cover, tanggal stockout) untuk dashboard dan alert bot.
+
+Matrix konsumsi/supply (forecast, jadwal produksi, incoming, outstanding PO) dibangun ulang tiap REBUILD_SEC;
+di antaranya refresh_projection() cuma menarik transaksi/saldo/PO baru dan menghitung ulang item yang berubah.
+"""
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from supabase_client import LazyClient, fetch_all_rows
+from services.forecast_service import get_daily_forecast_matrix
+from services.po_service import expected_receipt_matrix
+from services.schedule_service import get_production_schedule
+from utils.material_key import material_key
+from utils.mrp import incoming_matrix, on_hand_from_balance, requirement_matrix, rows_in_kg
+from utils.projection import StockProjection
+
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
+
+HORIZON_DAYS = 30
+REBUILD_SEC = 900
+NO_ROWS_ID = 0  # watermark id awal kalau table transaksi masih kosong
+KIND_FG = "fg"        # part: saldo FG + WIP vs forecast delivery, supply = jadwal injection
+KIND_RESIN = "resin"  # material: saldo v_material_balance vs konsumsi jadwal/forecast x GROSS, supply = incoming + PO
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def use_client(client):
+    """supabase.use(client) + buang proyeksi yang dibangun dari client lama."""
+    supabase.use(client)
+    clear_cache()
+
+
+def _today():
+    return pd.Timestamp.today().normalize()
+
+
+def _master():
+    res = supabase.table("MASTER").select("part_no, GROSS, TYPE_MATERIAL, GRADE_MATERIAL, COLOR_MATERIAL").execute()
+    df = pd.DataFrame(res.data)
+    if df.empty:
+        return pd.DataFrame(columns=["part_no", "gross", "type_material", "grade_material", "color_material"])
+    df.columns = [c.lower() for c in df.columns]
+    df["part_no"] = df["part_no"].astype(str).str.strip()
+    return df.drop_duplicates("part_no")
+
+
+def get_material_snapshot(as_of):
+    """
+    Saldo material s/d as_of + watermark id material_in/out dari satu snapshot database
+    (sql/material_balance_snapshot.sql). Return (DataFrame saldo per material, watermark per table).
+    """
+    res = supabase.rpc("material_balance_snapshot", {"p_as_of": as_of.strftime("%Y-%m-%d")}).execute()
+    data = res.data or {}
+    watermark = data.get("watermark") or {}
+    return pd.DataFrame(data.get("balance") or []), {t: watermark.get(t) or NO_ROWS_ID for t in ("material_in", "material_out")}
+
+
+def _scheduled_qty(df_sched, parts, start, days):
+    """Qty lot terjadwal -> matrix [part x hari]."""
+    out = np.zeros((len(parts), days))
+    if df_sched.empty:
+        return out
+    row = pd.Index(parts).get_indexer(df_sched["part_no"].astype(str))
+    col = (df_sched["date"] - start).dt.days.to_numpy()
+    ok = (row >= 0) & (col >= 0) & (col < days)
+    np.add.at(out, (row[ok], col[ok]), df_sched["qty"].to_numpy(dtype=float)[ok])
+    return out
+
+
+def get_fg_on_hand(parts=None):
+    """Saldo FG + WIP terbaru per part_no (Series)."""
+    stocks = []
+    for view, col in (("v_fg_latest_stock", "fg_stock"), ("v_wip_latest_stock", "wip_stock")):
+        df = pd.DataFrame(fetch_all_rows(lambda: supabase.table(view).select(f"part_no, {col}"), unique_by=("part_no", col)))
+        if not df.empty:
+            stocks.append(pd.to_numeric(df[col], errors="coerce").fillna(0).groupby(df["part_no"].astype(str)).sum())
+    total = pd.concat(stocks).groupby(level=0).sum() if stocks else pd.Series(dtype=float)
+    return total if parts is None else total.reindex(parts).fillna(0)
+
+
+def build_fg_projection(start_date=None, days=HORIZON_DAYS):
+    """Proyeksi semua part MASTER: demand = forecast harian, supply = production_schedule."""
+    start = pd.Timestamp(start_date or _today()).normalize()
+    parts = _master()["part_no"].tolist()
+    demand = get_daily_forecast_matrix(parts, start, days, fill_value=0.0)
+    supply = _scheduled_qty(get_production_schedule(start, days), parts, start, days)
+    return StockProjection(parts, get_fg_on_hand(parts).to_numpy(), demand.to_numpy(), supply, start)
+
+
+def _resin_lots(df_master, start, days):
+    """Lot terjadwal + forecast harian untuk part yang belum punya jadwal di window (perkiraan konsumsi resin)."""
+    df_sched = get_production_schedule(start, days)
+    unscheduled = sorted(set(df_master["part_no"]) - set(df_sched["part_no"].astype(str)))
+    fc = get_daily_forecast_matrix(unscheduled, start, days, fill_value=0.0)
+    fc_long = fc.stack().rename("qty").reset_index()
+    fc_long.columns = ["part_no", "date", "qty"]
+    return pd.concat([df_sched[["date", "part_no", "qty"]], fc_long[fc_long["qty"] > 0]], ignore_index=True)
+
+
+def _resin_projection(start, days):
+    """(StockProjection resin, watermark material_in/out yang konsisten dengan saldonya)."""
+    master = _master()
+    df_req = requirement_matrix(_resin_lots(master, start, days), master, start, days)
+
+    df_bal, watermark = get_material_snapshot(start)
+    on_hand = on_hand_from_balance(df_bal)
+
+    df_inc = rows_in_kg(pd.DataFrame(fetch_all_rows(lambda: supabase.table("material_in")
+        .select("date, type_material, grade_material, color_material, qty, uom")
+        .gt("date", start.strftime("%Y-%m-%d")).order("date"))))
+
+    materials = df_req.index.union(on_hand.index)
+    demand = df_req.reindex(materials).fillna(0).to_numpy()
+    supply = incoming_matrix(df_inc, materials, start, days)
+    return StockProjection(materials, on_hand.reindex(materials).fillna(0).to_numpy(), demand, supply, start), watermark
+
+
+def build_resin_projection(start_date=None, days=HORIZON_DAYS):
+    """Proyeksi semua material: saldo kg (snapshot material_in/out), konsumsi kg per hari, supply = material_in bertanggal ke depan."""
+    return _resin_projection(pd.Timestamp(start_date or _today()).normalize(), days)[0]
+
+
+def _material_deltas(table, sign, since, as_of):
+    """
+    Transaksi material_in / material_out baru (id > since) -> (keys, qty kg bertanda, watermark id baru).
+    Watermark id, bukan created_at: approve BON & bon_material mengisi created_at dari jam app server.
+    Transaksi bertanggal setelah as_of tidak mengubah saldo (sudah jadi supply incoming di matrix); tanpa date
+    (mis. hasil approve BON) pakai tanggal created_at. UOM non-berat tidak dihitung, sama seperti saldo snapshot.
+    """
+    df = pd.DataFrame(fetch_all_rows(lambda: supabase.table(table)
+        .select("id, date, type_material, grade_material, color_material, qty, uom, created_at")
+        .gt("id", since).order("id"), unique_by=()))
+    if df.empty:
+        return np.array([], dtype=object), np.array([]), since
+    watermark = int(df["id"].iloc[-1])
+    day = pd.to_datetime(df["date"], errors="coerce").fillna(pd.to_datetime(df["created_at"], utc=True).dt.tz_localize(None).dt.normalize())
+    df = rows_in_kg(df[day <= as_of])
+    return material_key(df).to_numpy(), sign * df["qty"].to_numpy(dtype=float), watermark
+
+
+def _apply_open_po(entry):
+    """Outstanding PO terbaru -> ganti porsi PO di supply resin; hanya material yang PO-nya berubah dihitung ulang."""
+    proj = entry["projection"]
+    po = expected_receipt_matrix(proj.items, proj.dates[0], proj.horizon)
+    changed = proj.set_supply(proj.supply - entry.get("supply_po", 0) + po)
+    entry["supply_po"] = po
+    return changed
+
+
+def _build(kind):
+    if kind == KIND_FG:
+        return {"projection": build_fg_projection(), "built_at": time.time(), "refreshed_at": time.time()}
+    # Saldo & watermark dari satu snapshot: transaksi setelahnya masuk lewat refresh, tidak dobel di saldo
+    projection, watermark = _resin_projection(_today(), HORIZON_DAYS)
+    entry = {"projection": projection, "built_at": time.time(), "refreshed_at": time.time(), "watermark": watermark}
+    _apply_open_po(entry)
+    return entry
+
+
+def refresh_projection(kind):
+    """
+    Refresh incremental: resin pakai transaksi material_in/out setelah watermark + outstanding PO terbaru,
+    FG pakai saldo terbaru per part.
+    Hanya item yang berubah yang dihitung ulang. Return jumlah item berubah.
+    """
+    entry = _cache.get(kind)
+    if entry is None:
+        return 0
+    proj = entry["projection"]
+    if kind == KIND_FG:
+        changed = proj.set_on_hand(get_fg_on_hand(proj.items))
+    else:
+        changed = 0
+        for table, sign in (("material_in", 1.0), ("material_out", -1.0)):
+            keys, qty, entry["watermark"][table] = _material_deltas(table, sign, entry["watermark"][table], proj.dates[0])
+            changed += proj.apply_delta(keys, qty)
+        # Penerimaan PO menaikkan saldo (material_in) dan menurunkan outstanding di saat yang sama
+        changed += _apply_open_po(entry)
+    entry["refreshed_at"] = time.time()
+    return changed
+
+
+def get_projection(kind, refresh_sec=60):
+    """StockProjection bersama (per process): rebuild penuh tiap REBUILD_SEC / ganti hari, refresh incremental tiap refresh_sec."""
+    with _lock:
+        entry = _cache.get(kind)
+        stale = entry is None or time.time() - entry["built_at"] > REBUILD_SEC or entry["projection"].dates[0] != _today()
+        if stale:
+            _cache[kind] = entry = _build(kind)
+        elif time.time() - entry["refreshed_at"] > refresh_sec:
+            refresh_projection(kind)
+        return entry["projection"]
+
+
+def get_stockout_ranking(kind, statuses=None):
+    """Ranking urgensi (utils.projection.StockProjection.summary), opsional filter status."""
+    df = get_projection(kind).summary()
+    return df if statuses is None else df[df["status"].isin(statuses)].reset_index(drop=True)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
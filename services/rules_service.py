@@ -1,7 +1,6 @@
-print("LOADING rules_service FROM:", __file__)
+from supabase_client import LazyClient
 
-from supabase_client import get_supabase
-supabase = get_supabase()
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
 
 def get_rules():
     res = (
@@ -0,0 +1,53 @@
+import pandas as pd
+
+from supabase_client import LazyClient, fetch_all_rows
+
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
+
+SCHEDULE_COLUMNS = ["machine_id", "date", "assigned_shift", "part_no", "part_name", "qty"]
+
+
+def save_production_schedule(machine_id, df_schedule, start_date, days):
+    """
+    Simpan jadwal satu mesin untuk window [start_date, start_date + days): lot lama di window diganti lot baru
+    dalam satu transaksi DB (sql/production_schedule.sql), jadi insert gagal tidak menghapus jadwal lama.
+    df_schedule: hasil solve_schedule (date, assigned_shift, part_no, part_name, qty). Return jumlah lot tersimpan.
+    """
+    start = pd.Timestamp(start_date).normalize()
+    end = start + pd.Timedelta(days=days)
+    rows = []
+    if df_schedule is not None and not df_schedule.empty:
+        df = df_schedule.assign(machine_id=machine_id)
+        df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        df["qty"] = pd.to_numeric(df.get("qty", 0), errors="coerce").fillna(0)
+        df["assigned_shift"] = df["assigned_shift"].astype(str)
+        df = df.reindex(columns=SCHEDULE_COLUMNS).astype(object)
+        rows = df.where(df.notna(), None).to_dict("records")
+
+    res = supabase.rpc("replace_production_schedule", {
+        "p_machine_id": machine_id,
+        "p_start": start.strftime("%Y-%m-%d"),
+        "p_end": end.strftime("%Y-%m-%d"),
+        "p_rows": rows,
+    }).execute()
+    return res.data if isinstance(res.data, int) else len(rows)
+
+
+def get_production_schedule(start_date, days, machine_id=None):
+    """Lot terjadwal semua mesin (atau satu mesin) di window N hari: DataFrame date, part_no, qty, ..."""
+    start = pd.Timestamp(start_date).normalize()
+    end = start + pd.Timedelta(days=days)
+
+    def build_query():
+        query = supabase.table("production_schedule")\
+            .select(", ".join(SCHEDULE_COLUMNS))\
+            .gte("date", start.strftime("%Y-%m-%d"))\
+            .lt("date", end.strftime("%Y-%m-%d"))
+        if machine_id:
+            query = query.eq("machine_id", machine_id)
+        return query.order("date")
+
+    df = pd.DataFrame(fetch_all_rows(build_query), columns=SCHEDULE_COLUMNS)
+    df["date"] = pd.to_datetime(df["date"])
+    df["qty"] = pd.to_numeric(df["qty"], errors="coerce").fillna(0)
+    return df
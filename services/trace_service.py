@@ -0,0 +1,189 @@
+"""
+Traceability lot material untuk quality containment (utils.trace_index.TraceIndex).
+
+Index dibangun sekali per process dari material_in, material_out, monitor_per_hour, Hasil_Produksi, wip_in,
+fg_in dan Delivery_FG; sesudahnya refresh cuma menarik baris baru per table (watermark kolom ketiga SOURCES)
+dan meng-append-nya. Rebuild penuh tiap REBUILD_SEC supaya update/hapus baris lama ikut terbawa.
+"""
+import threading
+import time
+
+import pandas as pd
+
+from supabase_client import LazyClient, fetch_all_rows
+from services.machine_service import tonage_label
+from utils.material_key import material_key
+from utils.trace_index import NO_LINE, TraceIndex
+
+supabase = LazyClient()  # client dibuat saat query pertama, bukan saat import
+
+REFRESH_SEC = 30
+REBUILD_SEC = 3600
+SHIFT_START_HOUR = {"1": 7, "2": 15, "3": 23}  # fallback jam issue kalau material_out tidak punya waktu
+
+# table -> (tahap index, kolom select, kolom watermark)
+SOURCES = {
+    "material_in": ("receipts", "date, waktu, type_material, grade_material, color_material, qty, lot_no, supplier_name, no_do, po_number, created_at", "created_at"),
+    "material_out": ("issues", "date, waktu, shift, type_material, grade_material, color_material, qty, lot_no, line_production, no_spk, created_at", "created_at"),
+    "monitor_per_hour": ("production", "id, production_date, hour_index, machine_id, part_no, actual_qty", "id"),
+    "Hasil_Produksi": ("production", "id, DATE, PART_NO, ACT", "id"),
+    "wip_in": ("wip", "id, date, waktu, part_no, qty_in, no_do", "id"),
+    "fg_in": ("fg", "date, part_no, qty_in, ref_dokumen, created_at", "created_at"),
+    "Delivery_FG": ("delivery", "NO_DELIVERY, PART_NO, QTY_DELIVERY, DATE_DELIVERY, CUSTOMER, CREATED_AT", "CREATED_AT"),
+}
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def use_client(client):
+    """supabase.use(client) + buang TraceIndex yang dibangun dari client lama."""
+    supabase.use(client)
+    clear_cache()
+
+
+def line_key(value):
+    """'MC 850T(1)' (material_out) dan 'MC 850T-1' (machine_id) -> '850T': link issue ke produksi per tonase line."""
+    return tonage_label(value) or NO_LINE
+
+
+def _ts(date_col, time_col=None):
+    """Tanggal (+ jam kalau ada) -> Timestamp naive."""
+    ts = pd.to_datetime(date_col, errors="coerce", utc=True).dt.tz_localize(None)
+    if time_col is not None:
+        ts = ts.dt.normalize() + pd.to_timedelta(time_col.astype(str), errors="coerce").fillna(pd.Timedelta(0))
+    return ts
+
+
+def _qty(col):
+    return pd.to_numeric(col, errors="coerce").fillna(0)
+
+
+def _normalize(table, df):
+    """Baris mentah table -> kolom standar tahap TraceIndex."""
+    if table in ("material_in", "material_out"):
+        out = pd.DataFrame({
+            "lot_no": df["lot_no"].fillna("").astype(str).str.strip(),
+            "material_id_unique": material_key(df).to_numpy(),
+            "ts": _ts(df["date"].fillna(df["created_at"]), df.get("waktu")),
+            "qty": _qty(df["qty"]),
+        })
+        if table == "material_in":
+            return out.assign(supplier=df.get("supplier_name"), no_do=df.get("no_do"), po_number=df.get("po_number"))
+        shift = df.get("shift", pd.Series(None, index=df.index)).astype(str)
+        no_time = df.get("waktu", pd.Series(None, index=df.index)).isna()
+        out.loc[no_time, "ts"] = out.loc[no_time, "ts"].dt.normalize() + pd.to_timedelta(shift[no_time].map(SHIFT_START_HOUR).fillna(0), unit="h")
+        return out.assign(
+            line=df["line_production"].map(line_key),
+            line_production=df["line_production"],
+            shift=shift,
+            no_spk=df.get("no_spk"),
+        )
+    if table == "monitor_per_hour":
+        return pd.DataFrame({
+            "line": df["machine_id"].map(line_key),
+            "machine_id": df["machine_id"],
+            "part_no": df["part_no"].astype(str).str.strip(),
+            "ts": _ts(df["production_date"]) + pd.to_timedelta(_qty(df["hour_index"]), unit="h"),
+            "qty": _qty(df["actual_qty"]),
+            "source": table,
+        })
+    if table == "Hasil_Produksi":
+        return pd.DataFrame({
+            "line": NO_LINE,
+            "machine_id": None,
+            "part_no": df["PART_NO"].astype(str).str.strip(),
+            "ts": _ts(df["DATE"]),
+            "qty": _qty(df["ACT"]),
+            "source": table,
+        })
+    if table in ("wip_in", "fg_in"):
+        return pd.DataFrame({
+            "part_no": df["part_no"].astype(str).str.strip(),
+            "ts": _ts(df["date"], df.get("waktu")),
+            "qty": _qty(df["qty_in"]),
+            "ref": df.get("no_do" if table == "wip_in" else "ref_dokumen"),
+        })
+    return pd.DataFrame({
+        "part_no": df["PART_NO"].astype(str).str.strip(),
+        "ts": _ts(df["DATE_DELIVERY"]),
+        "qty": _qty(df["QTY_DELIVERY"]),
+        "ref": df["NO_DELIVERY"].astype(str).str.strip(),
+        "customer": df.get("CUSTOMER"),
+    })
+
+
+def _fetch(table, since=None):
+    """Baris table (paging) opsional hanya watermark > since. Return (DataFrame standar, watermark baru)."""
+    _, cols, mark = SOURCES[table]
+
+    def build_query():
+        query = supabase.table(table).select(cols)
+        if since is not None:
+            query = query.gt(mark, since)
+        return query.order(mark)
+
+    df = pd.DataFrame(fetch_all_rows(build_query, unique_by=() if mark == "id" else ("id",)))
+    if df.empty:
+        return df, since
+    return _normalize(table, df), df[mark].iloc[-1]
+
+
+def _parts_by_material():
+    """MASTER: material_id_unique -> set part_no yang memakainya."""
+    res = supabase.table("MASTER").select("part_no, TYPE_MATERIAL, GRADE_MATERIAL, COLOR_MATERIAL").execute()
+    df = pd.DataFrame(res.data)
+    if df.empty:
+        return {}
+    keys = material_key(df, ("TYPE_MATERIAL", "GRADE_MATERIAL", "COLOR_MATERIAL"))
+    return df["part_no"].astype(str).str.strip().groupby(keys).apply(set).to_dict()
+
+
+def build_trace_index():
+    """Index penuh + watermark per table."""
+    index = TraceIndex(_parts_by_material())
+    watermark = {}
+    for table, (stage, _, _) in SOURCES.items():
+        df, watermark[table] = _fetch(table)
+        index.add(stage, df)
+    return {"index": index, "watermark": watermark, "built_at": time.time(), "refreshed_at": time.time()}
+
+
+def refresh_trace_index():
+    """Append baris baru semua table sejak watermark. Return jumlah baris baru."""
+    entry = _cache.get("trace")
+    if entry is None:
+        return 0
+    added = 0
+    for table, (stage, _, _) in SOURCES.items():
+        df, entry["watermark"][table] = _fetch(table, entry["watermark"][table])
+        entry["index"].add(stage, df)
+        added += len(df)
+    entry["refreshed_at"] = time.time()
+    return added
+
+
+def get_trace_index(refresh_sec=REFRESH_SEC):
+    """TraceIndex bersama (per process): rebuild tiap REBUILD_SEC, append incremental tiap refresh_sec."""
+    with _lock:
+        entry = _cache.get("trace")
+        if entry is None or time.time() - entry["built_at"] > REBUILD_SEC:
+            _cache["trace"] = build_trace_index()
+        elif time.time() - entry["refreshed_at"] > refresh_sec:
+            refresh_trace_index()
+        return _cache["trace"]["index"]
+
+
+def trace_lot(lot_no):
+    """Forward trace: lot material -> produksi, wip, fg, delivery yang suspect."""
+    return get_trace_index().forward(lot_no)
+
+
+def trace_delivery(no_delivery):
+    """Backward trace: surat jalan -> produksi -> lot material yang dipakai."""
+    return get_trace_index().backward(no_delivery)
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,25 @@
+-- Approve banyak BON material sekaligus dalam satu transaksi (dipanggil services/bon_service.approve_bon_batch).
+-- BON yang sudah tidak "Menunggu Konfirmasi" (mis. sudah diproses user lain) di-skip; return NO_BON yang benar-benar disetujui.
+
+create or replace function approve_bon_batch(p_no_bon text[], p_approved_at timestamptz default now())
+returns setof text
+language sql as $$
+    with pending as (
+        select "NO_BON", "TYPE", "GRADE", "COLOR", "QTY", "REQUESTER"
+        from "BON_MATERIAL"
+        where "NO_BON"::text = any(p_no_bon)
+          and "STATUS" = 'Menunggu Konfirmasi'
+        for update
+    ), moved as (
+        insert into material_out (type_material, grade_material, color_material, qty, created_at, prepared_by)
+        select "TYPE", "GRADE", "COLOR", "QTY", p_approved_at, coalesce("REQUESTER", 'system')
+        from pending
+    ), approved as (
+        update "BON_MATERIAL" b
+        set "STATUS" = 'Disetujui', "APPROVED_AT" = p_approved_at
+        from pending p
+        where b."NO_BON" = p."NO_BON"
+        returning b."NO_BON"::text
+    )
+    select "NO_BON" from approved;
+$$;
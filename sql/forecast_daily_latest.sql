@@ -0,0 +1,52 @@
+-- Materialisasi forecast harian revision terbaru (pengganti baca view v_daily_forecast)
+-- Di-refresh incremental dari Python setiap revision baru di-commit
+-- (services/forecast_service.publish_daily_latest), rebuild penuh pakai fungsi di bawah.
+
+create table if not exists forecast_daily_latest (
+    customer_name   text        not null,
+    part_no         text        not null,
+    forecast_date   date        not null,
+    forecast_month  text        not null,
+    daily_qty       integer     not null,
+    forecast_id     text,
+    revision_no     integer     not null,
+    forecast_source text,
+    refreshed_at    timestamptz not null default now(),
+    primary key (customer_name, part_no, forecast_date)
+);
+
+-- Planning membaca range (part_no, forecast_date) -> index range scan
+create index if not exists idx_forecast_daily_latest_part_date
+    on forecast_daily_latest (part_no, forecast_date);
+
+-- Prune revision lama per customer + bulan
+create index if not exists idx_forecast_daily_latest_cust_month
+    on forecast_daily_latest (customer_name, forecast_month, revision_no);
+
+-- Rebuild penuh (backfill awal / recovery)
+create or replace function rebuild_forecast_daily_latest() returns void
+language sql as $$
+    truncate forecast_daily_latest;
+
+    insert into forecast_daily_latest (
+        customer_name, part_no, forecast_date, forecast_month,
+        daily_qty, forecast_id, revision_no, forecast_source
+    )
+    select distinct on (m.customer_name, d.part_no, d.forecast_date)
+        m.customer_name, d.part_no, d.forecast_date, m.forecast_month,
+        d.daily_demand, d.forecast_id, d.revision_no, m.forecast_source
+    from forecast_daily d
+    join forecast_monthly m
+        on m.forecast_id = d.forecast_id
+       and m.part_no = d.part_no
+       and m.revision_no = d.revision_no
+    join (
+        select customer_name, forecast_month, max(revision_no) as revision_no
+        from forecast_monthly
+        group by customer_name, forecast_month
+    ) latest
+        on latest.customer_name = m.customer_name
+       and latest.forecast_month = m.forecast_month
+       and latest.revision_no = m.revision_no
+    order by m.customer_name, d.part_no, d.forecast_date;
+$$;
@@ -0,0 +1,76 @@
+-- Index & view pendukung grid history forecast (pages/Forcast.py)
+-- Keyset pagination: ORDER BY created_at DESC, id DESC
+
+create index if not exists idx_forecast_monthly_created_id
+    on forecast_monthly (created_at desc, id desc);
+
+create index if not exists idx_forecast_monthly_customer_created
+    on forecast_monthly (customer_name, created_at desc, id desc);
+
+create index if not exists idx_forecast_monthly_month_rev
+    on forecast_monthly (forecast_month, revision_no);
+
+create index if not exists idx_forecast_monthly_filter_key
+    on forecast_monthly (customer_name, forecast_month, revision_no);
+
+-- Opsi filter (customer / bulan / revision): tabel kecil yang dijaga trigger, bukan DISTINCT atas
+-- forecast_monthly tiap page load. Baris dengan key NULL tidak jadi opsi filter (sama seperti dropna di page).
+drop view if exists v_forecast_filters;
+
+create table if not exists forecast_filter_options (
+    customer_name  text    not null,
+    forecast_month text    not null,
+    revision_no    integer not null,
+    primary key (customer_name, forecast_month, revision_no)
+);
+
+create or replace function sync_forecast_filter_options()
+returns trigger
+language plpgsql as $$
+begin
+    if tg_op in ('INSERT', 'UPDATE') then
+        insert into forecast_filter_options (customer_name, forecast_month, revision_no)
+        select distinct customer_name, forecast_month, revision_no
+        from new_rows
+        where customer_name is not null and forecast_month is not null and revision_no is not null
+        on conflict do nothing;
+    end if;
+    if tg_op in ('UPDATE', 'DELETE') then
+        -- key hanya dibuang kalau sudah tidak ada baris forecast_monthly yang memakainya
+        delete from forecast_filter_options o
+        using (select distinct customer_name, forecast_month, revision_no from old_rows) d
+        where o.customer_name = d.customer_name
+          and o.forecast_month = d.forecast_month
+          and o.revision_no = d.revision_no
+          and not exists (
+              select 1 from forecast_monthly m
+              where m.customer_name = o.customer_name
+                and m.forecast_month = o.forecast_month
+                and m.revision_no = o.revision_no
+          );
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists trg_forecast_filter_options_ins on forecast_monthly;
+create trigger trg_forecast_filter_options_ins after insert on forecast_monthly
+    referencing new table as new_rows
+    for each statement execute function sync_forecast_filter_options();
+
+drop trigger if exists trg_forecast_filter_options_upd on forecast_monthly;
+create trigger trg_forecast_filter_options_upd after update on forecast_monthly
+    referencing old table as old_rows new table as new_rows
+    for each statement execute function sync_forecast_filter_options();
+
+drop trigger if exists trg_forecast_filter_options_del on forecast_monthly;
+create trigger trg_forecast_filter_options_del after delete on forecast_monthly
+    referencing old table as old_rows
+    for each statement execute function sync_forecast_filter_options();
+
+-- isi awal (sekali saat migrasi)
+insert into forecast_filter_options (customer_name, forecast_month, revision_no)
+select distinct customer_name, forecast_month, revision_no
+from forecast_monthly
+where customer_name is not null and forecast_month is not null and revision_no is not null
+on conflict do nothing;
@@ -0,0 +1,7 @@
+-- Hari libur nasional / libur pabrik, dipakai kalender kerja (services/calendar_service.py).
+-- Tanggal di table ini dianggap 0 jam kerja untuk kapasitas (NAOH) dan scheduler.
+
+create table if not exists holiday (
+    date date primary key,
+    description text
+);
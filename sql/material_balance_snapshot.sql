@@ -0,0 +1,41 @@
+-- Saldo material (kg) s/d p_as_of + watermark id material_in / material_out dari SATU snapshot
+-- (satu statement = satu snapshot), dipakai services/projection_service saat build proyeksi resin.
+-- Watermark = id (bigserial, diisi server), bukan created_at yang sebagian diisi dari jam app server:
+-- transaksi yang masuk setelah snapshot dapat id > watermark, jadi ikut refresh incremental tanpa dobel.
+-- Qty dikonversi ke kg seperti utils.mrp.qty_in_kg: KG / UOM kosong apa adanya, G / 1000, UOM non-berat
+-- (BATCH/PCS/SAK/LITER/...) tidak dihitung. Transaksi tanpa date (mis. approve BON) pakai tanggal created_at.
+
+create or replace function material_balance_snapshot(p_as_of date)
+returns jsonb
+language sql stable as $$
+    with moves as (
+        select type_material, grade_material, color_material, qty, uom, coalesce(date, created_at::date) as day, 1 as sign
+        from material_in
+        union all
+        select type_material, grade_material, color_material, qty, uom, coalesce(date, created_at::date), -1
+        from material_out
+    ), kg as (
+        select type_material, grade_material, color_material, sign,
+               qty * case upper(trim(coalesce(uom, 'KG'))) when 'KG' then 1 when 'G' then 0.001 end as qty_kg
+        from moves
+        where day <= p_as_of
+    )
+    select jsonb_build_object(
+        -- kolom sama dengan v_material_balance (sudah dijumlah per material) supaya bisa langsung ke on_hand_from_balance
+        'balance', coalesce((
+            select jsonb_agg(b)
+            from (
+                select type_material, grade_material, color_material,
+                       coalesce(sum(qty_kg) filter (where sign > 0), 0) as qty_in_harian,
+                       coalesce(sum(qty_kg) filter (where sign < 0), 0) as qty_out_harian
+                from kg
+                where qty_kg is not null
+                group by type_material, grade_material, color_material
+            ) b
+        ), '[]'::jsonb),
+        'watermark', jsonb_build_object(
+            'material_in', (select max(id) from material_in),
+            'material_out', (select max(id) from material_out)
+        )
+    );
+$$;
@@ -0,0 +1,62 @@
+-- PO material terbuka / expected receipt (services/po_service.py).
+-- Outstanding = qty_order - qty_received, masuk proyeksi resin & MRP sebagai incoming di expected_date
+-- (PO telat = incoming hari ini). Penerimaan di Incoming Material mengurangi outstanding lewat receive_material_with_po.
+
+create table if not exists material_po (
+    id             bigserial primary key,
+    po_number      text        not null,
+    supplier_name  text,
+    type_material  text        not null,
+    grade_material text,
+    color_material text,
+    qty_order      numeric     not null check (qty_order > 0),
+    qty_received   numeric     not null default 0,
+    uom            text        not null default 'KG',
+    expected_date  date        not null,
+    status         text        not null default 'OPEN',  -- OPEN / CLOSED / CANCELLED
+    created_at     timestamptz not null default now()
+);
+
+create index if not exists idx_material_po_open
+    on material_po (status, expected_date);
+
+create index if not exists idx_material_po_number
+    on material_po (po_number);
+
+-- Catat penerimaan ke satu baris PO secara atomik; PO otomatis CLOSED kalau sudah diterima penuh.
+-- Error kalau baris PO tidak ada / sudah tidak OPEN (mis. diterima penuh atau dibatalkan user lain).
+create or replace function receive_material_po(p_id bigint, p_qty numeric)
+returns material_po
+language plpgsql as $$
+declare
+    v_po material_po;
+begin
+    update material_po
+    set qty_received = qty_received + p_qty,
+        status = case when qty_received + p_qty >= qty_order then 'CLOSED' else status end
+    where id = p_id and status = 'OPEN'
+    returning * into v_po;
+    if not found then
+        raise exception 'PO line % tidak ditemukan atau sudah tidak OPEN', p_id;
+    end if;
+    return v_po;
+end;
+$$;
+
+-- Penerimaan material_in + update outstanding PO dalam satu transaksi: kalau PO gagal, material_in ikut batal.
+-- p_receipt: satu baris material_in (kolom sama dengan insert Incoming Material), p_qty dalam uom PO.
+create or replace function receive_material_with_po(p_receipt jsonb, p_po_id bigint, p_qty numeric)
+returns material_po
+language plpgsql as $$
+declare
+    v_po material_po;
+begin
+    v_po := receive_material_po(p_po_id, p_qty);
+    insert into material_in (type_material, grade_material, color_material, qty, uom, date, waktu,
+                             supplier_name, no_do, po_number, lot_no, prepared_by)
+    select type_material, grade_material, color_material, qty, uom, date, waktu,
+           supplier_name, no_do, po_number, lot_no, prepared_by
+    from jsonb_populate_record(null::material_in, p_receipt);
+    return v_po;
+end;
+$$;
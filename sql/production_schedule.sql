@@ -0,0 +1,39 @@
+-- Jadwal injection hasil AI Production Planner (pages/app_planning.py) per mesin.
+-- Dipakai proyeksi stok (services/projection_service.py) sebagai supply FG & konsumsi resin terjadwal.
+-- Simpan ulang jadwal mesin = hapus window tanggal mesin itu lalu insert lot baru, satu transaksi
+-- (replace_production_schedule, dipanggil services/schedule_service.py).
+
+create table if not exists production_schedule (
+    id             bigserial primary key,
+    machine_id     text        not null,
+    date           date        not null,
+    assigned_shift text        not null,
+    part_no        text        not null,
+    part_name      text,
+    qty            numeric     not null default 0,
+    created_at     timestamptz not null default now()
+);
+
+create index if not exists idx_production_schedule_date
+    on production_schedule (date, part_no);
+
+create index if not exists idx_production_schedule_machine_date
+    on production_schedule (machine_id, date);
+
+-- Ganti jadwal satu mesin di window [p_start, p_end) secara atomik: kalau insert gagal, lot lama tidak ikut hilang.
+-- p_rows: array lot {date, assigned_shift, part_no, part_name, qty}. Return jumlah lot tersimpan.
+create or replace function replace_production_schedule(p_machine_id text, p_start date, p_end date, p_rows jsonb)
+returns integer
+language sql as $$
+    with removed as (
+        delete from production_schedule
+        where machine_id = p_machine_id and date >= p_start and date < p_end
+    ), added as (
+        insert into production_schedule (machine_id, date, assigned_shift, part_no, part_name, qty)
+        select p_machine_id, r.date, r.assigned_shift, r.part_no, r.part_name, coalesce(r.qty, 0)
+        from jsonb_to_recordset(coalesce(p_rows, '[]'::jsonb))
+            as r(date date, assigned_shift text, part_no text, part_name text, qty numeric)
+        returning 1
+    )
+    select count(*)::integer from added;
+$$;
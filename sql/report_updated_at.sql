@@ -0,0 +1,31 @@
+-- Marker perubahan untuk input report (pages/data_loader.report_input_version): updated_at diisi server
+-- tiap INSERT / UPDATE, jadi edit baris lama (mis. cycle time MASTER, qty forcast) ikut mengganti versi input
+-- dan job report dihitung ulang sekali, tanpa TTL.
+
+create or replace function set_updated_at()
+returns trigger
+language plpgsql as $$
+begin
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+alter table forcast add column if not exists updated_at timestamptz not null default now();
+alter table "MASTER" add column if not exists updated_at timestamptz not null default now();
+alter table rules add column if not exists updated_at timestamptz not null default now();
+
+drop trigger if exists trg_forcast_updated_at on forcast;
+create trigger trg_forcast_updated_at before insert or update on forcast
+    for each row execute function set_updated_at();
+
+drop trigger if exists trg_master_updated_at on "MASTER";
+create trigger trg_master_updated_at before insert or update on "MASTER"
+    for each row execute function set_updated_at();
+
+drop trigger if exists trg_rules_updated_at on rules;
+create trigger trg_rules_updated_at before insert or update on rules
+    for each row execute function set_updated_at();
+
+create index if not exists idx_forcast_updated_at on forcast (updated_at);
+create index if not exists idx_master_updated_at on "MASTER" (updated_at);
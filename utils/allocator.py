@@ -1,17 +1,119 @@
+import numpy as np
+import pandas as pd
+
+
 def allocate_hours_to_machines(cluster_hours, machine_list, cap_month):
-    assignments = []
-    remaining = cluster_hours
+    """
+    Bagi jam satu cluster rata ke semua mesin (water-filling, max cap_month per mesin),
+    bukan mengisi mesin pertama sampai 100% dulu.
+    """
+    n = len(machine_list)
+    if n == 0:
+        return []
+    share = min(max(cluster_hours, 0) / n, cap_month)
+    return [{"machine_id": mc, "assigned_hours": share} for mc in machine_list]
+
+
+def _water_fill(load, cap, idx, hours):
+    """Sebar hours ke mesin idx supaya utilisasi (load/cap) serata mungkin. Return array jam per mesin idx."""
+    util = load[idx] / cap[idx]
+    order = np.argsort(util, kind="stable")
+    util, c = util[order], cap[idx][order]
+
+    # Naikkan level utilisasi bersama sampai jam habis (level berikutnya = util mesin berikutnya)
+    level = util[-1]
+    for k in range(1, len(order) + 1):
+        cap_k = c[:k].sum()
+        need = np.sum((util[k - 1] - util[:k]) * c[:k])
+        nxt = util[k] if k < len(order) else np.inf
+        if hours <= need + (nxt - util[k - 1]) * cap_k:
+            level = util[k - 1] + (hours - need) / cap_k
+            break
+
+    add = np.clip(level - util, 0, None) * c
+    out = np.zeros(len(idx))
+    out[order] = add
+    return out
+
+
+def balance_part_hours(df_parts, df_machines, preferences=None, split_overflow=True):
+    """
+    Alokasi jam part ke press dengan tonase >= kebutuhan mold, objective min-max utilisasi (greedy LPT).
+
+    df_parts   : [part_no, hours, tonage] (tonage = kebutuhan minimum mold)
+    df_machines: [machine_id, tonage, cap_hours]
+    preferences: dict part_no -> machine_id (mesin tetap, ex: MASTER.machine_id), dipakai kalau kompatibel
+
+    Part paling tidak fleksibel (kandidat mesin paling sedikit) & jam terbesar dialokasikan duluan.
+    Tiap part masuk ke kelas tonase terkecil yang masih muat, di mesin dengan utilisasi akhir paling kecil.
+    Kalau kelas tonasenya penuh otomatis overflow ke press lebih besar; kalau semua penuh, ke mesin
+    kompatibel dengan utilisasi akhir paling kecil (min-max).
+    Part yang jamnya lebih besar dari kapasitas satu mesin dipecah rata (water-filling) kalau split_overflow=True.
+
+    Return (df_assign [part_no, machine_id, assigned_hours], df_load [machine_id, tonage, cap_hours,
+    load_hours, utilization], df_unassigned [part_no, hours, tonage]).
+    """
+    preferences = preferences or {}
+    mach = df_machines.reset_index(drop=True)
+    m_ids = mach["machine_id"].to_numpy()
+    m_ton = pd.to_numeric(mach["tonage"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    cap = pd.to_numeric(mach["cap_hours"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    cap = np.where(cap > 0, cap, np.nan)
+    load = np.zeros(len(mach))
+    pos = {mid: i for i, mid in enumerate(m_ids)}
+
+    parts = df_parts.reset_index(drop=True)
+    p_hours = pd.to_numeric(parts["hours"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    p_ton = pd.to_numeric(parts["tonage"], errors="coerce").fillna(0).to_numpy(dtype=float)
+
+    # compat[i, j] = press j bisa jalanin mold part i
+    compat = (m_ton[None, :] >= p_ton[:, None]) & ~np.isnan(cap)[None, :]
+    n_cand = compat.sum(axis=1)
+    order = np.lexsort((-p_hours, n_cand))
+
+    assign, unassigned = [], []
+    for i in order:
+        part_no, hours = parts.at[i, "part_no"], p_hours[i]
+        if hours <= 0:
+            continue
+        cand = np.flatnonzero(compat[i])
+        if len(cand) == 0:
+            unassigned.append({"part_no": part_no, "hours": hours, "tonage": p_ton[i]})
+            continue
+
+        pref = pos.get(preferences.get(part_no))
+        if pref is not None and compat[i, pref]:
+            load[pref] += hours
+            assign.append({"part_no": part_no, "machine_id": m_ids[pref], "assigned_hours": hours})
+            continue
 
-    for mc in machine_list:
-        if remaining <= 0:
-            assignments.append({"machine_id": mc, "assigned_hours": 0})
+        fits = (load[cand] + hours) / cap[cand] <= 1.0
+        too_big = hours > np.nanmax(cap[cand])
+        if not (split_overflow and too_big):
+            pool = cand[fits] if fits.any() else cand
+            if fits.any():
+                pool = pool[m_ton[pool] == m_ton[pool].min()]  # kelas tonase terkecil yang masih muat
+            util = (load[pool] + hours) / cap[pool]
+            j = pool[np.lexsort((m_ton[pool], util))[0]]
+            load[j] += hours
+            assign.append({"part_no": part_no, "machine_id": m_ids[j], "assigned_hours": hours})
             continue
 
-        if remaining > cap_month:
-            assignments.append({"machine_id": mc, "assigned_hours": cap_month})
-            remaining -= cap_month
-        else:
-            assignments.append({"machine_id": mc, "assigned_hours": remaining})
-            remaining = 0
+        spread = _water_fill(load, cap, cand, hours)
+        for j, h in zip(cand, spread):
+            if h > 0:
+                load[j] += h
+                assign.append({"part_no": part_no, "machine_id": m_ids[j], "assigned_hours": h})
 
-    return assignments
+    df_load = pd.DataFrame({
+        "machine_id": m_ids,
+        "tonage": m_ton,
+        "cap_hours": np.nan_to_num(cap),
+        "load_hours": load,
+        "utilization": np.divide(load, cap, out=np.zeros(len(load)), where=~np.isnan(cap)),
+    })
+    return (
+        pd.DataFrame(assign, columns=["part_no", "machine_id", "assigned_hours"]),
+        df_load,
+        pd.DataFrame(unassigned, columns=["part_no", "hours", "tonage"]),
+    )
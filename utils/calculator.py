@@ -1,16 +1,54 @@
+import numpy as np
+import pandas as pd
+
+
+_SCALAR_TYPES = (int, float, type(None), np.number)
+
+
+def _is_scalar(*values):
+    return all(isinstance(v, _SCALAR_TYPES) or np.ndim(v) == 0 for v in values)
+
+
+def _like(result, *inputs):
+    """Kalau salah satu input Series, kembalikan Series dengan index yang sama."""
+    for v in inputs:
+        if isinstance(v, pd.Series):
+            return pd.Series(result, index=v.index)
+    return result
+
+
+def _as_float(v):
+    return np.asarray(pd.to_numeric(v, errors="coerce") if isinstance(v, pd.Series) else v, dtype=float)
+
+
+def _masked_div(num, den):
+    """num / den elementwise, hasil 0 di posisi den 0 atau NaN (tanpa warning divide-by-zero)."""
+    num, den = np.broadcast_arrays(_as_float(num), _as_float(den))
+    return np.divide(num, den, out=np.zeros(num.shape), where=np.isfinite(den) & (den != 0))
+
+
 def output_per_hour(ct, cav, efficiency):
-    if not ct or ct == 0:
-        return 0
-    return (3600 / ct) * cav * efficiency
+    """Output pcs/jam. Scalar atau array/Series; CT 0 / kosong / NaN (array) -> 0."""
+    if _is_scalar(ct, cav, efficiency):
+        if not ct or ct == 0:
+            return 0
+        return (3600 / ct) * cav * efficiency
+    return _like(_masked_div(3600 * _as_float(cav) * _as_float(efficiency), ct), ct, cav, efficiency)
 
 
 def required_hours(forecast_qty, output_hr):
-    if output_hr == 0:
-        return 0
-    return forecast_qty / output_hr
+    """Jam yang dibutuhkan. Output 0 / NaN (array) -> 0."""
+    if _is_scalar(forecast_qty, output_hr):
+        if output_hr == 0:
+            return 0
+        return forecast_qty / output_hr
+    return _like(_masked_div(forecast_qty, output_hr), forecast_qty, output_hr)
 
 
 def required_days(req_hours, effective_hours_day):
-    if effective_hours_day == 0:
-        return 0
-    return req_hours / effective_hours_day
+    """Hari yang dibutuhkan. Jam efektif per hari 0 / NaN (array) -> 0."""
+    if _is_scalar(req_hours, effective_hours_day):
+        if effective_hours_day == 0:
+            return 0
+        return req_hours / effective_hours_day
+    return _like(_masked_div(req_hours, effective_hours_day), req_hours, effective_hours_day)
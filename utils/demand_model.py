@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+SES_ALPHAS = (0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.7)
+CROSTON_ALPHA = 0.1
+ADI_CUTOFF = 1.32  # Syntetos-Boylan: ADI > 1.32 = demand intermittent
+Z_95 = 1.96
+
+
+def build_history_matrix(df, start_date, n_weeks, part_col="part_no", date_col="date", qty_col="qty_out"):
+    """
+    Ubah transaksi (part, tanggal, qty) jadi matrix 2-D [part x minggu].
+    Minggu ke-0 dimulai di start_date (sebaiknya hari Senin). Return (array part_no, matrix).
+    Part digabung per key strip+upper, tapi part_no yang dikembalikan = ejaan asli (kemunculan pertama).
+    """
+    if df.empty:
+        return np.array([], dtype=object), np.zeros((0, n_weeks))
+
+    dates = pd.to_datetime(df[date_col], errors="coerce")
+    week_idx = ((dates - pd.Timestamp(start_date)).dt.days // 7).to_numpy()
+    qty = pd.to_numeric(df[qty_col], errors="coerce").fillna(0).to_numpy(dtype=float)
+    raw = df[part_col].astype(str).reset_index(drop=True)
+    codes, keys = pd.factorize(raw.str.strip().str.upper())
+    parts = raw.groupby(codes).first().reindex(np.arange(len(keys))).to_numpy(dtype=object)
+
+    valid = (week_idx >= 0) & (week_idx < n_weeks) & (codes >= 0)
+    history = np.zeros((len(parts), n_weeks))
+    np.add.at(history, (codes[valid], week_idx[valid].astype(int)), qty[valid])
+    return parts, history
+
+
+def fit_ses(history, alphas=SES_ALPHAS):
+    """
+    Simple Exponential Smoothing untuk semua part sekaligus.
+    Grid alpha dievaluasi paralel (shape [alpha x part]), alpha dengan SSE terkecil dipilih per part.
+    Return (level, alpha, sigma) masing-masing shape [part].
+    """
+    alphas = np.asarray(alphas, dtype=float)[:, None]
+    n_parts, n_weeks = history.shape
+    level = np.repeat(history[None, :, 0], len(alphas), axis=0)
+    sse = np.zeros_like(level)
+    for t in range(1, n_weeks):
+        err = history[None, :, t] - level
+        sse += err ** 2
+        level = level + alphas * err
+
+    best = np.argmin(sse, axis=0)
+    cols = np.arange(n_parts)
+    sigma = np.sqrt(sse[best, cols] / max(n_weeks - 1, 1))
+    return level[best, cols], alphas[best, 0], sigma
+
+
+def fit_croston(history, alpha=CROSTON_ALPHA):
+    """
+    Croston (varian SBA) untuk demand intermittent, vectorized untuk semua part.
+    Update size & interval hanya di minggu yang ada demand. Return (rate, sigma) shape [part].
+    """
+    n_parts, n_weeks = history.shape
+    nonzero = history > 0
+    has_demand = nonzero.any(axis=1)
+    first = np.where(has_demand, nonzero.argmax(axis=1), n_weeks)
+    cols = np.arange(n_parts)
+
+    size = np.where(has_demand, history[cols, np.minimum(first, n_weeks - 1)], 0.0)
+    interval = (first + 1).astype(float)
+    since = np.ones(n_parts)
+    sse = np.zeros(n_parts)
+    n_err = np.zeros(n_parts)
+
+    for t in range(1, n_weeks):
+        active = t > first
+        rate = np.divide(size, interval, out=np.zeros(n_parts), where=interval > 0)
+        err = np.where(active, history[:, t] - rate, 0.0)
+        sse += err ** 2
+        n_err += active
+
+        hit = active & nonzero[:, t]
+        size = np.where(hit, size + alpha * (history[:, t] - size), size)
+        interval = np.where(hit, interval + alpha * (since - interval), interval)
+        since = np.where(hit, 1.0, np.where(active, since + 1, since))
+
+    rate = np.divide(size, interval, out=np.zeros(n_parts), where=interval > 0) * (1 - alpha / 2)
+    sigma = np.sqrt(np.divide(sse, n_err, out=np.zeros(n_parts), where=n_err > 0))
+    return rate, sigma
+
+
+def classify_intermittent(history):
+    """True kalau rata-rata jarak antar demand (ADI) > ADI_CUTOFF."""
+    n_nonzero = (history > 0).sum(axis=1)
+    adi = np.divide(history.shape[1], n_nonzero, out=np.full(len(history), np.inf), where=n_nonzero > 0)
+    return adi > ADI_CUTOFF
+
+
+def forecast_parts(history, horizon, z=Z_95, alphas=SES_ALPHAS, croston_alpha=CROSTON_ALPHA):
+    """
+    Forecast N minggu ke depan untuk semua part dalam satu pass.
+    Part intermittent pakai Croston, sisanya SES. Interval: sigma * sqrt(1 + (h-1) * alpha^2).
+    Return dict: method, forecast [part x h], lower [part x h], upper [part x h].
+    """
+    n_parts = history.shape[0]
+    if n_parts == 0 or history.shape[1] == 0:
+        empty = np.zeros((n_parts, horizon))
+        return {"method": np.array([], dtype=object), "forecast": empty, "lower": empty, "upper": empty}
+
+    ses_level, ses_alpha, ses_sigma = fit_ses(history, alphas)
+    cro_rate, cro_sigma = fit_croston(history, croston_alpha)
+    intermittent = classify_intermittent(history)
+
+    point = np.where(intermittent, cro_rate, ses_level).clip(min=0)
+    alpha = np.where(intermittent, croston_alpha, ses_alpha)
+    sigma = np.where(intermittent, cro_sigma, ses_sigma)
+
+    h = np.arange(1, horizon + 1)
+    spread = z * sigma[:, None] * np.sqrt(1 + (h[None, :] - 1) * alpha[:, None] ** 2)
+    forecast = np.repeat(point[:, None], horizon, axis=1)
+    return {
+        "method": np.where(intermittent, "croston", "ses"),
+        "forecast": forecast,
+        "lower": (forecast - spread).clip(min=0),
+        "upper": forecast + spread,
+    }
+
+
+def spread_weekly_to_days(weekly, workdays_per_week=6):
+    """
+    Bagi forecast mingguan ke hari kerja (Senin-Sabtu) sebagai integer,
+    pakai cumulative rounding supaya total per part tetap sama. Return [part x (minggu*7)].
+    """
+    n_parts, n_weeks = weekly.shape
+    per_day = np.zeros((n_parts, n_weeks, 7))
+    per_day[:, :, :workdays_per_week] = (weekly / workdays_per_week)[:, :, None]
+    per_day = per_day.reshape(n_parts, n_weeks * 7)
+    cum = np.rint(np.cumsum(per_day, axis=1))
+    return np.diff(cum, axis=1, prepend=0).astype(int)
@@ -0,0 +1,57 @@
+"""
+Index facet in-memory untuk halaman filter: tiap dimensi di-encode jadi integer code sekali,
+filter = boolean mask NumPy (tanpa query ulang), count per nilai = bincount.
+"""
+import numpy as np
+import pandas as pd
+
+ALL = "All"
+
+
+class FacetIndex:
+    """Salinan kolumnar data + kode integer per dimensi filter."""
+
+    def __init__(self, df, dims):
+        self.df = df.reset_index(drop=True)
+        self.dims = tuple(dims)
+        self.codes = {}
+        self.values = {}
+        for dim in self.dims:
+            col = self.df[dim] if dim in self.df.columns else pd.Series(np.nan, index=self.df.index)
+            codes, uniques = pd.factorize(col, sort=True)  # NULL -> -1
+            self.codes[dim] = codes
+            self.values[dim] = pd.Index(uniques)
+
+    def __len__(self):
+        return len(self.df)
+
+    def append(self, df_new):
+        """Index baru dengan baris tambahan (data lama tidak di-fetch ulang)."""
+        if df_new is None or df_new.empty:
+            return self
+        return FacetIndex(pd.concat([self.df, df_new], ignore_index=True), self.dims)
+
+    def mask(self, exclude=None, **selected):
+        """Boolean mask baris yang cocok semua filter. Nilai None / 'All' = tidak difilter; exclude = dimensi yang diabaikan."""
+        mask = np.ones(len(self.df), dtype=bool)
+        for dim, value in selected.items():
+            if dim == exclude or value is None or value == ALL:
+                continue
+            code = self.values[dim].get_indexer([value])[0]
+            if code < 0:
+                return np.zeros(len(self.df), dtype=bool)
+            mask &= self.codes[dim] == code
+        return mask
+
+    def filter(self, **selected):
+        return self.df[self.mask(**selected)]
+
+    def counts(self, dim, **selected):
+        """Jumlah baris per nilai dim dengan filter dimensi LAIN diterapkan (facet count). Series nilai -> count."""
+        codes = self.codes[dim][self.mask(exclude=dim, **selected)]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.values[dim]))
+        return pd.Series(counts, index=self.values[dim])
+
+    def options(self, dim):
+        """Semua nilai distinct dim (urut), tanpa NULL."""
+        return self.values[dim].tolist()
@@ -0,0 +1,113 @@
+import io
+
+import pandas as pd
+
+DAY_COLS = [str(i) for i in range(1, 32)]
+DEFAULT_CHUNK_ROWS = 2000
+
+
+def normalize_header(col):
+    """Samakan nama kolom: strip spasi, header angka Excel (1.0 -> '1'), part_no case-insensitive."""
+    name = "" if col is None else str(col).strip()
+    try:
+        num = float(name)
+        if num.is_integer():
+            return str(int(num))
+    except ValueError:
+        pass
+    if name.lower() == "part_no":
+        return "part_no"
+    return name
+
+
+def validate_headers(columns):
+    """
+    Normalisasi + validasi header SEKALI di awal file.
+    Return list nama kolom yang sudah dinormalisasi, raise ValueError kalau part_no tidak ada.
+    """
+    cols = [normalize_header(c) for c in columns]
+    if "part_no" not in cols:
+        raise ValueError("Kolom 'part_no' tidak ditemukan di file (setelah normalisasi).")
+    if not any(c in DAY_COLS for c in cols):
+        raise ValueError("File tidak ditemukan kolom tanggal 1..31. Pastikan format: part_name, part_no, 1..31")
+    return cols
+
+
+def coerce_chunk(df):
+    """Konversi tipe per chunk: part_no jadi string bersih, kolom tanggal jadi numerik."""
+    df = df.loc[:, ~df.columns.duplicated()]
+    df = df[df["part_no"].notna()]
+    df = df.assign(part_no=df["part_no"].astype(str).str.strip())
+    df = df[df["part_no"] != ""].reset_index(drop=True)
+    day_cols = [c for c in DAY_COLS if c in df.columns]
+    if day_cols:
+        df[day_cols] = df[day_cols].apply(pd.to_numeric, errors="coerce")
+    return df
+
+
+def _is_csv(filename):
+    return str(filename).lower().endswith(".csv")
+
+
+def _rewind(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+
+def _iter_csv(file, chunk_rows):
+    # Bungkus sendiri biar pandas tidak menutup handle upload (perlu di-seek lagi setelah preview)
+    text = file if isinstance(file, io.TextIOBase) else io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        cols = None
+        for chunk in pd.read_csv(text, chunksize=chunk_rows, dtype=str):
+            if cols is None:
+                cols = validate_headers(chunk.columns)
+            chunk.columns = cols
+            yield coerce_chunk(chunk)
+    finally:
+        if text is not file:
+            text.detach()
+
+
+def _iter_xlsx(file, chunk_rows):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        cols = validate_headers(header)
+        buffer = []
+        for row in rows:
+            if not any(v is not None for v in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield coerce_chunk(pd.DataFrame(buffer, columns=cols))
+                buffer = []
+        if buffer:
+            yield coerce_chunk(pd.DataFrame(buffer, columns=cols))
+    finally:
+        wb.close()
+
+
+def iter_forecast_chunks(file, filename, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Baca file forecast (.csv / .xlsx) secara streaming.
+    Yield DataFrame per chunk (max chunk_rows baris) yang header-nya sudah divalidasi
+    dan tipenya sudah dikonversi, jadi memori tetap konstan walau file puluhan ribu baris.
+    """
+    _rewind(file)
+    if _is_csv(filename):
+        yield from _iter_csv(file, chunk_rows)
+    else:
+        yield from _iter_xlsx(file, chunk_rows)
+
+
+def peek_forecast_file(file, filename, n_rows=5):
+    """Ambil n baris pertama buat preview tanpa parsing seluruh file."""
+    head = next(iter_forecast_chunks(file, filename, chunk_rows=n_rows), pd.DataFrame())
+    _rewind(file)
+    return head
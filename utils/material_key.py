@@ -0,0 +1,91 @@
+"""
+Key material (TYPE-GRADE-COLOR) & dimensi material berkode integer.
+
+Dimensi dibangun dari List_Material; transaksi / BOM di-encode jadi material_code (int)
+sehingga grouping per material cukup satu groupby integer, bukan groupby 3 kolom string.
+"""
+import numpy as np
+import pandas as pd
+
+MATERIAL_COLS = ("type_material", "grade_material", "color_material")
+LIST_MATERIAL_COLS = ("TYPE", "GRADE", "COLOR")  # nama kolom di table List_Material
+
+
+def normalize_material(df, cols=MATERIAL_COLS):
+    """Kolom material dibersihkan (NULL -> '', strip, UPPER), kolom yang tidak ada jadi ''. Return DataFrame baru."""
+    return pd.DataFrame(
+        {
+            out: (df[c].fillna("").astype(str).str.strip().str.upper() if c in df.columns else pd.Series("", index=df.index))
+            for c, out in zip(cols, MATERIAL_COLS)
+        },
+        index=df.index,
+    )
+
+
+def material_key(df, cols=MATERIAL_COLS):
+    """material_id_unique 'TYPE-GRADE-COLOR' per baris, concat string vectorized."""
+    norm = normalize_material(df, cols)
+    return norm[MATERIAL_COLS[0]].str.cat([norm[c] for c in MATERIAL_COLS[1:]], sep="-")
+
+
+class MaterialDimension:
+    """
+    Tabel dimensi material: material_code (0..n-1), type/grade/color_material, material_id_unique.
+    Key & kode pakai nilai ter-normalisasi; pilihan selectbox (options) pakai ejaan asli sumber (raw),
+    karena nilai itu yang ditulis balik ke transaksi.
+    """
+
+    def __init__(self, table, raw=None):
+        self.table = table.reset_index(drop=True)
+        self.table["material_code"] = np.arange(len(self.table))
+        self._index = pd.Index(self.table["material_id_unique"])
+        self.raw = self.table[list(MATERIAL_COLS)] if raw is None else raw
+
+    @classmethod
+    def from_frame(cls, df, cols=LIST_MATERIAL_COLS):
+        """Bangun dimensi dari baris List_Material (atau frame lain dengan kolom material `cols`)."""
+        if df is None or df.empty:
+            norm = pd.DataFrame(columns=list(MATERIAL_COLS))
+            raw = norm.copy()
+        else:
+            norm = normalize_material(df, cols)
+            # Ejaan asli (tanpa strip / UPPER), NULL -> '' supaya dibuang dari pilihan
+            raw = pd.DataFrame({out: (df[c].fillna("").astype(str) if c in df.columns else "") for c, out in zip(cols, MATERIAL_COLS)}, index=df.index)
+        norm["material_id_unique"] = material_key(norm)
+        norm = norm.drop_duplicates("material_id_unique").sort_values("material_id_unique")
+        return cls(norm[[*MATERIAL_COLS, "material_id_unique"]], raw.drop_duplicates().reset_index(drop=True))
+
+    def __len__(self):
+        return len(self.table)
+
+    def encode(self, df, cols=MATERIAL_COLS):
+        """
+        material_code (ndarray int) per baris df. Material yang belum ada di dimensi ditambahkan
+        di belakang, jadi return (codes, dimensi) — dimensi asli tidak diubah.
+        """
+        keys = material_key(df, cols)
+        codes = self._index.get_indexer(keys)
+        missing = codes < 0
+        if not missing.any():
+            return codes, self
+        extra = normalize_material(df.loc[missing], cols)
+        extra["material_id_unique"] = keys[missing]
+        extra = extra.drop_duplicates("material_id_unique")
+        dim = MaterialDimension(pd.concat([self.table.drop(columns="material_code"), extra], ignore_index=True), self.raw)
+        return dim._index.get_indexer(keys), dim
+
+    def attributes(self, codes):
+        """Kolom type/grade/color_material + material_id_unique untuk array material_code."""
+        return self.table.iloc[np.asarray(codes)].reset_index(drop=True)
+
+    def options(self, col):
+        """Pilihan unik (urut, ejaan asli sumber) satu atribut, mis. options('type_material') untuk selectbox."""
+        values = self.raw[col]
+        return sorted(values[values != ""].unique().tolist())
+
+    def dependent_options(self):
+        """Pilihan bertingkat (ejaan asli) untuk selectbox dependent: (grade per type, color per (type, grade)), nilai kosong dibuang."""
+        def grouped(by, col):
+            df = self.raw[self.raw[col] != ""]
+            return {key: sorted(values.unique().tolist()) for key, values in df.groupby(by)[col]}
+        return grouped("type_material", "grade_material"), grouped(["type_material", "grade_material"], "color_material")
@@ -0,0 +1,164 @@
+"""
+MRP time-phased: lot injection terjadwal -> kebutuhan material (kg) per hari,
+di-netting dengan stok (v_material_balance) & incoming terbuka -> tanggal shortage per material.
+Semua perhitungan matrix [material x hari] NumPy, tanpa loop per part / per hari.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.material_key import material_key
+
+SHIFT_MINUTES = 420  # menit produktif per shift, sama dengan simulasi di app_planning
+
+
+def lot_output(ct, cav, shift_minutes=SHIFT_MINUTES):
+    """Output pcs per lot (1 shift) dari cycle time & cavity; CT 0 / kosong -> 0."""
+    ct = pd.to_numeric(pd.Series(ct), errors="coerce").to_numpy(dtype=float)
+    cav = pd.to_numeric(pd.Series(cav), errors="coerce").fillna(1).to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.floor(shift_minutes * 60 / ct * cav)
+    return np.where(np.isfinite(out) & (out > 0), out, 0.0)
+
+
+def _day_index(dates, start_date, days):
+    day = (pd.to_datetime(pd.Series(dates)).dt.normalize() - pd.Timestamp(start_date).normalize()).dt.days
+    return day.fillna(-1).to_numpy(dtype=np.int64)
+
+
+def _pivot_daily(keys, day, values, materials, days):
+    """Jumlahkan values ke matrix [materials x days] (day < 0 masuk hari 0, day >= days dibuang)."""
+    mat = np.zeros((len(materials), days))
+    codes = pd.Index(materials).get_indexer(keys)
+    day = np.clip(day, 0, None)
+    ok = (codes >= 0) & (day < days) & np.isfinite(values)
+    np.add.at(mat, (codes[ok], day[ok]), values[ok])
+    return mat
+
+
+def requirement_matrix(df_lots, df_master, start_date, days, date_col="date", qty_col="qty"):
+    """
+    Explode lot -> kebutuhan material (kg) per hari.
+    df_lots: baris lot (date_col, part_no, qty_col pcs); df_master: part_no, gross (gram/pcs) + kolom material.
+    Return DataFrame [material_id_unique x tanggal] kg. Part tanpa GROSS / material di-skip.
+    """
+    dates = pd.date_range(pd.Timestamp(start_date).normalize(), periods=days, freq="D")
+    if df_lots is None or df_lots.empty or df_master is None or df_master.empty:
+        return pd.DataFrame(index=pd.Index([], name="material_id_unique"), columns=dates, dtype=float)
+
+    master = df_master.drop_duplicates("part_no").reset_index(drop=True)
+    gross = pd.to_numeric(master.get("gross"), errors="coerce").to_numpy(dtype=float) if "gross" in master else np.full(len(master), np.nan)
+    keys = material_key(master).to_numpy()
+
+    part_idx = pd.Index(master["part_no"].astype(str)).get_indexer(df_lots["part_no"].astype(str))
+    qty = pd.to_numeric(df_lots[qty_col], errors="coerce").to_numpy(dtype=float)
+    day = _day_index(df_lots[date_col], start_date, days)
+
+    ok = (part_idx >= 0) & (day >= 0)
+    ok[ok] = np.isfinite(gross[part_idx[ok]]) & (gross[part_idx[ok]] > 0)
+    lot_keys = keys[part_idx[ok]]
+    kg = qty[ok] * gross[part_idx[ok]] / 1000
+
+    materials = pd.unique(lot_keys)
+    mat = _pivot_daily(lot_keys, day[ok], kg, materials, days)
+    return pd.DataFrame(mat, index=pd.Index(materials, name="material_id_unique"), columns=dates)
+
+
+def on_hand_from_balance(df_balance, as_of=None):
+    """
+    Stok material (kg) per key: sum(qty_in_harian - qty_out_harian), opsional s/d as_of (inklusif).
+    Baris saldo harus sudah kg (material_balance_snapshot); kalau ada kolom uom, dikonversi dulu seperti
+    incoming (qty_in_kg, UOM non-berat dibuang) supaya netting tidak mencampur satuan.
+    """
+    if df_balance is None or df_balance.empty:
+        return pd.Series(dtype=float)
+    df = df_balance
+    if as_of is not None and "date" in df.columns:
+        df = df[pd.to_datetime(df["date"]).dt.normalize() <= pd.Timestamp(as_of).normalize()]
+    if "uom" in df.columns:
+        factor = qty_in_kg(pd.Series(1.0, index=df.index), df["uom"])
+        df = df.assign(qty_in_harian=df["qty_in_harian"] * factor, qty_out_harian=df["qty_out_harian"] * factor)[factor.notna()]
+    qty = pd.to_numeric(df["qty_in_harian"], errors="coerce").fillna(0) - pd.to_numeric(df["qty_out_harian"], errors="coerce").fillna(0)
+    return qty.groupby(material_key(df).to_numpy()).sum()
+
+
+def qty_in_kg(qty, uom):
+    """Qty -> kg menurut UOM: KG apa adanya, G / 1000, UOM non-berat (BATCH/PCS/...) -> NaN. UOM kosong dianggap KG."""
+    uom = pd.Series(uom, index=getattr(qty, "index", None)).fillna("KG").astype(str).str.strip().str.upper()
+    factor = uom.map({"KG": 1.0, "G": 0.001})
+    return pd.to_numeric(qty, errors="coerce") * factor.to_numpy()
+
+
+def rows_in_kg(df, qty_col="qty", uom_col="uom"):
+    """Salinan df dengan qty_col dalam kg (qty_in_kg); baris UOM non-berat (BATCH/PCS/SAK/...) dibuang."""
+    if df is None or df.empty:
+        return df
+    uom = df[uom_col] if uom_col in df.columns else None
+    out = df.assign(**{qty_col: qty_in_kg(df[qty_col], uom)})
+    return out.dropna(subset=[qty_col])
+
+
+def incoming_matrix(df_incoming, materials, start_date, days, date_col="date", qty_col="qty"):
+    """Incoming terbuka (baris date, kolom material, qty kg) -> matrix [materials x days]; yang telat masuk hari 0."""
+    if df_incoming is None or df_incoming.empty:
+        return np.zeros((len(materials), days))
+    return _pivot_daily(
+        material_key(df_incoming).to_numpy(),
+        _day_index(df_incoming[date_col], start_date, days),
+        pd.to_numeric(df_incoming[qty_col], errors="coerce").to_numpy(dtype=float),
+        materials,
+        days,
+    )
+
+
+def net_requirements(df_req, on_hand=None, df_incoming=None, incoming_date_col="date", incoming_qty_col="qty"):
+    """
+    Netting kebutuhan harian vs stok + incoming terbuka.
+    on_hand: Series kg per material_id_unique; df_incoming: baris (date, kolom material, qty kg), telat -> hari 0.
+    Return (df_projected saldo akhir hari, df_net kebutuhan bersih baru per hari, df_summary per material).
+    """
+    materials = df_req.index
+    dates = pd.DatetimeIndex(df_req.columns)
+    days = len(dates)
+    req = df_req.to_numpy(dtype=float)
+
+    oh = np.zeros(len(materials))
+    if on_hand is not None and len(on_hand):
+        oh = on_hand.reindex(materials).fillna(0).to_numpy(dtype=float)
+
+    inc = incoming_matrix(df_incoming, materials, dates[0], days, incoming_date_col, incoming_qty_col)
+
+    projected = oh[:, None] + np.cumsum(inc - req, axis=1)
+    # Kekurangan kumulatif terbesar s/d hari itu; selisih harian = kebutuhan bersih yang harus datang hari itu
+    shortfall = np.maximum.accumulate(np.maximum(-projected, 0), axis=1)
+    net = np.diff(shortfall, axis=1, prepend=0)
+
+    short = projected < 0
+    has_short = short.any(axis=1)
+    first = short.argmax(axis=1)
+    shortage_date = pd.DatetimeIndex(dates)[first].where(has_short)
+
+    summary = pd.DataFrame({
+        "material_id_unique": materials,
+        "on_hand_kg": oh,
+        "required_kg": req.sum(axis=1),
+        "incoming_kg": inc.sum(axis=1),
+        "ending_kg": projected[:, -1],
+        "shortage_kg": shortfall[:, -1],
+        "shortage_date": shortage_date,
+        "cover_days": np.where(has_short, first, days),
+    }).sort_values(["shortage_date", "shortage_kg"], ascending=[True, False], na_position="last")
+
+    df_projected = pd.DataFrame(projected, index=materials, columns=dates)
+    df_net = pd.DataFrame(net, index=materials, columns=dates)
+    return df_projected, df_net, summary.reset_index(drop=True)
+
+
+def mrp_explosion(df_lots, df_master, df_balance, df_incoming, start_date, days, date_col="date", qty_col="qty"):
+    """
+    Satu pintu: lot -> kebutuhan harian -> netting. df_balance = saldo kg per material s/d hari ini (material_balance_snapshot).
+    Return (df_req, df_projected, df_net, df_summary).
+    """
+    df_req = requirement_matrix(df_lots, df_master, start_date, days, date_col=date_col, qty_col=qty_col)
+    on_hand = on_hand_from_balance(df_balance)
+    df_projected, df_net, df_summary = net_requirements(df_req, on_hand, df_incoming)
+    return df_req, df_projected, df_net, df_summary
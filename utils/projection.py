@@ -0,0 +1,111 @@
+"""
+Proyeksi stok per item (resin / part FG-WIP): saldo sekarang + supply terjadwal - konsumsi harian
+-> saldo proyeksi, days of cover & tanggal stockout. Semua item dihitung sekaligus (matrix [item x hari]);
+transaksi baru cukup update saldo & hitung ulang baris item yang berubah.
+"""
+import numpy as np
+import pandas as pd
+
+CRITICAL_DAYS = 3   # cover <= ini: KRITIS
+WARNING_DAYS = 7    # cover <= ini: WASPADA
+
+STATUS_MINUS = "STOCK MINUS"
+STATUS_CRITICAL = "KRITIS"
+STATUS_WARNING = "WASPADA"
+STATUS_SAFE = "AMAN"
+
+
+class StockProjection:
+    """
+    items: label item (part_no / material_id_unique); on_hand: saldo sekarang per item;
+    demand / supply: matrix [item x hari] mulai start_date (konsumsi & produksi/incoming terjadwal).
+    """
+
+    def __init__(self, items, on_hand, demand, supply=None, start_date=None):
+        self.items = pd.Index(items)
+        self.on_hand = np.asarray(on_hand, dtype=float).copy()
+        demand = np.asarray(demand, dtype=float)
+        # Tanpa item reshape(0, -1) gagal; matrix 2D kosong tetap dipakai apa adanya (horizon tetap)
+        self.demand = np.nan_to_num(demand if demand.ndim == 2 else demand.reshape(len(self.items), -1 if len(self.items) else 0))
+        self.supply = np.zeros_like(self.demand) if supply is None else np.nan_to_num(np.asarray(supply, dtype=float))
+        self.dates = pd.date_range(pd.Timestamp(start_date).normalize(), periods=self.demand.shape[1], freq="D")
+
+        self.projected = np.zeros_like(self.demand)
+        self.days_of_cover = np.zeros(len(self.items))
+        self.stockout_day = np.full(len(self.items), -1)
+        self._recompute(np.arange(len(self.items)))
+
+    @property
+    def horizon(self):
+        return self.demand.shape[1]
+
+    def _recompute(self, rows):
+        if not len(rows) or not self.horizon:
+            return
+        on_hand, demand, supply = self.on_hand[rows], self.demand[rows], self.supply[rows]
+        projected = on_hand[:, None] + np.cumsum(supply - demand, axis=1)
+
+        short = projected < 0
+        has_short = short.any(axis=1)
+        k = short.argmax(axis=1)
+        r = np.arange(len(rows))
+        # Stok tersedia di hari stockout (saldo kemarin + supply hari itu) menutup sebagian konsumsi hari itu
+        before = np.where(k > 0, projected[r, np.maximum(k - 1, 0)], on_hand)
+        avail = before + supply[r, k]
+        need = demand[r, k]
+        frac = np.clip(np.divide(avail, need, out=np.zeros(len(rows)), where=need > 0), 0, 1)
+
+        cover = np.where(has_short, k + frac, np.inf)
+        cover = np.where(on_hand < 0, 0.0, cover)
+        self.projected[rows] = projected
+        self.days_of_cover[rows] = cover
+        self.stockout_day[rows] = np.where(has_short, k, -1)
+
+    def apply_delta(self, items, delta):
+        """Transaksi baru: saldo item += delta (boleh item dobel), hanya baris itu yang dihitung ulang. Return jumlah item berubah."""
+        idx = self.items.get_indexer(pd.Index(items))
+        delta = np.asarray(delta, dtype=float)
+        ok = (idx >= 0) & np.isfinite(delta)
+        if not ok.any():
+            return 0
+        np.add.at(self.on_hand, idx[ok], delta[ok])
+        rows = np.unique(idx[ok])
+        self._recompute(rows)
+        return len(rows)
+
+    def set_on_hand(self, on_hand):
+        """Saldo terbaru (Series per item); hanya item yang saldonya berubah dihitung ulang. Return jumlah item berubah."""
+        new = on_hand.reindex(self.items).to_numpy(dtype=float)
+        new = np.where(np.isnan(new), self.on_hand, new)
+        rows = np.flatnonzero(~np.isclose(new, self.on_hand))
+        self.on_hand[rows] = new[rows]
+        self._recompute(rows)
+        return len(rows)
+
+    def set_supply(self, supply):
+        """Matrix supply baru [item x hari]; hanya item yang supply-nya berubah dihitung ulang. Return jumlah item berubah."""
+        new = np.nan_to_num(np.asarray(supply, dtype=float)).reshape(self.supply.shape)
+        rows = np.flatnonzero(~np.isclose(new, self.supply).all(axis=1))
+        self.supply[rows] = new[rows]
+        self._recompute(rows)
+        return len(rows)
+
+    def summary(self):
+        """Ranking urgensi: cover paling pendek (dan minus) paling atas."""
+        has_short = self.stockout_day >= 0
+        stockout_date = self.dates[np.maximum(self.stockout_day, 0)].where(has_short) if self.horizon else pd.DatetimeIndex([pd.NaT] * len(self.items))
+        status = np.select(
+            [self.on_hand < 0, self.days_of_cover <= CRITICAL_DAYS, self.days_of_cover <= WARNING_DAYS],
+            [STATUS_MINUS, STATUS_CRITICAL, STATUS_WARNING],
+            default=STATUS_SAFE,
+        )
+        df = pd.DataFrame({
+            "item": self.items,
+            "on_hand": self.on_hand,
+            "avg_daily_demand": self.demand.mean(axis=1) if self.horizon else 0.0,
+            "days_of_cover": self.days_of_cover,
+            "stockout_date": stockout_date,
+            "ending_balance": self.projected[:, -1] if self.horizon else self.on_hand,
+            "status": status,
+        })
+        return df.sort_values(["days_of_cover", "on_hand"]).reset_index(drop=True)
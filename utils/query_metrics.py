@@ -0,0 +1,197 @@
+"""
+Instrumentasi query Supabase: tiap execute() dicatat (table, method, filter, rows, bytes, latency),
+diagregasi per page & session, dan bisa diexport sebagai text format Prometheus.
+Dipanggil dari supabase_client; matikan dengan env PPIC_QUERY_METRICS=0.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENABLED = os.environ.get("PPIC_QUERY_METRICS", "1") != "0"
+PROM_PATH = os.environ.get("PPIC_QUERY_METRICS_FILE", os.path.join(ROOT_DIR, ".metrics", "supabase_queries.prom"))
+PROM_EXPORT_MIN_SEC = 15
+MAX_CALLS_PER_RUN = 500
+MAX_RUNS = 200                  # (session, page) yang disimpan; yang paling lama tidak dipakai dibuang
+BYTES_SAMPLE_ROWS = 20          # ukuran payload diestimasi dari sampel baris, bukan serialisasi seluruh response
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+NO_SESSION = "-"
+
+_lock = threading.Lock()
+_page_by_session = {}
+_runs = {}                      # (session, page) -> {"current": [...], "last": [...]}, urut terakhir dipakai
+_totals = defaultdict(lambda: {"calls": 0, "round_trips": 0, "seconds": 0.0, "rows": 0, "bytes": 0, "errors": 0})
+_buckets = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+_last_export = 0.0
+
+
+def _session_id():
+    """Session Streamlit yang sedang jalan (kalau dipanggil dari luar Streamlit: NO_SESSION)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx(suppress_warning=True)
+    except Exception:
+        return NO_SESSION
+    return ctx.session_id if ctx else NO_SESSION
+
+
+def table_name(path):
+    """'https://.../rest/v1/MASTER' -> 'MASTER', '.../rest/v1/rpc/fn' -> 'rpc/fn'."""
+    path = str(path).split("?")[0].rstrip("/")
+    tail = path.split("/rest/v1/")[-1] if "/rest/v1/" in path else path.rsplit("/", 1)[-1]
+    return tail or "?"
+
+
+def _payload_bytes(data):
+    """Estimasi ukuran JSON: serialisasi maks BYTES_SAMPLE_ROWS baris lalu diskalakan ke jumlah baris."""
+    if data is None:
+        return 0
+    sample = data[:BYTES_SAMPLE_ROWS] if isinstance(data, list) else data
+    try:
+        nbytes = len(json.dumps(sample, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+    if isinstance(data, list) and len(data) > len(sample):
+        nbytes = nbytes * len(data) // len(sample)
+    return nbytes
+
+
+def _run(sid, page):
+    """Buffer call (session, page), dipindah ke paling baru; buang yang paling lama kalau lewat MAX_RUNS. Panggil di bawah _lock."""
+    key = (sid, page)
+    run = _runs.pop(key, None) or {"current": [], "last": []}
+    _runs[key] = run
+    while len(_runs) > MAX_RUNS:
+        old = next(iter(_runs))
+        del _runs[old]
+        if not any(s == old[0] for s, _ in _runs):
+            _page_by_session.pop(old[0], None)
+    return run
+
+
+def begin_run(page, session_id=None):
+    """
+    Tandai awal rerun page (dipanggil dari navbar). Return list call rerun SEBELUMNYA
+    untuk session + page ini, karena call rerun sekarang belum terjadi saat navbar dirender.
+    """
+    sid = session_id or _session_id()
+    with _lock:
+        _page_by_session[sid] = page
+        run = _run(sid, page)
+        if run["current"]:
+            run["last"], run["current"] = run["current"], []
+        return list(run["last"])
+
+
+def record(path, method, params, data, seconds, error=None, shared=False):
+    """Catat satu execute(). shared=True artinya hasil numpang single-flight (bukan round trip baru)."""
+    if not ENABLED:
+        return
+    sid = _session_id()
+    table = table_name(path)
+    rows = len(data) if isinstance(data, list) else (1 if data else 0)
+    nbytes = 0 if shared else _payload_bytes(data)
+    call = {
+        "ts": time.time(),
+        "table": table,
+        "method": str(method).upper(),
+        "filters": str(params),
+        "rows": rows,
+        "bytes": nbytes,
+        "ms": round(seconds * 1000, 1),
+        "shared": shared,
+        "error": type(error).__name__ if error else "",
+    }
+    with _lock:
+        page = _page_by_session.get(sid, NO_SESSION)
+        run = _run(sid, page)
+        if len(run["current"]) < MAX_CALLS_PER_RUN:
+            run["current"].append(call)
+
+        key = (page, table, call["method"])
+        tot = _totals[key]
+        tot["calls"] += 1
+        tot["round_trips"] += 0 if shared else 1
+        tot["seconds"] += seconds
+        tot["rows"] += rows
+        tot["bytes"] += nbytes
+        tot["errors"] += 1 if error else 0
+        b = _buckets[key]
+        for i, le in enumerate(LATENCY_BUCKETS):
+            if seconds <= le:
+                b[i] += 1
+                break
+        else:
+            b[-1] += 1
+
+
+def summarize(calls):
+    """Ringkasan list call: round trip, total ms, rows, bytes."""
+    return {
+        "calls": len(calls),
+        "round_trips": sum(not c["shared"] for c in calls),
+        "ms": round(sum(c["ms"] for c in calls), 1),
+        "rows": sum(c["rows"] for c in calls),
+        "bytes": sum(c["bytes"] for c in calls),
+    }
+
+
+def page_totals():
+    """Agregat kumulatif semua session: list dict per (page, table, method), urut total waktu terbesar."""
+    with _lock:
+        items = [{"page": k[0], "table": k[1], "method": k[2], **v} for k, v in _totals.items()]
+    return sorted(items, key=lambda r: r["seconds"], reverse=True)
+
+
+def _label(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text():
+    """Export agregat dalam text exposition format Prometheus."""
+    with _lock:
+        totals = {k: dict(v) for k, v in _totals.items()}
+        buckets = {k: list(v) for k, v in _buckets.items()}
+
+    lines = []
+    metrics = (
+        ("supabase_query_calls_total", "counter", "Jumlah execute() query", "calls"),
+        ("supabase_query_round_trips_total", "counter", "Jumlah request HTTP ke Supabase (tanpa yang numpang single-flight)", "round_trips"),
+        ("supabase_query_rows_total", "counter", "Jumlah baris yang dikembalikan", "rows"),
+        ("supabase_query_payload_bytes_total", "counter", "Ukuran payload JSON (bytes, estimasi dari sampel baris)", "bytes"),
+        ("supabase_query_errors_total", "counter", "Jumlah query error", "errors"),
+    )
+    for name, kind, help_text, field in metrics:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for (page, table, method), v in sorted(totals.items()):
+            lines.append(f'{name}{{page="{_label(page)}",table="{_label(table)}",method="{method}"}} {v[field]}')
+
+    name = "supabase_query_duration_seconds"
+    lines += [f"# HELP {name} Latency execute() query", f"# TYPE {name} histogram"]
+    for key, b in sorted(buckets.items()):
+        page, table, method = key
+        labels = f'page="{_label(page)}",table="{_label(table)}",method="{method}"'
+        cum = 0
+        for le, n in zip(LATENCY_BUCKETS, b):
+            cum += n
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cum}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {cum + b[-1]}')
+        lines.append(f"{name}_sum{{{labels}}} {totals[key]['seconds']:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {totals[key]['calls']}")
+    return "\n".join(lines) + "\n"
+
+
+def export_prometheus(path=PROM_PATH, force=False):
+    """Tulis prometheus_text() ke file (atomic replace), max sekali per PROM_EXPORT_MIN_SEC kecuali force."""
+    global _last_export
+    if not ENABLED or (not force and time.time() - _last_export < PROM_EXPORT_MIN_SEC):
+        return None
+    _last_export = time.time()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+    return path
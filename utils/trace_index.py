@@ -0,0 +1,166 @@
+"""
+Index traceability lot material: receipt (material_in) -> issue ke line (material_out) -> produksi part
+(monitor_per_hour / Hasil_Produksi) -> wip_in -> fg_in -> Delivery_FG.
+
+Tiap tahap = Timeline: baris event dikelompokkan per key, posisi per key urut waktu, jadi query
+"key X antara t0..t1" = dict lookup + searchsorted (tanpa scan table). Baris baru cukup di-append;
+hanya key yang kena yang diurutkan ulang.
+
+Link antar tahap (tidak ada nomor lot di hilir, jadi pakai jendela waktu — hasilnya "suspect range" untuk containment):
+- issue -> produksi: line sama, part yang material-nya = material lot, dalam CONSUME_HOURS setelah issue
+- produksi -> wip/fg/delivery: part sama, dalam DOWNSTREAM_DAYS setelah produksi pertama
+"""
+import numpy as np
+import pandas as pd
+
+CONSUME_HOURS = 24     # lot yang di-issue ke line dianggap habis dalam jendela ini
+DOWNSTREAM_DAYS = 14   # part hasil produksi dianggap keluar ke wip/fg/delivery dalam jendela ini
+NO_LINE = ""           # produksi tanpa info line (Hasil_Produksi)
+
+STAGES = ("receipts", "issues", "production", "wip", "fg", "delivery")
+
+
+class Timeline:
+    """Event satu tahap, di-index per key (kolom key_cols) dan urut kolom ts di dalam key."""
+
+    def __init__(self, key_cols, ts_col="ts"):
+        self.key_cols = list(key_cols)
+        self.ts_col = ts_col
+        self.frame = pd.DataFrame()
+        self._ts = np.array([], dtype="datetime64[ns]")
+        self._groups = {}
+
+    def __len__(self):
+        return len(self.frame)
+
+    def append(self, df):
+        """Tambah baris (tanpa ts diabaikan); hanya key di baris baru yang diurutkan ulang. Return jumlah key berubah."""
+        if df is None or df.empty:
+            return 0
+        df = df.dropna(subset=[self.ts_col]).reset_index(drop=True)
+        offset = len(self.frame)
+        self.frame = pd.concat([self.frame, df], ignore_index=True) if offset else df
+        self._ts = self.frame[self.ts_col].to_numpy(dtype="datetime64[ns]")
+
+        by = self.key_cols if len(self.key_cols) > 1 else self.key_cols[0]
+        groups = df.groupby(by, sort=False).indices
+        for key, pos in groups.items():
+            pos = pos + offset
+            old = self._groups.get(key)
+            if old is not None:
+                pos = np.concatenate([old, pos])
+            self._groups[key] = pos[np.argsort(self._ts[pos], kind="stable")]
+        return len(groups)
+
+    def positions(self, key, start=None, end=None):
+        """Posisi baris key dengan start <= ts <= end (None = tanpa batas)."""
+        pos = self._groups.get(key)
+        if pos is None:
+            return np.array([], dtype=np.intp)
+        ts = self._ts[pos]
+        lo = 0 if start is None else np.searchsorted(ts, np.datetime64(pd.Timestamp(start)), "left")
+        hi = len(pos) if end is None else np.searchsorted(ts, np.datetime64(pd.Timestamp(end)), "right")
+        return pos[lo:hi]
+
+    def lookup(self, queries):
+        """queries: iterable (key, start, end) -> DataFrame baris gabungan (tanpa dobel), urut ts."""
+        return self.rows([self.positions(key, start, end) for key, start, end in queries])
+
+    def rows(self, positions):
+        """List array posisi -> DataFrame baris gabungan (tanpa dobel), urut ts."""
+        pos = np.unique(np.concatenate(positions)) if positions else np.array([], dtype=np.intp)
+        if not len(pos):
+            return self.frame.iloc[0:0]
+        return self.frame.iloc[pos].sort_values(self.ts_col)
+
+
+class TraceIndex:
+    """
+    Semua tahap + peta material -> part (dari MASTER). Kolom standar per tahap:
+    receipts: lot_no, material_id_unique, ts, qty, ...     issues: lot_no, material_id_unique, line, ts, qty, ...
+    production: line, part_no, ts, qty, source              wip / fg / delivery: part_no, ts, qty, ref
+    """
+
+    def __init__(self, parts_by_material=None):
+        self.parts_by_material = parts_by_material or {}
+        self.materials_by_part = {}
+        for material, parts in self.parts_by_material.items():
+            for part in parts:
+                self.materials_by_part.setdefault(part, set()).add(material)
+
+        self.receipts = Timeline(["lot_no"])
+        self.issues = Timeline(["lot_no"])
+        self.issues_by_material = Timeline(["material_id_unique"])
+        self.production = Timeline(["line", "part_no"])
+        self.production_by_part = Timeline(["part_no"])
+        self.wip = Timeline(["part_no"])
+        self.fg = Timeline(["part_no"])
+        self.delivery = Timeline(["part_no"])
+        self.delivery_by_no = Timeline(["ref"])
+
+    def add(self, stage, df):
+        """Append baris baru ke tahap (nama di STAGES) beserta index turunannya. Return jumlah key berubah."""
+        if stage == "issues":
+            self.issues_by_material.append(df)
+        elif stage == "production":
+            self.production_by_part.append(df)
+        elif stage == "delivery":
+            self.delivery_by_no.append(df)
+        return getattr(self, stage).append(df)
+
+    def _downstream(self, first_ts):
+        """wip / fg / delivery part dalam DOWNSTREAM_DAYS setelah produksi pertamanya."""
+        window = pd.Timedelta(days=DOWNSTREAM_DAYS)
+        queries = [(part, ts.normalize(), ts + window) for part, ts in first_ts.items()]
+        return {stage: getattr(self, stage).lookup(queries) for stage in ("wip", "fg", "delivery")}
+
+    def forward(self, lot_no):
+        """Lot material -> receipt, issue, produksi, wip, fg, delivery yang suspect. Return dict tahap -> DataFrame."""
+        lot_no = str(lot_no).strip()
+        issues = self.issues.lookup([(lot_no, None, None)])
+
+        window = pd.Timedelta(hours=CONSUME_HOURS)
+        queries = []
+        for line, material, ts in zip(issues.get("line", []), issues.get("material_id_unique", []), issues.get("ts", [])):
+            for part in self.parts_by_material.get(material, ()):
+                queries.append(((line, part), ts, ts + window))
+                queries.append(((NO_LINE, part), ts, ts + window))
+        production = self.production.lookup(queries)
+
+        first_ts = production.groupby("part_no")["ts"].min() if not production.empty else pd.Series(dtype="datetime64[ns]")
+        return {
+            "receipts": self.receipts.lookup([(lot_no, None, None)]),
+            "issues": issues,
+            "production": production,
+            **self._downstream(first_ts),
+        }
+
+    def backward(self, no_delivery):
+        """Surat jalan -> produksi part-nya sebelum kirim -> issue material ke line -> lot & receipt. Return dict tahap -> DataFrame."""
+        delivery = self.delivery_by_no.lookup([(str(no_delivery).strip(), None, None)])
+
+        window = pd.Timedelta(days=DOWNSTREAM_DAYS)
+        queries = [(part, ts - window, ts) for part, ts in zip(delivery.get("part_no", []), delivery.get("ts", []))]
+        production = self.production_by_part.lookup(queries)
+        wip, fg = self.wip.lookup(queries), self.fg.lookup(queries)
+
+        # Issue material ke line dalam CONSUME_HOURS sebelum produksi; produksi tanpa info line cocok ke semua line
+        consume = pd.Timedelta(hours=CONSUME_HOURS)
+        by_material = self.issues_by_material
+        issue_lines = by_material.frame["line"].to_numpy() if len(by_material) else np.array([], dtype=object)
+        positions = []
+        for part, line, ts in zip(production.get("part_no", []), production.get("line", []), production.get("ts", [])):
+            for material in self.materials_by_part.get(part, ()):
+                pos = by_material.positions(material, ts - consume, ts)
+                positions.append(pos if line == NO_LINE else pos[issue_lines[pos] == line])
+        issues = by_material.rows(positions)
+
+        lots = issues["lot_no"].dropna().unique().tolist() if not issues.empty else []
+        return {
+            "receipts": self.receipts.lookup([(lot, None, None) for lot in lots]),
+            "issues": issues,
+            "production": production,
+            "wip": wip,
+            "fg": fg,
+            "delivery": delivery,
+        }
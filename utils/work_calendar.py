@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+DAY_TYPES = ("WEEKDAY", "SATURDAY", "SUNDAY")
+NO_SCHEDULE_DAY_TYPES = ("SUNDAY",)  # scheduler tidak pernah menjadwalkan di hari Minggu, walau SHIFT punya baris SUNDAY
+DEFAULT_SHIFT_HOURS = 8.0
+
+
+def day_type_of(dates):
+    """Mapping tanggal -> day_type SHIFT (Senin-Jumat WEEKDAY, Sabtu SATURDAY, Minggu SUNDAY), vectorized."""
+    dow = pd.DatetimeIndex(dates).dayofweek.to_numpy()
+    return np.where(dow == 6, "SUNDAY", np.where(dow == 5, "SATURDAY", "WEEKDAY"))
+
+
+def working_day_mask(dates, holidays=(), skip_day_types=NO_SCHEDULE_DAY_TYPES):
+    """
+    Mask hari kerja per tanggal: bukan hari libur & day_type bukan skip_day_types.
+    Dipakai bersama day_hours (kapasitas) dan shift_slots (slot jadwal) supaya keduanya selalu sepakat.
+    """
+    dates = pd.DatetimeIndex(dates).normalize()
+    mask = ~np.isin(day_type_of(dates), skip_day_types)
+    if len(holidays):
+        mask &= ~dates.isin(pd.DatetimeIndex(holidays).normalize())
+    return mask
+
+
+def normalize_shift_table(df_shift):
+    """Kolom lowercase + day_type UPPER tanpa spasi (sama seperti pembersihan di app_planning)."""
+    if df_shift is None or df_shift.empty:
+        return pd.DataFrame(columns=["day_type", "shift_name"])
+    df = df_shift.copy()
+    df.columns = [c.lower() for c in df.columns]
+    if "day_type" in df.columns:
+        df["day_type"] = df["day_type"].astype(str).str.strip().str.upper()
+    return df
+
+
+def shift_durations(df_shift, default_hours=DEFAULT_SHIFT_HOURS):
+    """
+    Durasi (jam) tiap baris SHIFT.
+    Pakai start_time/end_time kalau ada (shift malam lewat tengah malam tetap benar), kalau tidak pakai default_hours.
+    """
+    if df_shift.empty:
+        return np.zeros(0)
+    if {"start_time", "end_time"}.issubset(df_shift.columns):
+        start = pd.to_timedelta(df_shift["start_time"].astype(str), errors="coerce")
+        end = pd.to_timedelta(df_shift["end_time"].astype(str), errors="coerce")
+        hours = ((end - start).dt.total_seconds() / 3600) % 24
+        return hours.fillna(default_hours).to_numpy(dtype=float)
+    return np.full(len(df_shift), float(default_hours))
+
+
+def hours_per_day_type(df_shift, default_hours=DEFAULT_SHIFT_HOURS):
+    """Total jam kerja per day_type dari table SHIFT: dict {WEEKDAY: jam, SATURDAY: jam, SUNDAY: jam}."""
+    df = normalize_shift_table(df_shift)
+    out = dict.fromkeys(DAY_TYPES, 0.0)
+    if df.empty or "day_type" not in df.columns:
+        return out
+    sums = pd.Series(shift_durations(df, default_hours), index=df["day_type"].to_numpy()).groupby(level=0).sum()
+    out.update({k: float(v) for k, v in sums.items() if k in out})
+    return out
+
+
+def day_hours(dates, day_type_hours, holidays=(), skip_day_types=NO_SCHEDULE_DAY_TYPES):
+    """Jam kerja tersedia per tanggal (array); hari libur & skip_day_types (default Minggu, sama dengan shift_slots) = 0."""
+    dates = pd.DatetimeIndex(dates).normalize()
+    types = day_type_of(dates)
+    hours = np.select(
+        [types == t for t in DAY_TYPES],
+        [day_type_hours.get(t, 0.0) for t in DAY_TYPES],
+        default=0.0,
+    )
+    hours[~working_day_mask(dates, holidays, skip_day_types)] = 0.0
+    return hours
+
+
+def machine_day_hours(availability, hours):
+    """Matrix [mesin x hari] = availability mesin (1 aktif / 0 non-aktif / pecahan) x jam kerja harian."""
+    return np.outer(np.asarray(availability, dtype=float), np.asarray(hours, dtype=float))
+
+
+def monthly_totals(dates, matrix):
+    """
+    Jumlahkan kolom harian per bulan dengan satu np.add.reduceat.
+    Return (list 'YYYY-MM', array [baris x bulan]). dates harus urut.
+    """
+    dates = pd.DatetimeIndex(dates)
+    if len(dates) == 0:
+        return [], np.zeros((np.shape(matrix)[0], 0))
+    periods = dates.strftime("%Y-%m").to_numpy()
+    starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+    return list(periods[starts]), np.add.reduceat(np.asarray(matrix, dtype=float), starts, axis=-1)
+
+
+def shift_slots(dates, df_shift, holidays=(), skip_day_types=NO_SCHEDULE_DAY_TYPES):
+    """
+    Semua slot (tanggal x shift) yang jalan: hari dengan shift di SHIFT, bukan hari libur & bukan skip_day_types
+    (default Minggu, sama seperti scheduler lama). Return DataFrame [date, day_num, assigned_shift, slot_id]
+    urut tanggal lalu urutan shift.
+    """
+    df = normalize_shift_table(df_shift)
+    cols = ["date", "day_num", "assigned_shift", "slot_id"]
+    if df.empty or "day_type" not in df.columns:
+        return pd.DataFrame(columns=cols)
+
+    dates = pd.DatetimeIndex(dates).normalize()
+    dates = dates[working_day_mask(dates, holidays, skip_day_types)]
+    days = pd.DataFrame({"date": dates, "day_type": day_type_of(dates)})
+
+    name_col = "shift_name" if "shift_name" in df.columns else None
+    shifts = pd.DataFrame({
+        "day_type": df["day_type"].to_numpy(),
+        "assigned_shift": df[name_col].to_numpy() if name_col else np.full(len(df), None),
+        "shift_order": np.arange(len(df)),
+    })
+    slots = days.merge(shifts, on="day_type", how="inner").sort_values(["date", "shift_order"], kind="stable")
+    if slots.empty:
+        return pd.DataFrame(columns=cols)
+    slots["day_num"] = slots["date"].dt.day
+    slots["slot_id"] = slots["date"].dt.strftime("%Y-%m-%d %H:%M:%S") + "_" + slots["assigned_shift"].astype(str)
+    return slots[cols].reset_index(drop=True)